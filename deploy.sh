@@ -53,4 +53,7 @@ cd ..
 docker ps
 echo "FRONTEND_URL_LOCAL=http://localhost:8080/" > .env
 #    - docker run --rm --net=host --env-file .env frontend_test:latest pytest tests/test_with_pytest.py::Test_URL::test_infobox tests/test_with_pytest.py::Test_URL::test_open_url tests/test_with_pytest.py::Test_URL::test_close_open_popup
-docker run --rm --net=host --env-file .env frontend_test:latest /startup.sh
+# the durations of the tests are kept between the runs to balance the shards,
+# the inputs of the passed tests to skip the unchanged ones and the history
+mkdir -p durations
+docker run --rm --net=host --env-file .env -e SHARD_COUNT -e SHARD_INDEX -e CI_NODE_TOTAL -e CI_NODE_INDEX -e DURATIONS_FILE=/durations/durations.json -e INCREMENTAL -e INCREMENTAL_FILE=/durations/passed.json -e HISTORY -e HISTORY_DB=/durations/history.sqlite -v "$PWD/durations:/durations" frontend_test:latest /startup.sh
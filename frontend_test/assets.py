@@ -0,0 +1,156 @@
+"""
+assets.py: validation of the images shown by the frontend. The urls of a
+panel are collected in one script call and checked concurrently over a pooled
+keep-alive session. The definitive results are cached during the run, so an
+image shared by two panels is only requested once; the failed requests and
+the server errors are checked again.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from frontend_test.instrumentation import timed
+from frontend_test.replay import active_proxy
+
+MAX_WORKERS = int(os.getenv("ASSETS_MAX_WORKERS", "16"))
+
+_IMAGE_URLS_JS = """
+var images = arguments[0].querySelectorAll(arguments[1]);
+var urls = [];
+for (var i = 0; i < images.length; i++) {
+    urls.push(images[i].src);
+}
+return urls;
+"""
+
+# status codes returned when the server does not accept HEAD requests
+_HEAD_NOT_ALLOWED = (403, 405, 501)
+# status codes of transient errors, checked again by the next panel
+_TRANSIENT = (408, 429)
+
+_cache = {}
+_cache_lock = threading.Lock()
+_session = None
+_session_proxy = None
+
+
+def get_session():
+    """
+    get_session: return the session shared by all the checks. Its connection
+        pool is as big as the number of workers. The session is created again
+        when the record/replay proxy is started or stopped, as the session
+        can be used before the proxy fixture starts.
+
+    Returns:
+        requests.Session: session with keep-alive connections
+    """
+    global _session, _session_proxy
+    proxy = active_proxy()
+    if _session is None or proxy != _session_proxy:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if proxy is not None:
+            # the images are also recorded and replayed
+            session.proxies = {"http": proxy, "https": proxy}
+            session.verify = False
+            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        _session = session
+        _session_proxy = proxy
+    return _session
+
+
+def clear_cache():
+    """
+    clear_cache: forget the urls that were already checked
+    """
+    with _cache_lock:
+        _cache.clear()
+
+
+def check_url(url, timeout=5):
+    """
+    check_url: check if a url is available without downloading it. It uses a
+        HEAD request and, if the server does not allow it, a GET request of
+        the first byte only.
+
+    Args:
+        url (str): url of the asset
+        timeout (float, optional): timeout of the request. Defaults to 5.
+
+    Returns:
+        int|None: status code, None if the request failed. A partial content
+    (206) is reported as 200.
+    """
+    with _cache_lock:
+        if url in _cache:
+            return _cache[url]
+    session = get_session()
+    try:
+        response = session.head(url, timeout=timeout, allow_redirects=True)
+        status = response.status_code
+        if status in _HEAD_NOT_ALLOWED:
+            response = session.get(
+                url, timeout=timeout, headers={"Range": "bytes=0-0"}, stream=True
+            )
+            status = response.status_code
+            response.close()
+    except requests.RequestException:
+        status = None
+    if status == 206:
+        status = 200
+    if status is not None and status < 500 and status not in _TRANSIENT:
+        # a failed request or a server error is not cached, so a later
+        # check of the url can succeed
+        with _cache_lock:
+            _cache[url] = status
+    return status
+
+
+def check_urls(urls, timeout=5, max_workers=None):
+    """
+    check_urls: check several urls at the same time
+
+    Args:
+        urls (str[]): urls of the assets
+        timeout (float, optional): timeout of each request. Defaults to 5.
+        max_workers (int, optional): number of threads. Defaults to
+    ASSETS_MAX_WORKERS.
+
+    Returns:
+        list: list of (url, status) in the same order as the urls
+    """
+    if max_workers is None:
+        max_workers = MAX_WORKERS
+    unique_urls = list(dict.fromkeys(urls))
+    if not unique_urls:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(unique_urls))) as pool:
+        statuses = dict(
+            zip(unique_urls, pool.map(lambda url: check_url(url, timeout), unique_urls))
+        )
+    return [(url, statuses[url]) for url in urls]
+
+
+@timed
+def check_images(driver, element, selector="button img", timeout=5):
+    """
+    check_images: collect the urls of the images inside of a element and check
+        them concurrently
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+        element (WebElement): element with the images, as the result panel
+        selector (str, optional): css selector of the images. Defaults to
+    "button img", the images of the cards.
+        timeout (float, optional): timeout of each request. Defaults to 5.
+
+    Returns:
+        list: list of (url, status) in the order of the images
+    """
+    urls = driver.execute_script(_IMAGE_URLS_JS, element, selector)
+    return check_urls(urls, timeout=timeout)
@@ -0,0 +1,381 @@
+"""
+bathymetry.py: validation of the bathymetry profiles drawn by the frontend
+against a local copy of the bathymetry raster (BATHYMETRY_RASTER). The points
+of the plotted profile are placed along the clicked transect from their
+distance, the raster is sampled at these points with a bilinear
+interpolation (vectorised with NumPy) and the depths are compared within
+BATHYMETRY_TOLERANCE. The time taken by the frontend to show the profile, and
+by its requests to the tile server (with Chrome), is reported with the time
+of the local computation.
+
+The GeoTIFF rasters are read with rasterio (pip install .[raster]). Without
+rasterio, the raster can be given as a .npz file with the arrays "elevation"
+and "transform" (the 6 coefficients of the affine transform of the pixels to
+longitude and latitude, as in rasterio).
+
+Usage:
+    python -m frontend_test.bathymetry --raster haig_fras.tif
+"""
+import argparse
+import functools
+import json
+import os
+import sys
+from time import perf_counter
+import numpy as np
+from dotenv import load_dotenv
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from frontend_test import flows
+from frontend_test.driver import BrowserSession
+from frontend_test.graph import plot_figure
+from frontend_test.instrumentation import timed
+from frontend_test.leaflet import offset_locations
+from frontend_test.network import network_tracker
+from frontend_test.utils import click_fontawesome
+from frontend_test.wait import wait_until
+
+try:
+    import rasterio
+    from rasterio.warp import transform as warp_transform
+except ImportError:
+    rasterio = None
+
+BATHYMETRY_RASTER = os.getenv("BATHYMETRY_RASTER", "")
+# maximum difference, in metres, between a plotted depth and the raster
+BATHYMETRY_TOLERANCE = float(os.getenv("BATHYMETRY_TOLERANCE", "10"))
+# fraction of the points allowed outside of the tolerance
+BATHYMETRY_MAX_MISMATCH = float(os.getenv("BATHYMETRY_MAX_MISMATCH", "0.05"))
+# maximum relative difference between the plotted and the real length
+BATHYMETRY_LENGTH_TOLERANCE = float(os.getenv("BATHYMETRY_LENGTH_TOLERANCE", "0.02"))
+# sign of the plotted values against the elevations of the raster: -1 for
+# the depths (positive down) plotted by the frontend, 1 for elevations
+BATHYMETRY_SIGN = int(os.getenv("BATHYMETRY_SIGN", "-1"))
+# part of the urls of the requests of the profile to the tile server
+BATHYMETRY_PROFILE_URL_PART = os.getenv("BATHYMETRY_PROFILE_URL_PART", "/point")
+EARTH_RADIUS = 6371.0088
+
+
+@functools.lru_cache(maxsize=2)
+def load_raster(path):
+    """
+    load_raster: read the first band of a raster, kept in memory for the
+        next calls
+
+    Args:
+        path (str): GeoTIFF (read with rasterio) or .npz file
+
+    Returns:
+        dict: elevation (2D array, NaN for no data), transform (6 affine
+    coefficients), crs (None for longitude and latitude) and load_time
+    (seconds)
+    """
+    start = perf_counter()
+    if path.endswith(".npz"):
+        with np.load(path) as arrays:
+            elevation = arrays["elevation"].astype(float)
+            transform = tuple(float(value) for value in arrays["transform"][:6])
+            if "nodata" in arrays:
+                elevation[elevation == float(arrays["nodata"])] = np.nan
+        crs = None
+    else:
+        if rasterio is None:
+            raise RuntimeError(f"rasterio is needed to read {path}, or use a .npz file")
+        with rasterio.open(path) as source:
+            elevation = source.read(1, masked=True).astype(float).filled(np.nan)
+            transform = tuple(source.transform)[:6]
+            crs = source.crs.to_string() if source.crs else None
+        if crs in ("EPSG:4326", "OGC:CRS84"):
+            crs = None
+    return {
+        "elevation": elevation,
+        "transform": transform,
+        "crs": crs,
+        "load_time": perf_counter() - start,
+    }
+
+
+def sample_raster(raster, lats, lngs):
+    """
+    sample_raster: bilinear interpolation of the raster at points
+
+    Args:
+        raster (dict): the raster, from load_raster
+        lats (numpy.ndarray): latitudes of the points
+        lngs (numpy.ndarray): longitudes of the points
+
+    Returns:
+        numpy.ndarray: elevations, NaN outside of the raster or next to a
+    pixel without data
+    """
+    xs = np.asarray(lngs, dtype=float)
+    ys = np.asarray(lats, dtype=float)
+    if raster["crs"] is not None:
+        xs, ys = warp_transform("EPSG:4326", raster["crs"], xs, ys)
+        xs, ys = np.asarray(xs), np.asarray(ys)
+    a, b, c, d, e, f = raster["transform"]
+    det = a * e - b * d
+    # position in pixels, from the centre of the first pixel
+    cols = (e * (xs - c) - b * (ys - f)) / det - 0.5
+    rows = (a * (ys - f) - d * (xs - c)) / det - 0.5
+    elevation = raster["elevation"]
+    height, width = elevation.shape
+    col0 = np.floor(cols).astype(int)
+    row0 = np.floor(rows).astype(int)
+    inside = (col0 >= 0) & (row0 >= 0) & (col0 + 1 < width) & (row0 + 1 < height)
+    col0 = np.clip(col0, 0, width - 2)
+    row0 = np.clip(row0, 0, height - 2)
+    dx = cols - col0
+    dy = rows - row0
+    values = (
+        elevation[row0, col0] * (1 - dx) * (1 - dy)
+        + elevation[row0, col0 + 1] * dx * (1 - dy)
+        + elevation[row0 + 1, col0] * (1 - dx) * dy
+        + elevation[row0 + 1, col0 + 1] * dx * dy
+    )
+    return np.where(inside, values, np.nan)
+
+
+def haversine(start, end):
+    """
+    haversine: great circle distance between two points
+
+    Args:
+        start (tuple): (lat, lng) of the first point
+        end (tuple): (lat, lng) of the second point
+
+    Returns:
+        float: distance in km
+    """
+    lat1, lng1, lat2, lng2 = np.radians([start[0], start[1], end[0], end[1]])
+    value = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    )
+    return float(2 * EARTH_RADIUS * np.arcsin(np.sqrt(value)))
+
+
+def compare_profile(distance, depth, start, end, raster, tolerance=None, sign=None):
+    """
+    compare_profile: compare a plotted profile with the raster along the
+        same transect
+
+    Args:
+        distance (numpy.ndarray): plotted distances, in km
+        depth (numpy.ndarray): plotted depths, in metres
+        start (tuple): (lat, lng) of the first point of the transect
+        end (tuple): (lat, lng) of the last point of the transect
+        raster (dict): the raster, from load_raster
+        tolerance (float, optional): maximum difference in metres. Defaults
+    to BATHYMETRY_TOLERANCE.
+        sign (int, optional): -1 if the profile is plotted as depths
+    (positive down), 1 if it is plotted as elevations. Defaults to
+    BATHYMETRY_SIGN.
+
+    Returns:
+        dict: points, compared (points inside the raster), sign, max_error,
+    rmse, mismatch (fraction of the compared points outside of the tolerance),
+    length and expected_length (km), length_error, local_time (seconds) and ok
+    """
+    tolerance = BATHYMETRY_TOLERANCE if tolerance is None else tolerance
+    sign = BATHYMETRY_SIGN if sign is None else sign
+    distance = np.asarray(distance, dtype=float)
+    depth = np.asarray(depth, dtype=float)
+    valid = np.isfinite(distance) & np.isfinite(depth)
+    distance = distance[valid]
+    depth = depth[valid]
+    start_time = perf_counter()
+    fraction = distance / distance[-1] if len(distance) and distance[-1] else distance
+    lats = start[0] + fraction * (end[0] - start[0])
+    lngs = start[1] + fraction * (end[1] - start[1])
+    reference = sample_raster(raster, lats, lngs)
+    local_time = perf_counter() - start_time
+
+    compared = np.isfinite(reference)
+    error = np.abs(sign * depth[compared] - reference[compared])
+    expected_length = haversine(start, end)
+    length = float(distance[-1]) if len(distance) else 0.0
+    length_error = abs(length - expected_length) / expected_length if expected_length else 0.0
+    mismatch = float(np.mean(error > tolerance)) if error.size else 1.0
+    return {
+        "points": int(len(depth)),
+        "compared": int(compared.sum()),
+        "sign": sign,
+        "max_error": float(error.max()) if error.size else None,
+        "rmse": float(np.sqrt(np.mean(error**2))) if error.size else None,
+        "mismatch": mismatch,
+        "length": length,
+        "expected_length": expected_length,
+        "length_error": length_error,
+        "local_time": local_time,
+        "ok": bool(
+            error.size >= max(2, len(depth) // 2)
+            and mismatch <= BATHYMETRY_MAX_MISMATCH
+            and length_error <= BATHYMETRY_LENGTH_TOLERANCE
+        ),
+    }
+
+
+@timed
+def request_profile(driver, locations=flows.PROFILE_SITES):
+    """
+    request_profile: click the two points of a profile on the map, recording
+        the time and the requests of the frontend. The profile tool of the
+        bathymetry layer should be selected.
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+        locations (tuple, optional): the two points of the profile, names of
+    places or (lat, lng). Defaults to flows.PROFILE_SITES.
+
+    Returns:
+        dict: start and end (the clicked points, as (lat, lng)) and started
+    (perf_counter of the clicks)
+    """
+    tracker = network_tracker(driver)
+    tracker.reset()
+    started = perf_counter()
+    offsets = flows.click_map(driver, locations)
+    start, end = offset_locations(driver, offsets)
+    return {"start": start, "end": end, "started": started}
+
+
+def profile_plotted(graph):
+    """
+    profile_plotted: wait condition, true when the graph has a trace with
+        points, as the graph can be shown before its data
+
+    Args:
+        graph (WebElement): the plotly graph of the profile
+
+    Returns:
+        callable: predicate that returns the figure (see plot_figure)
+    """
+
+    def _predicate(driver):
+        figure = plot_figure(driver, graph)
+        if not figure["traces"] or not len(figure["traces"][0]["x"]):
+            return False
+        return figure
+
+    return _predicate
+
+
+@timed
+def validate_profile(driver, graph, profile, raster_path=None, sign=None):
+    """
+    validate_profile: compare the profile shown by the frontend with the
+        local raster. It should be called as soon as the graph is visible, as
+        the time since the clicks is reported as the time of the frontend.
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+        graph (WebElement): the plotly graph of the profile
+        profile (dict): the clicked profile, from request_profile
+        raster_path (str, optional): local raster. Defaults to
+    BATHYMETRY_RASTER.
+        sign (int, optional): sign of the plotted values (see
+    compare_profile). Defaults to BATHYMETRY_SIGN.
+
+    Returns:
+        dict: the comparison (see compare_profile), with frontend_time
+    (seconds from the clicks to the graph), requests (stats of the requests
+    to the tile server, None if the browser does not give them) and
+    raster_load_time (seconds)
+    """
+    figure = wait_until(driver, profile_plotted(graph), timeout=10)
+    frontend_time = perf_counter() - profile["started"]
+    tracker = network_tracker(driver)
+    requests = tracker.stats(BATHYMETRY_PROFILE_URL_PART) if tracker.supported else None
+    raster = load_raster(raster_path or BATHYMETRY_RASTER)
+    trace = figure["traces"][0]
+    report = compare_profile(
+        trace["x"], trace["y"], profile["start"], profile["end"], raster, sign=sign
+    )
+    report.update(
+        {
+            "frontend_time": frontend_time,
+            "requests": requests,
+            "raster_load_time": raster["load_time"],
+        }
+    )
+    return report
+
+
+def report_lines(report):
+    """
+    report_lines: format the validation of a profile
+
+    Returns:
+        str[]: lines of the report
+    """
+    rmse = float("nan") if report["rmse"] is None else report["rmse"]
+    lines = [
+        f"{report['compared']} of {report['points']} points compared, "
+        f"rmse {rmse:.1f} m, {report['mismatch']:.0%} outside of "
+        f"{BATHYMETRY_TOLERANCE:g} m",
+        f"length {report['length']:.3f} km, expected {report['expected_length']:.3f} km "
+        f"({report['length_error']:.1%})",
+        f"frontend: {report['frontend_time'] * 1000:.0f} ms until the graph",
+    ]
+    if report["requests"]:
+        lines.append(
+            f"tile server: {report['requests']['requests']} requests in "
+            f"{report['requests']['duration'] * 1000:.0f} ms"
+        )
+    lines.append(
+        f"local: {report['local_time'] * 1000:.1f} ms "
+        f"(raster read in {report['raster_load_time'] * 1000:.0f} ms)"
+    )
+    lines.append("ok" if report["ok"] else "FAILED")
+    return lines
+
+
+def main(argv=None):
+    """
+    main: command line interface, draw a profile in the frontend and compare
+        it with the local raster
+    """
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default=os.getenv("FRONTEND_URL_LOCAL"))
+    parser.add_argument("--raster", default=BATHYMETRY_RASTER)
+    parser.add_argument(
+        "--sign",
+        type=int,
+        choices=(-1, 1),
+        default=BATHYMETRY_SIGN,
+        help="-1 if the profile is plotted as depths, 1 as elevations",
+    )
+    parser.add_argument("--output", default="")
+    args = parser.parse_args(argv)
+    if not args.raster:
+        parser.error("the raster is set with --raster or BATHYMETRY_RASTER")
+
+    session = BrowserSession(worker_id="bathymetry")
+    try:
+        driver = session.start()
+        flows.open_app(driver, args.url)
+        flows.toggle_bathymetry(driver)
+        layer_edit = driver.find_elements(By.ID, "layer-edit")
+        click_fontawesome(driver=layer_edit[0], button_name="chart-simple")
+        profile = request_profile(driver)
+        graph = wait_until(
+            driver, EC.visibility_of_element_located((By.CLASS_NAME, "plotly")), timeout=30
+        )
+        report = validate_profile(driver, graph, profile, args.raster, sign=args.sign)
+    finally:
+        session.quit()
+
+    for line in report_lines(report):
+        print(line)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
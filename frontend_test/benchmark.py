@@ -0,0 +1,320 @@
+"""
+benchmark.py: performance benchmark of the Frontend Haig Fras. The flows of
+the tests are repeated several times while the Navigation Timing, Resource
+Timing and long tasks of the page are collected. The median and the 95th
+percentile of each metric are compared with a stored baseline.
+
+Usage:
+    python -m frontend_test.benchmark --runs 5 --baseline benchmark.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+from time import perf_counter
+from dotenv import load_dotenv
+from frontend_test import flows
+from frontend_test.driver import BrowserSession
+
+# installed before the scripts of the page, when the browser allows it
+_LONG_TASK_OBSERVER_JS = """
+if (!window.__frontendTestLongTasks) {
+    window.__frontendTestLongTasks = [];
+    try {
+        new PerformanceObserver(function (list) {
+            list.getEntries().forEach(function (entry) {
+                window.__frontendTestLongTasks.push(
+                    {startTime: entry.startTime, duration: entry.duration}
+                );
+            });
+        }).observe({type: "longtask", buffered: true});
+    } catch (error) {}
+}
+"""
+
+_MARK_JS = (
+    _LONG_TASK_OBSERVER_JS
+    + """
+performance.setResourceTimingBufferSize(100000);
+performance.clearResourceTimings();
+return performance.now();
+"""
+)
+
+_COLLECT_JS = """
+var since = arguments[0];
+var navigation = performance.getEntriesByType("navigation")[0];
+var resources = performance.getEntriesByType("resource").filter(function (entry) {
+    return entry.startTime >= since;
+});
+var longTasks = (window.__frontendTestLongTasks || []).filter(function (entry) {
+    return entry.startTime >= since;
+});
+return {
+    navigation: navigation ? navigation.toJSON() : null,
+    resources: resources.map(function (entry) {
+        return {
+            name: entry.name,
+            duration: entry.duration,
+            transferSize: entry.transferSize,
+            responseEnd: entry.responseEnd
+        };
+    }),
+    longTasks: longTasks,
+    now: performance.now()
+};
+"""
+
+
+def install_observers(driver):
+    """
+    install_observers: register the long task observer before the scripts of
+        the page, using the Chrome DevTools Protocol. In the other browsers
+        the observer is registered when a measure starts.
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+    """
+    if hasattr(driver, "execute_cdp_cmd"):
+        driver.execute_cdp_cmd(
+            "Page.addScriptToEvaluateOnNewDocument", {"source": _LONG_TASK_OBSERVER_JS}
+        )
+
+
+def page_metrics(driver, since=0):
+    """
+    page_metrics: summarise the performance entries of the page
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+        since (float, optional): performance.now() value of the start of the
+    measure. Defaults to 0.
+
+    Returns:
+        dict: metrics in milliseconds and bytes
+    """
+    entries = driver.execute_script(_COLLECT_JS, since)
+    resources = entries["resources"]
+    long_tasks = entries["longTasks"]
+    metrics = {
+        "resources": len(resources),
+        "transfer_size": sum(entry["transferSize"] or 0 for entry in resources),
+        "resources_end": max(
+            [entry["responseEnd"] - since for entry in resources], default=0.0
+        ),
+        "long_tasks": len(long_tasks),
+        "long_tasks_duration": sum(entry["duration"] for entry in long_tasks),
+    }
+    navigation = entries["navigation"]
+    if since == 0 and navigation:
+        metrics["dom_content_loaded"] = navigation["domContentLoadedEventEnd"]
+        metrics["load_event"] = navigation["loadEventEnd"]
+        metrics["response_end"] = navigation["responseEnd"]
+    return metrics
+
+
+def measure_load(driver, url):
+    """
+    measure_load: measure the initial load, until #loading disappears
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+        url (str): url of the frontend
+
+    Returns:
+        dict: metrics of the flow
+    """
+    start = perf_counter()
+    flows.open_app(driver, url)
+    duration = (perf_counter() - start) * 1000
+    metrics = page_metrics(driver)
+    metrics["duration"] = duration
+    return metrics
+
+
+def measure_flow(driver, url, flow):
+    """
+    measure_flow: open the frontend and measure a flow
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+        url (str): url of the frontend
+        flow (callable): flow that receives the driver
+
+    Returns:
+        dict: metrics of the flow
+    """
+    flows.open_app(driver, url)
+    since = driver.execute_script(_MARK_JS)
+    start = perf_counter()
+    flow(driver)
+    duration = (perf_counter() - start) * 1000
+    metrics = page_metrics(driver, since)
+    metrics["duration"] = duration
+    return metrics
+
+
+def _graph_flow(driver):
+    flows.toggle_bathymetry(driver)
+    flows.open_bathymetry_graph(driver)
+
+
+FLOWS = {
+    "load": None,
+    "bathymetry": flows.toggle_bathymetry,
+    "mbtiles": flows.toggle_mbtiles,
+    "wms": flows.toggle_wms,
+    "graph": _graph_flow,
+    "infobox": flows.click_infobox,
+}
+
+
+def percentile(values, q):
+    """
+    percentile: percentile with linear interpolation
+
+    Args:
+        values (float[]): values
+        q (float): percentile, between 0 and 100
+
+    Returns:
+        float: the percentile
+    """
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarise(samples):
+    """
+    summarise: median and 95th percentile of each metric of a flow
+
+    Args:
+        samples (dict[]): metrics of each run
+
+    Returns:
+        dict: {metric: {"median": float, "p95": float}}
+    """
+    summary = {}
+    for metric in samples[0]:
+        values = [sample[metric] for sample in samples]
+        summary[metric] = {
+            "median": statistics.median(values),
+            "p95": percentile(values, 95),
+        }
+    return summary
+
+
+def run_benchmark(driver, url, flow_names, runs):
+    """
+    run_benchmark: repeat each flow and summarise its metrics
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+        url (str): url of the frontend
+        flow_names (str[]): names of the flows, keys of FLOWS
+        runs (int): number of repetitions of each flow
+
+    Returns:
+        dict: {flow: {metric: {"median": float, "p95": float}}}
+    """
+    install_observers(driver)
+    results = {}
+    for name in flow_names:
+        samples = []
+        for _ in range(runs):
+            if FLOWS[name] is None:
+                samples.append(measure_load(driver, url))
+            else:
+                samples.append(measure_flow(driver, url, FLOWS[name]))
+        results[name] = summarise(samples)
+    return results
+
+
+def compare(results, baseline, threshold, metric="duration"):
+    """
+    compare: find the flows slower than the baseline
+
+    Args:
+        results (dict): results of run_benchmark
+        baseline (dict): results of a previous run
+        threshold (float): relative increase allowed, as 0.2 for 20%
+        metric (str, optional): metric compared. Defaults to "duration".
+
+    Returns:
+        str[]: description of each regression
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline or metric not in baseline[name]:
+            continue
+        for statistic in ("median", "p95"):
+            old = baseline[name][metric][statistic]
+            new = result[metric][statistic]
+            if old > 0 and new > old * (1 + threshold):
+                regressions.append(
+                    f"{name} {metric} {statistic}: {new:.0f} ms "
+                    f"(baseline {old:.0f} ms, +{100 * (new / old - 1):.0f}%)"
+                )
+    return regressions
+
+
+def main(argv=None):
+    """
+    main: command line interface of the benchmark
+    """
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default=os.getenv("FRONTEND_URL_LOCAL"))
+    parser.add_argument("--runs", type=int, default=int(os.getenv("BENCHMARK_RUNS", "5")))
+    parser.add_argument("--flows", default=",".join(FLOWS))
+    parser.add_argument(
+        "--baseline", default=os.getenv("BENCHMARK_BASELINE", "benchmark_baseline.json")
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=float(os.getenv("BENCHMARK_THRESHOLD", "0.2")),
+    )
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    session = BrowserSession(worker_id="benchmark")
+    try:
+        results = run_benchmark(session.start(), args.url, args.flows.split(","), args.runs)
+    finally:
+        session.quit()
+
+    with open(args.output, "w") as output:
+        json.dump(results, output, indent=2)
+    for name, result in results.items():
+        print(
+            f"{name:>12}: median {result['duration']['median']:8.0f} ms  "
+            f"p95 {result['duration']['p95']:8.0f} ms  "
+            f"{result['resources']['median']:5.0f} requests"
+        )
+
+    if args.update_baseline or not os.path.isfile(args.baseline):
+        with open(args.baseline, "w") as output:
+            json.dump(results, output, indent=2)
+        return 0
+
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
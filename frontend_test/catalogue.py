@@ -0,0 +1,136 @@
+"""
+catalogue.py: the layer catalogue of the frontend (layers.json). It is read
+from LAYERS_JSON_FILE when this local copy exists, otherwise from
+VITE_LAYERS_JSON_URL, and converted into one test case by layer, so every
+layer of the catalogue can be tested independently.
+"""
+import json
+import os
+from urllib.parse import urlparse
+import requests
+from dotenv import load_dotenv
+from frontend_test.assets import get_session
+
+LAYERS_JSON_FILE = os.getenv("LAYERS_JSON_FILE", "layers.json")
+# data types of the layers shown as tiles on the map
+TILE_DATA_TYPES = ("cog", "wms", "mbtiles")
+
+
+def _walk(catalogue, path=()):
+    """
+    _walk: yield the (path, layer) of the objects with a url and a dataType,
+        at any depth. The "layerNames" keys are not part of the path.
+    """
+    if isinstance(catalogue, dict):
+        if "url" in catalogue and "dataType" in catalogue:
+            yield path, catalogue
+            return
+        for key, value in catalogue.items():
+            yield from _walk(value, path if key == "layerNames" else path + (key,))
+    elif isinstance(catalogue, list):
+        for value in catalogue:
+            yield from _walk(value, path)
+
+
+def catalogue_layers(catalogue):
+    """
+    catalogue_layers: find the layers of the catalogue, the objects with a
+        url and a dataType, at any depth
+
+    Args:
+        catalogue (dict): layers.json
+
+    Returns:
+        list: (name, layer) tuples, the name being the keys joined by " - "
+    """
+    return [(" - ".join(path), layer) for path, layer in _walk(catalogue)]
+
+
+def load_catalogue(source=None, timeout=10):
+    """
+    load_catalogue: read layers.json
+
+    Args:
+        source (str, optional): path or url of the catalogue. Defaults to
+    LAYERS_JSON_FILE if it exists, otherwise VITE_LAYERS_JSON_URL (from the
+    environment or from .env-frontend).
+        timeout (float, optional): timeout of the request. Defaults to 10.
+
+    Returns:
+        dict: the catalogue, empty if it can not be read
+    """
+    if source is None:
+        source = LAYERS_JSON_FILE
+        if not os.path.isfile(source):
+            load_dotenv(".env-frontend")
+            source = os.getenv("VITE_LAYERS_JSON_URL", "")
+    if not source:
+        return {}
+    if os.path.isfile(source):
+        with open(source, encoding="utf-8") as catalogue_file:
+            return json.load(catalogue_file)
+    try:
+        response = get_session().get(source, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+    except (requests.RequestException, ValueError):
+        return {}
+
+
+def url_prefix(url):
+    """
+    url_prefix: host and path of a url of tiles, before the {z}/{x}/{y}
+        template, found in the urls of all of its tiles
+
+    Args:
+        url (str): url of the tiles, as "http://localhost:8082/mytiles"
+
+    Returns:
+        str: the prefix, as "localhost:8082/mytiles/"
+    """
+    parsed = urlparse(url)
+    path = parsed.path.split("{")[0].rstrip("/")
+    return f"{parsed.netloc}{path}/"
+
+
+def _url_part(data_type, url):
+    """
+    _url_part: text found in the urls of the tiles of a layer
+    """
+    if data_type == "wms":
+        return urlparse(url).netloc
+    if data_type == "mbtiles":
+        return url_prefix(url)
+    # the cog tiles are served by the tile server, with the cog url as parameter
+    return os.path.basename(urlparse(url).path)
+
+
+def layer_cases(catalogue):
+    """
+    layer_cases: one test case by tile layer of the catalogue
+
+    Args:
+        catalogue (dict): layers.json
+
+    Returns:
+        list: dicts with id, section, group, name, data_type, url, params (the
+    WMS parameters) and url_part
+    """
+    cases = []
+    for path, layer in _walk(catalogue):
+        data_type = str(layer["dataType"]).lower()
+        if data_type not in TILE_DATA_TYPES or len(path) < 3:
+            continue
+        cases.append(
+            {
+                "id": "/".join(path),
+                "section": path[0],
+                "group": path[1],
+                "name": path[-1],
+                "data_type": data_type,
+                "url": layer["url"],
+                "params": layer.get("params", {}),
+                "url_part": _url_part(data_type, layer["url"]),
+            }
+        )
+    return cases
@@ -0,0 +1,152 @@
+"""
+driver.py: creation of isolated browser sessions. Each pytest worker gets its
+own browser with a separate profile, downloads directory and driver port, so
+several browsers can run the tests at the same time.
+
+The number of workers is set with the environment variable SELENIUM_WORKERS
+(see the Makefile), alongside SELENIUM_MODE, SELENIUM_BROWSER and
+SELENIUM_WINDOW_SIZE.
+"""
+import os
+import re
+import shutil
+import tempfile
+from selenium import webdriver
+from frontend_test.network import NETWORK_TRACKING, logging_prefs, perf_logging_prefs
+from frontend_test.utils import def_args_prefs
+
+
+def worker_index(worker_id):
+    """
+    worker_index: convert the pytest-xdist worker id into a number
+
+    Args:
+        worker_id (str): worker id, as "gw3", or "master" when the tests are
+    not distributed
+
+    Returns:
+        int: index of the worker (0 for master)
+    """
+    match = re.search(r"(\d+)$", worker_id)
+    return int(match.group(1)) if match else 0
+
+
+def worker_port(worker_id, offset=0):
+    """
+    worker_port: port used by the driver of a worker. If SELENIUM_BASE_PORT is
+        not defined, the driver chooses a free port.
+
+    Args:
+        worker_id (str): pytest-xdist worker id
+        offset (int, optional): offset added to the port, to have more than one
+    port by worker. Defaults to 0.
+
+    Returns:
+        int: port number (0 means a free port)
+    """
+    base_port = os.getenv("SELENIUM_BASE_PORT")
+    if not base_port:
+        return 0
+    return int(base_port) + 10 * worker_index(worker_id) + offset
+
+
+class BrowserSession:
+    """
+    BrowserSession: a browser together with the temporary directories that
+        belong to it. quit() closes the browser and the driver process and
+        removes the directories.
+    """
+
+    def __init__(
+        self, worker_id="master", browser=None, mode=None, proxy=None, window_size=None
+    ):
+        self.worker_id = worker_id
+        self.proxy = proxy
+        self.browser = browser or os.getenv("SELENIUM_BROWSER") or "chrome"
+        self.mode = mode if mode is not None else os.getenv("SELENIUM_MODE")
+        # "WIDTHxHEIGHT"; the window is maximized when it is not set
+        self.window_size = window_size or os.getenv("SELENIUM_WINDOW_SIZE")
+        self.base_dir = tempfile.mkdtemp(prefix=f"frontend_test_{worker_id}_")
+        self.profile_dir = os.path.join(self.base_dir, "profile")
+        self.downloads_dir = os.path.join(self.base_dir, "downloads")
+        os.makedirs(self.profile_dir)
+        os.makedirs(self.downloads_dir)
+        self.driver = None
+
+    def start(self):
+        """
+        start: launch the browser
+
+        Returns:
+            webdriver.Chrome|webdriver.Firefox: the driver
+        """
+        args = []
+        if self.mode == "HEADLESS":
+            args.append("--headless")
+
+        if self.browser == "firefox":
+            from selenium.webdriver.firefox.options import Options
+            from selenium.webdriver.firefox.service import Service
+
+            args += ["-profile", self.profile_dir]
+            options = def_args_prefs(Options(), args, [])
+            options.set_preference("browser.download.folderList", 2)
+            options.set_preference("browser.download.dir", self.downloads_dir)
+            if self.proxy:
+                host, port = self.proxy.split("//")[-1].split(":")
+                options.set_preference("network.proxy.type", 1)
+                for scheme in ("http", "ssl"):
+                    options.set_preference(f"network.proxy.{scheme}", host)
+                    options.set_preference(f"network.proxy.{scheme}_port", int(port))
+                options.set_preference("network.proxy.allow_hijacking_localhost", True)
+                options.accept_insecure_certs = True
+            service = Service(port=worker_port(self.worker_id))
+            self.driver = webdriver.Firefox(options=options, service=service)
+        else:
+            from selenium.webdriver.chrome.options import Options
+            from selenium.webdriver.chrome.service import Service
+
+            args += [
+                "--no-sandbox",
+                "--disable-dev-shm-usage",
+                f"--user-data-dir={self.profile_dir}",
+            ]
+            debugging_port = worker_port(self.worker_id, offset=1)
+            if debugging_port:
+                args.append(f"--remote-debugging-port={debugging_port}")
+            if self.proxy:
+                # the loopback is not bypassed, to reach the local frontend
+                args += [
+                    f"--proxy-server={self.proxy}",
+                    "--proxy-bypass-list=<-loopback>",
+                    "--ignore-certificate-errors",
+                ]
+            preferences = {"download.default_directory": self.downloads_dir}
+            options = def_args_prefs(Options(), args, preferences)
+            options.set_capability("goog:loggingPrefs", logging_prefs())
+            if NETWORK_TRACKING:
+                options.add_experimental_option("perfLoggingPrefs", perf_logging_prefs())
+            if self.proxy:
+                options.accept_insecure_certs = True
+            service = Service(port=worker_port(self.worker_id))
+            self.driver = webdriver.Chrome(options=options, service=service)
+
+        if self.window_size:
+            width, height = (int(value) for value in self.window_size.lower().split("x"))
+            self.driver.set_window_size(width, height)
+        else:
+            self.driver.set_window_size(1920, 1080)
+            self.driver.maximize_window()
+        return self.driver
+
+    def quit(self):
+        """
+        quit: close every window of the browser, stop the driver process and
+            remove the temporary directories
+        """
+        try:
+            if self.driver is not None:
+                self.driver.quit()
+        finally:
+            self.driver = None
+            shutil.rmtree(self.base_dir, ignore_errors=True)
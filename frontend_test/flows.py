@@ -0,0 +1,457 @@
+"""
+flows.py: user flows of the Frontend Haig Fras, as scripted in the tests.
+They are reused by the benchmark and the other modes that drive the frontend
+outside of the test suite.
+
+With FAST_RESET=1, reset_app restores a clean state inside the page that is
+already loaded, instead of loading the frontend again.
+"""
+import os
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from frontend_test.catalogue import url_prefix
+from frontend_test.instrumentation import timed
+from frontend_test.leaflet import MAP_HANDLE_JS, map_offsets, set_map_view
+from frontend_test.network import network_mark, wait_layer_loaded
+from frontend_test.pages import leaflet_map
+from frontend_test.smoke import backend_urls
+from frontend_test.utils import (
+    click_fontawesome,
+    find_fontawesome,
+    get_layers,
+    get_layers_mbtiles,
+)
+from frontend_test.wait import (
+    element_count,
+    element_detached,
+    wait_until,
+)
+
+DATA_EXPLORATION = "Data Exploration"
+SEABED_HABITATS = "Seabed Habitats"
+MBTILES_OPTION = "seabed habitats-mbtiles"
+# the tile requests of the mbtiles layer go to the tile server (VITE_MBTILES_URL)
+MBTILES_URL_PART = url_prefix(backend_urls()["mbtiles"])
+# places of the map (see leaflet.MAP_SITES) clicked by the flows
+INFOBOX_SITE = "haig fras reef"
+PROFILE_SITES = ("haig fras reef", "haig fras south")
+
+FAST_RESET = os.getenv("FAST_RESET", "") not in ("", "0")
+RESET_TIMEOUT = float(os.getenv("RESET_TIMEOUT", "5"))
+
+# state of the page just after it is loaded, compared by residual_state
+_RECORD_BASELINE_JS = (
+    MAP_HANDLE_JS
+    + """
+var map = __frontendTestFindMap();
+var center = map ? map.getCenter() : null;
+window.__frontendTestBaseline = {
+    layers: document.querySelectorAll(".leaflet-layer").length,
+    markers: document.querySelectorAll(".leaflet-marker-icon").length,
+    view: map ? {lat: center.lat, lng: center.lng, zoom: map.getZoom()} : null
+};
+return window.__frontendTestBaseline;
+"""
+)
+
+_RESIDUAL_STATE_JS = (
+    MAP_HANDLE_JS
+    + """
+var baseline = window.__frontendTestBaseline;
+if (!baseline) {
+    return ["page not loaded by open_app"];
+}
+var count = function (selector) {
+    return document.querySelectorAll(selector).length;
+};
+var reasons = [];
+if (count(".leaflet-layer") > baseline.layers) {
+    reasons.push("overlay layers");
+}
+if (count("svg.leaflet-zoom-animated>g path") > 0) {
+    reasons.push("shapes on the map");
+}
+if (count(".all-icon") > 0 || count(".leaflet-marker-icon") > baseline.markers) {
+    reasons.push("markers on the map");
+}
+if (count(".leaflet-popup") > 0) {
+    reasons.push("map popup");
+}
+if (count("h1") > 1) {
+    reasons.push("section opened");
+}
+if (count("h2") > 0) {
+    reasons.push("welcome popup");
+}
+[
+    "graph-box", "legend-box", "info-subsection", "layer-edit",
+    "flash-message", "calculate-value", "dynamic-graph"
+].forEach(function (id) {
+    if (document.getElementById(id)) {
+        reasons.push(id);
+    }
+});
+var infobox = document.getElementById("infobox-container");
+if (infobox && infobox.innerText.indexOf("---") < 0) {
+    reasons.push("infobox values");
+}
+var map = __frontendTestFindMap();
+if (map && baseline.view) {
+    var center = map.getCenter();
+    if (map.getZoom() !== baseline.view.zoom
+        || Math.abs(center.lat - baseline.view.lat) > 1e-6
+        || Math.abs(center.lng - baseline.view.lng) > 1e-6) {
+        reasons.push("map view");
+    }
+}
+return reasons;
+"""
+)
+
+
+@timed
+def open_app(driver, url):
+    """
+    open_app: open the frontend and close the welcome popup
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+        url (str): url of the frontend
+    """
+    driver.get(url)
+    wait_until(driver, EC.invisibility_of_element_located((By.ID, "loading")))
+    click_fontawesome(driver)
+    driver.execute_script(_RECORD_BASELINE_JS)
+
+
+def residual_state(driver):
+    """
+    residual_state: compare the page with its state just after open_app
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+
+    Returns:
+        str[]: what is different from a clean page, empty if the page is clean
+    """
+    return driver.execute_script(_RESIDUAL_STATE_JS)
+
+
+@timed
+def reset_app(driver, url):
+    """
+    reset_app: leave the frontend in a clean state, with the welcome popup
+        closed. With FAST_RESET, the already loaded page is cleaned (panels
+        closed, map cleared, view reset, local storage cleared) and it is only
+        loaded again when residual_state still finds something.
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+        url (str): url of the frontend
+
+    Returns:
+        bool: True if the page was reset without loading it again
+    """
+    if not FAST_RESET or residual_state(driver) == ["page not loaded by open_app"]:
+        open_app(driver, url)
+        return False
+
+    titles = driver.find_elements(By.TAG_NAME, "h1")
+    if len(titles) > 1:
+        driver.find_element(By.ID, titles[0].text).click()
+    for _ in range(5):
+        buttons, _ = find_fontawesome(driver)
+        if len(buttons) == 0:
+            break
+        buttons[0].click()
+        wait_until(driver, element_detached(buttons[0]), timeout=RESET_TIMEOUT)
+    driver.find_element(By.XPATH, '//header[@title="Clean map"]').click()
+    baseline = driver.execute_script(
+        "localStorage.clear(); sessionStorage.clear();"
+        "return window.__frontendTestBaseline;"
+    )
+    if baseline["view"]:
+        set_map_view(driver, baseline["view"])
+
+    try:
+        wait_until(
+            driver, lambda page: len(residual_state(page)) == 0, timeout=RESET_TIMEOUT
+        )
+    except TimeoutException:
+        open_app(driver, url)
+        return False
+    return True
+
+
+@timed
+def open_section(driver, section_name):
+    """
+    open_section: open a section of the side bar
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+        section_name (str): id of the section button, as "Data Exploration"
+    """
+    driver.find_element(By.ID, section_name).click()
+    wait_until(driver, element_count((By.TAG_NAME, "h1"), minimum=2), timeout=10)
+
+
+@timed
+def open_general_type(driver, name=None, idx=0):
+    """
+    open_general_type: expand a group of layers of the opened section
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+        name (str, optional): text of the group. Defaults to None, that uses
+    the index.
+        idx (int, optional): index of the group. Defaults to 0.
+    """
+    buttons = driver.find_elements(By.ID, "general-types")
+    if name is None:
+        buttons[idx].click()
+    else:
+        [button for button in buttons if button.text == name][0].click()
+    wait_until(driver, element_count((By.ID, "type-option"), minimum=1), timeout=10)
+
+
+def layer_checkbox(driver, name=None, idx=0):
+    """
+    layer_checkbox: find the checkbox of a layer of the expanded group
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+        name (str, optional): name of the layer, case insensitive. Defaults to
+    None, that uses the index.
+        idx (int, optional): index of the layer. Defaults to 0.
+
+    Returns:
+        WebElement: input of the layer
+    """
+    type_options = driver.find_elements(By.ID, "type-option")
+    if name is None:
+        type_option = type_options[idx]
+    else:
+        type_option = [
+            option for option in type_options if option.text.lower() == name.lower()
+        ][0]
+    return type_option.find_element(By.TAG_NAME, "input")
+
+
+@timed
+def click_map_offsets(driver, offsets):
+    """
+    click_map_offsets: click on the map in points given as offsets from the
+        centre of the map, in a single action chain
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+        offsets (list): list of (x, y) offsets in pixels
+    """
+    leaflet_map(driver).click_offsets(offsets)
+
+
+@timed
+def click_map(driver, locations, pan=True):
+    """
+    click_map: click on the map in geographic locations. The locations are
+        converted with the projection of the map in one script, and the clicks
+        are sent in a single action chain.
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+        locations (list): names of places of leaflet.MAP_SITES or (lat, lng)
+    tuples
+        pan (bool, optional): centre the map on the locations when they are
+    not all visible. Defaults to True.
+
+    Returns:
+        list: the (x, y) offsets clicked, from the centre of the map
+    """
+    offsets = map_offsets(driver, locations, pan=pan)
+    click_map_offsets(driver, offsets)
+    return offsets
+
+
+@timed
+def toggle_bathymetry(driver):
+    """
+    toggle_bathymetry: add the first bathymetry layer to the map and wait for
+        it to be shown
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+
+    Returns:
+        WebElement: input of the layer
+    """
+    open_section(driver, DATA_EXPLORATION)
+    open_general_type(driver, idx=0)
+    check_layer = layer_checkbox(driver, idx=0)
+    since = network_mark(driver)
+    check_layer.click()
+    wait_layer_loaded(driver, timeout=30, since=since)
+    return check_layer
+
+
+@timed
+def toggle_mbtiles(driver):
+    """
+    toggle_mbtiles: add the seabed habitats mbtiles layer to the map and wait
+        for it to be shown
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+
+    Returns:
+        WebElement: input of the layer
+    """
+    open_section(driver, DATA_EXPLORATION)
+    open_general_type(driver, name=SEABED_HABITATS)
+    check_layer = layer_checkbox(driver, name=MBTILES_OPTION)
+    since = network_mark(driver)
+    check_layer.click()
+    wait_until(driver, element_count((By.ID, "layer-edit"), minimum=1), timeout=10)
+    leaflet_map(driver).zoom_out()
+    wait_layer_loaded(
+        driver,
+        url_part=MBTILES_URL_PART,
+        timeout=10,
+        find_layer=get_layers_mbtiles,
+        since=since,
+    )
+    return check_layer
+
+
+@timed
+def toggle_wms(driver):
+    """
+    toggle_wms: add the first seabed habitats WMS layer to the map and wait
+        for it to be shown
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+
+    Returns:
+        WebElement: input of the layer
+    """
+    open_section(driver, DATA_EXPLORATION)
+    open_general_type(driver, name=SEABED_HABITATS)
+    check_layer = layer_checkbox(driver, idx=0)
+    since = network_mark(driver)
+    check_layer.click()
+    wait_layer_loaded(driver, url_part="seabedhabitats", timeout=10, since=since)
+    return check_layer
+
+
+def layer_finder(case):
+    """
+    layer_finder: function that finds the leaflet layer of a layer of the
+        catalogue
+
+    Args:
+        case (dict): layer of the catalogue, from catalogue.layer_cases
+
+    Returns:
+        callable: function that receives the driver and returns the layer
+    record or None
+    """
+    def _find_layer(driver):
+        if case["data_type"] == "mbtiles":
+            return get_layers_mbtiles(driver, url_part=case["url_part"])
+        return get_layers(driver, url_part=case["url_part"])
+
+    return _find_layer
+
+
+@timed
+def toggle_layer(driver, case, timeout=30):
+    """
+    toggle_layer: add a layer of the catalogue to the map and wait until its
+        tiles are loaded
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+        case (dict): layer of the catalogue, from catalogue.layer_cases
+        timeout (float, optional): maximum time to load the tiles. Defaults
+    to 30.
+
+    Returns:
+        tuple: input of the layer and layer record (see wait_layer_loaded)
+    """
+    open_section(driver, case["section"])
+    open_general_type(driver, name=case["group"])
+    check_layer = layer_checkbox(driver, name=case["name"])
+    since = network_mark(driver)
+    check_layer.click()
+    wait_until(driver, element_count((By.ID, "layer-edit"), minimum=1), timeout=10)
+    if case["data_type"] == "mbtiles":
+        leaflet_map(driver).zoom_out()
+    layer = wait_layer_loaded(
+        driver,
+        url_part=case["url_part"],
+        timeout=timeout,
+        find_layer=layer_finder(case),
+        since=since,
+    )
+    return check_layer, layer
+
+
+@timed
+def click_infobox(driver, location=INFOBOX_SITE):
+    """
+    click_infobox: click on the map and wait for the values of the infobox
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+        location (str|tuple, optional): point clicked, name of a place or
+    (lat, lng). Defaults to INFOBOX_SITE.
+
+    Returns:
+        WebElement: the infobox
+    """
+    click_map(driver, [location])
+    return wait_until(
+        driver,
+        lambda page: "---" not in page.find_element(By.ID, "infobox-container").text
+        and page.find_element(By.ID, "infobox-container"),
+        timeout=10,
+    )
+
+
+@timed
+def open_bathymetry_graph(driver, locations=PROFILE_SITES):
+    """
+    open_bathymetry_graph: draw a bathymetry profile between two points of the
+        map and wait for the plotly graph. The bathymetry layer should be on
+        the map.
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+        locations (tuple, optional): the two points of the profile, names of
+    places or (lat, lng). Defaults to PROFILE_SITES.
+
+    Returns:
+        WebElement: the plotly graph
+    """
+    layer_edit = driver.find_elements(By.ID, "layer-edit")
+    click_fontawesome(driver=layer_edit[0], button_name="chart-simple")
+    click_map(driver, locations)
+    return wait_until(
+        driver, EC.visibility_of_element_located((By.CLASS_NAME, "plotly")), timeout=10
+    )
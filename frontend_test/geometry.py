@@ -0,0 +1,147 @@
+"""
+geometry.py: geometry of the circles drawn by the survey design. The paths are
+read from the page in one script call and the svg path data of every circle is
+converted into centre and radius with NumPy, so the tests can check how the
+circles change instead of only checking that the "d" attribute changed.
+"""
+import re
+import numpy as np
+from frontend_test.instrumentation import timed
+
+_CIRCLES_JS = """
+var paths = document.querySelectorAll("svg.leaflet-zoom-animated>g path");
+return Array.prototype.map.call(paths, function (path) {
+    var rect = path.getBoundingClientRect();
+    return {
+        d: path.getAttribute("d") || "",
+        stroke: path.getAttribute("stroke"),
+        rect: [rect.left, rect.top, rect.width, rect.height]
+    };
+});
+"""
+
+_NUMBER = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+
+def parse_circle_paths(paths):
+    """
+    parse_circle_paths: convert the "d" attribute of leaflet circles into
+        centres and radii. Leaflet draws a circle as two arcs:
+        "M{x - r},{y}a{r},{r} 0 1,0 {2r},0 a{r},{r} 0 1,0 {-2r},0 "
+
+    Args:
+        paths (str[]): "d" attributes of the paths
+
+    Returns:
+        tuple: centres (n x 2 array) and radii (n array), in layer pixels.
+    The values are NaN for the paths that are not circles.
+    """
+    values = np.full((len(paths), 3), np.nan)
+    for idx, path in enumerate(paths):
+        if path.lstrip()[:1] == "M" and "a" in path:
+            numbers = _NUMBER.findall(path)
+            if len(numbers) >= 3:
+                values[idx] = numbers[:3]
+    radii = values[:, 2]
+    centres = values[:, :2].copy()
+    centres[:, 0] += radii
+    return centres, radii
+
+
+@timed
+def circle_geometry(driver):
+    """
+    circle_geometry: geometry of the paths drawn on the map, in one roundtrip
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+
+    Returns:
+        dict: centres and radii (layer pixels, from the path data),
+    screen_centres and screen_radii (screen pixels, from the bounding boxes)
+    and strokes (colours of the paths)
+    """
+    paths = driver.execute_script(_CIRCLES_JS)
+    centres, radii = parse_circle_paths([path["d"] for path in paths])
+    rects = np.array([path["rect"] for path in paths], dtype=float).reshape(-1, 4)
+    return {
+        "centres": centres,
+        "radii": radii,
+        "screen_centres": rects[:, :2] + rects[:, 2:] / 2,
+        "screen_radii": rects[:, 2] / 2,
+        "strokes": [path["stroke"] for path in paths],
+    }
+
+
+def geometry_changed(before, key="radii", tolerance=0.5):
+    """
+    geometry_changed: wait condition, true when the geometry of the circles
+        changed and is stable (the same in two consecutive checks), so
+        animations and map inertia are finished
+
+    Args:
+        before (dict): geometry before the action, from circle_geometry
+        key (str, optional): value compared, as "radii" or "screen_centres".
+    Defaults to "radii".
+        tolerance (float, optional): change in pixels ignored. Defaults to 0.5.
+
+    Returns:
+        callable: predicate that returns the new geometry
+    """
+    last = {}
+
+    def _predicate(driver):
+        geometry = circle_geometry(driver)
+        values = geometry[key]
+        if values.shape != before[key].shape:
+            return False
+        changed = np.nanmax(np.abs(values - before[key])) > tolerance
+        stable = "values" in last and np.allclose(
+            values, last["values"], atol=tolerance, equal_nan=True
+        )
+        last["values"] = values
+        return geometry if changed and stable else False
+
+    return _predicate
+
+
+def translation(before, after):
+    """
+    translation: displacement of each circle on the screen
+
+    Args:
+        before (dict): geometry before the action
+        after (dict): geometry after the action
+
+    Returns:
+        numpy.ndarray: n x 2 array of (dx, dy) in screen pixels
+    """
+    return after["screen_centres"] - before["screen_centres"]
+
+
+def moved_by(before, after, offset, tolerance=0.2):
+    """
+    moved_by: check that every circle moved on the screen in the direction of
+        a offset and by at least the offset (leaflet inertia can move the map
+        further than the drag)
+
+    Args:
+        before (dict): geometry before the action
+        after (dict): geometry after the action
+        offset (tuple): expected (dx, dy) in screen pixels
+        tolerance (float, optional): relative tolerance of the length and of
+    the direction. Defaults to 0.2.
+
+    Returns:
+        bool: True if all the circles moved as expected
+    """
+    offset = np.asarray(offset, dtype=float)
+    moves = translation(before, after)
+    lengths = np.linalg.norm(moves, axis=1)
+    expected_length = np.linalg.norm(offset)
+    cosines = moves @ offset / np.maximum(lengths * expected_length, 1e-9)
+    return bool(
+        np.all(lengths >= (1 - tolerance) * expected_length)
+        and np.all(cosines >= 1 - tolerance)
+    )
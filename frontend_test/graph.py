@@ -0,0 +1,121 @@
+"""
+graph.py: inspection of the plotly graphs of the frontend. The figure (data,
+layout and range slider) is read from the graph div in one script call and
+the values of each trace are returned as NumPy arrays, instead of hovering
+every trace to check the graph.
+"""
+import numpy as np
+from frontend_test.instrumentation import timed
+
+_FIGURE_JS = """
+var element = arguments[0] || document.querySelector(".plotly");
+var graph = element && element.closest(".js-plotly-plot");
+if (!graph || !graph.data) {
+    return null;
+}
+var values = function (array) {
+    return array ? Array.prototype.slice.call(array) : [];
+};
+var title = function (axis) {
+    if (!axis || !axis.title) {
+        return null;
+    }
+    return typeof axis.title === "string" ? axis.title : axis.title.text || null;
+};
+var layout = graph._fullLayout || graph.layout || {};
+var xaxis = layout.xaxis || {};
+var rangeslider = xaxis.rangeslider;
+return {
+    traces: graph.data.map(function (trace) {
+        return {
+            name: trace.name || null,
+            type: trace.type || "scatter",
+            x: values(trace.x),
+            y: values(trace.y)
+        };
+    }),
+    x_title: title(xaxis),
+    y_title: title(layout.yaxis),
+    x_range: xaxis.range ? values(xaxis.range) : null,
+    rangeslider: rangeslider && rangeslider.visible
+        ? {visible: true, range: values(rangeslider.range)}
+        : null
+};
+"""
+
+
+def _to_array(values):
+    """
+    _to_array: convert the values of a trace into a NumPy array, of floats
+        when all the values are numbers (None becomes NaN)
+
+    Args:
+        values (list): values of the trace
+
+    Returns:
+        numpy.ndarray: array of floats, or of objects for texts and dates
+    """
+    try:
+        return np.array([np.nan if value is None else value for value in values], dtype=float)
+    except (TypeError, ValueError):
+        return np.array(values, dtype=object)
+
+
+def parse_figure(figure):
+    """
+    parse_figure: convert the figure read from the page into NumPy arrays
+
+    Args:
+        figure (dict): result of the figure script
+
+    Returns:
+        dict: traces (list of dicts with name, type, x and y arrays), x_title,
+    y_title, x_range and rangeslider (dict with visible and range, None if
+    the graph has no range slider)
+    """
+    figure = dict(figure)
+    figure["traces"] = [
+        dict(trace, x=_to_array(trace["x"]), y=_to_array(trace["y"]))
+        for trace in figure["traces"]
+    ]
+    return figure
+
+
+@timed
+def plot_figure(driver, element=None):
+    """
+    plot_figure: read a plotly figure in one roundtrip
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+        element (WebElement, optional): the graph or a element inside it.
+    Defaults to None, that uses the first graph of the page.
+
+    Returns:
+        dict|None: the figure (see parse_figure), None if there is no graph
+    """
+    if element is not None and hasattr(element, "element"):
+        element = element.element
+    figure = driver.execute_script(_FIGURE_JS, element)
+    if figure is None:
+        return None
+    return parse_figure(figure)
+
+
+def is_monotonic(values, strict=False):
+    """
+    is_monotonic: check that the values increase along the array, ignoring
+        the NaN values
+
+    Args:
+        values (numpy.ndarray): values, as the distances of a profile
+        strict (bool, optional): the values should always increase. Defaults
+    to False.
+
+    Returns:
+        bool: True if the values never decrease
+    """
+    values = np.asarray(values, dtype=float)
+    steps = np.diff(values[~np.isnan(values)])
+    return bool(np.all(steps > 0) if strict else np.all(steps >= 0))
@@ -0,0 +1,365 @@
+"""
+history.py: history of the test runs in a local SQLite database. After each
+run, the outcome and duration of every test are stored with the run, as well
+as the time spent in each step (with SELENIUM_PROFILE=1) and the metrics of
+the page at the end of the test (Navigation and Resource Timing, long tasks).
+The history is kept with HISTORY=1.
+
+The command line shows the trend of each test and flags the slowdowns: the
+last value of a metric is compared with the previous HISTORY_WINDOW runs of
+the test in the same browser configuration (browser, mode and window size)
+with a robust z-score (distance to the median, in median absolute
+deviations), and reported when the score is above HISTORY_Z_THRESHOLD and the
+value is more than HISTORY_MIN_SLOWDOWN slower than the median.
+
+Usage:
+    python -m frontend_test.history
+    python -m frontend_test.history --test infobox --metric load_event
+"""
+import argparse
+import os
+import sqlite3
+import subprocess
+import sys
+from datetime import datetime, timezone
+import numpy as np
+
+HISTORY = os.getenv("HISTORY", "0") not in ("", "0")
+HISTORY_DB = os.getenv("HISTORY_DB", "history.sqlite")
+# number of previous runs a test is compared with
+HISTORY_WINDOW = int(os.getenv("HISTORY_WINDOW", "20"))
+# minimum number of previous runs before a slowdown can be reported
+HISTORY_MIN_RUNS = int(os.getenv("HISTORY_MIN_RUNS", "5"))
+HISTORY_Z_THRESHOLD = float(os.getenv("HISTORY_Z_THRESHOLD", "3.5"))
+HISTORY_MIN_SLOWDOWN = float(os.getenv("HISTORY_MIN_SLOWDOWN", "0.1"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started TEXT NOT NULL,
+    commit_id TEXT,
+    browser TEXT,
+    -- browser[:headless][:WIDTHxHEIGHT], as in MATRIX
+    configuration TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    test TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    duration REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS steps (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    test TEXT NOT NULL,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    calls INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    wait REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    test TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value REAL
+);
+CREATE INDEX IF NOT EXISTS results_test ON results (test, run_id);
+CREATE INDEX IF NOT EXISTS metrics_test ON metrics (test, name, run_id);
+"""
+
+
+def commit_id():
+    """
+    commit_id: commit of the tested code, from CI_COMMIT_SHA or git
+
+    Returns:
+        str|None: the commit, None if it is not known
+    """
+    if os.getenv("CI_COMMIT_SHA"):
+        return os.getenv("CI_COMMIT_SHA")
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_configuration():
+    """
+    run_configuration: configuration of the browsers of the run, written as
+        the configurations of MATRIX: browser[:headless][:WIDTHxHEIGHT]
+
+    Returns:
+        str: the configuration, from SELENIUM_BROWSER, SELENIUM_MODE and
+    SELENIUM_WINDOW_SIZE
+    """
+    parts = [os.getenv("SELENIUM_BROWSER") or "chrome"]
+    if os.getenv("SELENIUM_MODE") == "HEADLESS":
+        parts.append("headless")
+    if os.getenv("SELENIUM_WINDOW_SIZE"):
+        parts.append(os.getenv("SELENIUM_WINDOW_SIZE").lower())
+    return ":".join(parts)
+
+
+class HistoryStore:
+    """
+    HistoryStore: the runs, results, steps and page metrics of the tests,
+        in a SQLite database
+    """
+
+    def __init__(self, path=None):
+        self.path = path or HISTORY_DB
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.executescript(_SCHEMA)
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(runs)")]
+        if "configuration" not in columns:
+            # database of a previous version, whose runs only kept the browser
+            with self.connection:
+                self.connection.execute("ALTER TABLE runs ADD COLUMN configuration TEXT")
+                self.connection.execute("UPDATE runs SET configuration = browser")
+
+    def add_run(self, results, steps=None, metrics=None, configuration=None):
+        """
+        add_run: store the results of a run
+
+        Args:
+            results (dict): {test: {"outcome", "duration"}}
+            steps (dict, optional): {test: breakdown}, as returned by
+        instrumentation.load_profiles
+            metrics (dict, optional): {test: {metric: value}}
+            configuration (str, optional): browser configuration of the
+        run. Defaults to run_configuration().
+
+        Returns:
+            int: id of the run
+        """
+        configuration = configuration or run_configuration()
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO runs (started, commit_id, browser, configuration)"
+                " VALUES (?, ?, ?, ?)",
+                (
+                    datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                    commit_id(),
+                    configuration.split(":")[0],
+                    configuration,
+                ),
+            )
+            run_id = cursor.lastrowid
+            self.connection.executemany(
+                "INSERT INTO results VALUES (?, ?, ?, ?)",
+                [
+                    (run_id, test, result["outcome"], result["duration"])
+                    for test, result in results.items()
+                ],
+            )
+            for test, breakdown in (steps or {}).items():
+                self.connection.executemany(
+                    "INSERT INTO steps VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(run_id, test) + row for row in _step_rows(breakdown["steps"])],
+                )
+            for test, values in (metrics or {}).items():
+                self.connection.executemany(
+                    "INSERT INTO metrics VALUES (?, ?, ?, ?)",
+                    [(run_id, test, name, value) for name, value in values.items()],
+                )
+        return run_id
+
+    def tests(self):
+        """
+        tests: names of the stored tests
+
+        Returns:
+            str[]: the tests, sorted
+        """
+        rows = self.connection.execute("SELECT DISTINCT test FROM results ORDER BY test")
+        return [row[0] for row in rows]
+
+    def series(self, test, metric="duration", configuration=None):
+        """
+        series: values of a metric of a test in the runs where it passed,
+            oldest first
+
+        Args:
+            test (str): name of the test
+            metric (str, optional): "duration", a page metric or a step name.
+        Defaults to "duration".
+            configuration (str, optional): browser configuration of the
+        runs. Defaults to run_configuration().
+
+        Returns:
+            list: (run id, value) tuples
+        """
+        configuration = configuration or run_configuration()
+        passed = (
+            " JOIN results r ON r.run_id = v.run_id AND r.test = v.test"
+            " JOIN runs ON runs.id = v.run_id"
+            " WHERE v.test = ? AND r.outcome = 'passed' AND runs.configuration = ?"
+        )
+        if metric == "duration":
+            query = f"SELECT v.run_id, v.duration FROM results v{passed} ORDER BY 1"
+            return list(self.connection.execute(query, (test, configuration)))
+        query = (
+            f"SELECT v.run_id, v.value FROM metrics v{passed}"
+            " AND v.name = ? AND v.value IS NOT NULL"
+            " UNION ALL"
+            f" SELECT v.run_id, v.duration FROM steps v{passed} AND v.name = ?"
+            " ORDER BY 1"
+        )
+        return list(
+            self.connection.execute(
+                query, (test, configuration, metric, test, configuration, metric)
+            )
+        )
+
+    def close(self):
+        """
+        close: close the database
+        """
+        self.connection.close()
+
+
+def _step_rows(steps):
+    """
+    _step_rows: add the outermost steps with the same name
+
+    Returns:
+        list: (name, kind, calls, duration, wait) tuples
+    """
+    rows = {}
+    for step in steps:
+        if step["depth"]:
+            continue
+        row = rows.setdefault(step["name"], [step["kind"], 0, 0.0, 0.0])
+        row[1] += 1
+        row[2] += step["duration"]
+        row[3] += step["wait"]
+    return [(name,) + tuple(row) for name, row in rows.items()]
+
+
+def slowdown(values, window=None, min_runs=None, z_threshold=None, min_slowdown=None):
+    """
+    slowdown: compare the last value with the previous ones
+
+    Args:
+        values (list): values of a metric, oldest first
+        window (int, optional): number of previous values. Defaults to
+    HISTORY_WINDOW.
+        min_runs (int, optional): minimum number of previous values. Defaults
+    to HISTORY_MIN_RUNS.
+        z_threshold (float, optional): robust z-score above which the last
+    value is an outlier. Defaults to HISTORY_Z_THRESHOLD.
+        min_slowdown (float, optional): minimum relative slowdown. Defaults
+    to HISTORY_MIN_SLOWDOWN.
+
+    Returns:
+        dict|None: last, median, change (relative to the median), z and
+    regression (bool); None if there are not enough values
+    """
+    window = window or HISTORY_WINDOW
+    min_runs = HISTORY_MIN_RUNS if min_runs is None else min_runs
+    z_threshold = HISTORY_Z_THRESHOLD if z_threshold is None else z_threshold
+    min_slowdown = HISTORY_MIN_SLOWDOWN if min_slowdown is None else min_slowdown
+    if len(values) < 2:
+        return None
+    previous = np.asarray(values[-window - 1:-1], dtype=float)
+    last = float(values[-1])
+    median = float(np.median(previous))
+    # 0.6745 makes the median absolute deviation comparable to a standard
+    # deviation for normal values (Iglewicz and Hoaglin)
+    mad = float(np.median(np.abs(previous - median)))
+    if mad > 0:
+        z = 0.6745 * (last - median) / mad
+    else:
+        z = 0.0 if last == median else float("inf") * np.sign(last - median)
+    change = (last - median) / median if median else 0.0
+    return {
+        "last": last,
+        "median": median,
+        "change": change,
+        "z": z,
+        "runs": len(previous),
+        "regression": bool(
+            len(previous) >= min_runs and z > z_threshold and change > min_slowdown
+        ),
+    }
+
+
+def trend_lines(store, tests, metric="duration", window=None, configuration=None):
+    """
+    trend_lines: table of the last value of each test compared with its
+        previous runs
+
+    Returns:
+        tuple: lines of the table and names of the tests with a slowdown
+    """
+    lines = [
+        f"{'last':>10} {'median':>10} {'change':>8} {'z':>7} {'runs':>5}  test"
+    ]
+    regressions = []
+    for test in tests:
+        series = store.series(test, metric, configuration)
+        result = slowdown([value for _, value in series], window)
+        if result is None:
+            continue
+        flag = "  SLOWER" if result["regression"] else ""
+        lines.append(
+            f"{result['last']:10.2f} {result['median']:10.2f} "
+            f"{result['change']:+8.0%} {result['z']:7.1f} {result['runs']:5d}  "
+            f"{test}{flag}"
+        )
+        if result["regression"]:
+            regressions.append(test)
+    return lines, regressions
+
+
+def main(argv=None):
+    """
+    main: command line interface, print the trends of the tests and fail if
+        one of them is slower
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--db", default=HISTORY_DB)
+    parser.add_argument("--test", default="", help="part of the test names shown")
+    parser.add_argument(
+        "--metric", default="duration", help="duration, a page metric or a step name"
+    )
+    parser.add_argument(
+        "--configuration",
+        default=run_configuration(),
+        help="browser[:headless][:WIDTHxHEIGHT], as in MATRIX",
+    )
+    parser.add_argument("--window", type=int, default=HISTORY_WINDOW)
+    parser.add_argument(
+        "--runs", type=int, default=0, help="print the last runs of each test"
+    )
+    args = parser.parse_args(argv)
+
+    store = HistoryStore(args.db)
+    try:
+        tests = [test for test in store.tests() if args.test in test]
+        lines, regressions = trend_lines(
+            store, tests, args.metric, args.window, args.configuration
+        )
+        for line in lines:
+            print(line)
+        for test in tests if args.runs else []:
+            series = store.series(test, args.metric, args.configuration)[-args.runs:]
+            print(f"\n{test}")
+            for run_id, value in series:
+                print(f"{run_id:8d} {value:10.2f}")
+    finally:
+        store.close()
+    print(f"{len(regressions)} of {len(tests)} tests slower than their history")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+"""
+instrumentation.py: opt-in timing of the WebDriver commands, the waits and
+the helpers of frontend_test. It is enabled with the environment variable
+SELENIUM_PROFILE=1.
+
+Every step records its name, its kind ("command", "wait" or "helper"), the
+test that called it, its duration and how much of that duration was spent
+waiting for a condition (the rest is active time).
+"""
+import functools
+import json
+import os
+from contextlib import contextmanager
+from time import perf_counter
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profile")
+PROFILE_TOP = int(os.getenv("PROFILE_TOP", "10"))
+
+_recorder = None
+
+
+class StepRecorder:
+    """
+    StepRecorder: store the steps executed by the tests
+    """
+
+    def __init__(self):
+        self.test = None
+        self.steps = []
+        self._stack = []
+
+    @contextmanager
+    def step(self, name, kind):
+        """
+        step: measure the code executed inside of the context
+
+        Args:
+            name (str): name of the step, as the WebDriver command or the
+        helper name
+            kind (str): "command", "wait" or "helper"
+        """
+        frame = {"wait": 0.0}
+        self._stack.append(frame)
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            duration = perf_counter() - start
+            self._stack.pop()
+            wait = duration if kind == "wait" else frame["wait"]
+            if self._stack:
+                self._stack[-1]["wait"] += wait
+            self.steps.append(
+                {
+                    "test": self.test,
+                    "name": name,
+                    "kind": kind,
+                    "depth": len(self._stack),
+                    "start": start,
+                    "duration": duration,
+                    "wait": wait,
+                    "active": duration - wait,
+                }
+            )
+
+    def breakdown(self):
+        """
+        breakdown: summarise the steps by test. Only the outermost steps are
+            added to the totals, so nested steps are not counted twice.
+
+        Returns:
+            dict: for each test, the total, wait and active times, the number
+        of WebDriver commands and the list of steps
+        """
+        tests = {}
+        for step in self.steps:
+            test = tests.setdefault(
+                step["test"],
+                {"total": 0.0, "wait": 0.0, "active": 0.0, "commands": 0, "steps": []},
+            )
+            test["steps"].append(step)
+            if step["kind"] == "command":
+                test["commands"] += 1
+            if step["depth"] == 0:
+                test["total"] += step["duration"]
+                test["wait"] += step["wait"]
+                test["active"] += step["active"]
+        return tests
+
+    def save(self, path):
+        """
+        save: write the breakdown by test into a json file
+
+        Args:
+            path (str): path of the json file
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as output:
+            json.dump(self.breakdown(), output, indent=2)
+
+
+def enabled():
+    """
+    enabled: check if the instrumentation was requested
+
+    Returns:
+        bool: True if SELENIUM_PROFILE is set
+    """
+    return os.getenv("SELENIUM_PROFILE", "") not in ("", "0")
+
+
+def get_recorder():
+    """
+    get_recorder: return the recorder of the current process, creating it if
+        the instrumentation is enabled
+
+    Returns:
+        StepRecorder|None: the recorder, None if the instrumentation is
+    disabled
+    """
+    global _recorder
+    if _recorder is None and enabled():
+        _recorder = StepRecorder()
+    return _recorder
+
+
+@contextmanager
+def step(name, kind="helper"):
+    """
+    step: record the code inside of the context as a step, if the
+        instrumentation is enabled
+
+    Args:
+        name (str): name of the step
+        kind (str, optional): kind of the step. Defaults to "helper".
+    """
+    recorder = get_recorder()
+    if recorder is None:
+        yield
+        return
+    with recorder.step(name, kind):
+        yield
+
+
+def timed(function):
+    """
+    timed: decorator that records each call of a helper as a step
+
+    Args:
+        function (callable): helper
+
+    Returns:
+        callable: decorated helper
+    """
+
+    @functools.wraps(function)
+    def _wrapper(*args, **kwargs):
+        with step(function.__name__, "helper"):
+            return function(*args, **kwargs)
+
+    return _wrapper
+
+
+def instrument_driver(driver):
+    """
+    instrument_driver: record every WebDriver command of a driver. The
+        commands of the elements are also recorded, because they are executed
+        by the driver.
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+
+    Returns:
+        webdriver.Chrome: the same driver
+    """
+    recorder = get_recorder()
+    if recorder is None:
+        return driver
+    execute = driver.execute
+
+    def _execute(driver_command, params=None):
+        with recorder.step(driver_command, "command"):
+            return execute(driver_command, params)
+
+    driver.execute = _execute
+    return driver
+
+
+def load_profiles(directory=None):
+    """
+    load_profiles: merge the json files written by the workers. A test found
+        in several files (as the steps outside of any test, under "null") has
+        its times and commands added and its steps joined.
+
+    Args:
+        directory (str, optional): directory of the json files. Defaults to
+    PROFILE_DIR.
+
+    Returns:
+        dict: breakdown by test
+    """
+    directory = directory or PROFILE_DIR
+    tests = {}
+    if not os.path.isdir(directory):
+        return tests
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".json"):
+            with open(os.path.join(directory, name)) as profile:
+                for test, breakdown in json.load(profile).items():
+                    if test not in tests:
+                        tests[test] = breakdown
+                        continue
+                    merged = tests[test]
+                    for key in ("total", "wait", "active", "commands"):
+                        merged[key] += breakdown[key]
+                    merged["steps"] = merged["steps"] + breakdown["steps"]
+    return tests
+
+
+def summary_lines(tests, top=None):
+    """
+    summary_lines: format the breakdown by test and the slowest steps
+
+    Args:
+        tests (dict): breakdown by test, as returned by load_profiles
+        top (int, optional): number of steps listed. Defaults to PROFILE_TOP.
+
+    Returns:
+        str[]: lines of the summary
+    """
+    top = top or PROFILE_TOP
+    lines = [f"{'total':>9} {'wait':>9} {'active':>9} {'commands':>9}  test"]
+    for name, test in sorted(tests.items(), key=lambda item: -item[1]["total"]):
+        lines.append(
+            f"{test['total']:9.2f} {test['wait']:9.2f} {test['active']:9.2f} "
+            f"{test['commands']:9d}  {name}"
+        )
+    steps = [step for test in tests.values() for step in test["steps"]]
+    steps.sort(key=lambda step: -step["duration"])
+    lines.append("")
+    lines.append(f"{top} slowest steps")
+    lines.append(f"{'duration':>9} {'wait':>9} {'kind':>8}  step (test)")
+    for step in steps[:top]:
+        lines.append(
+            f"{step['duration']:9.2f} {step['wait']:9.2f} {step['kind']:>8}  "
+            f"{step['name']} ({step['test']})"
+        )
+    return lines
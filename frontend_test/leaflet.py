@@ -0,0 +1,357 @@
+"""
+leaflet.py: inspection of the leaflet map inside the browser. The scripts
+collect everything in a single execute_script call, instead of one WebDriver
+roundtrip for each element and attribute.
+"""
+from frontend_test.instrumentation import timed
+
+# defines __frontendTestFindMap(), that returns the leaflet map of the page.
+# react-leaflet does not expose the map, so it is found in the state of the
+# react components that are parents of the map container.
+MAP_HANDLE_JS = """
+function __frontendTestFindMap() {
+    var container = document.querySelector(".leaflet-container");
+    if (!container) {
+        return null;
+    }
+    var map = window.__frontendTestMap;
+    if (map && map._container === container) {
+        return map;
+    }
+    var isMap = function (value) {
+        return value && typeof value.latLngToContainerPoint === "function"
+            && value._container === container;
+    };
+    var candidate = function (value) {
+        if (!value || typeof value !== "object") {
+            return null;
+        }
+        if (isMap(value)) {
+            return value;
+        }
+        if (isMap(value.map)) {
+            return value.map;
+        }
+        if (isMap(value.current)) {
+            return value.current;
+        }
+        return null;
+    };
+    var key = Object.keys(container).find(function (name) {
+        return name.indexOf("__reactFiber$") === 0
+            || name.indexOf("__reactInternalInstance$") === 0;
+    });
+    var fiber = key ? container[key] : null;
+    for (var depth = 0; fiber && depth < 50; depth++) {
+        var state = fiber.memoizedState;
+        for (var hook = 0; state && hook < 50; hook++) {
+            map = candidate(state.memoizedState) || candidate(state);
+            if (map) {
+                window.__frontendTestMap = map;
+                return map;
+            }
+            state = state.next;
+        }
+        map = candidate(fiber.memoizedProps && fiber.memoizedProps.value);
+        if (map) {
+            window.__frontendTestMap = map;
+            return map;
+        }
+        fiber = fiber.return;
+    }
+    return null;
+}
+"""
+
+# the url template of a layer is read from the leaflet layer drawn in its
+# container: the vector tiles (mbtiles) are drawn on canvases, without url
+_INSPECT_LAYERS_JS = (
+    MAP_HANDLE_JS
+    + """
+var layers = document.getElementsByClassName("leaflet-layer");
+var records = [];
+var urls = new Map();
+var map = __frontendTestFindMap();
+if (map) {
+    map.eachLayer(function (mapLayer) {
+        var container = mapLayer._container;
+        if (container && typeof mapLayer._url === "string") {
+            urls.set(container, mapLayer._url);
+        }
+    });
+}
+for (var i = 0; i < layers.length; i++) {
+    var layer = layers[i];
+    var images = layer.getElementsByTagName("img");
+    var canvases = layer.getElementsByTagName("canvas");
+    var tiles = [];
+    for (var j = 0; j < images.length; j++) {
+        tiles.push(images[j].src);
+    }
+    // leaflet only marks the tiles that loaded; a tile that failed (404
+    // outside of a COG, 204 of a missing mbtiles tile) is a complete image
+    // without size
+    var failed = 0;
+    var tileElements = layer.getElementsByClassName("leaflet-tile");
+    for (var k = 0; k < tileElements.length; k++) {
+        var tile = tileElements[k];
+        if (tile.tagName === "IMG" && tile.complete && tile.naturalWidth === 0
+            && !tile.classList.contains("leaflet-tile-loaded")) {
+            failed++;
+        }
+    }
+    var type = "empty";
+    if (images.length > 0) {
+        type = "image";
+    } else if (canvases.length > 0) {
+        type = "canvas";
+    }
+    records.push({
+        element: layer,
+        type: type,
+        tiles: tiles,
+        tiles_count: layer.getElementsByClassName("leaflet-tile").length,
+        tiles_loaded: layer.getElementsByClassName("leaflet-tile-loaded").length,
+        tiles_failed: failed,
+        z_index: layer.style.zIndex,
+        opacity: layer.style.opacity,
+        transform: layer.style.transform,
+        url: urls.get(layer) || null
+    });
+}
+return records;
+"""
+)
+
+
+def _to_number(value, cast):
+    """
+    _to_number: convert a css value to a number
+
+    Args:
+        value (str): css value, as "0.7"
+        cast (type): int or float
+
+    Returns:
+        int|float|None: converted value, None if the value is not defined
+    """
+    if value in (None, ""):
+        return None
+    return cast(float(value))
+
+
+@timed
+def inspect_layers(driver):
+    """
+    inspect_layers: collect the information of every leaflet layer in one
+        roundtrip
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that could represent the
+    entire page or a part of the page.
+
+    Returns:
+        list: one dict by layer, with the keys element (WebElement), type
+    ("image", "canvas" or "empty"), tiles (list of tile urls), tiles_count
+    (number of image or canvas tiles), tiles_loaded (number of tiles already
+    loaded, marked by leaflet on the tileload event), tiles_failed (number of
+    image tiles whose request failed), z_index (int|None), opacity (float|None),
+    transform (str) and url (url template of the leaflet layer, None if the
+    map was not found)
+    """
+    records = driver.execute_script(_INSPECT_LAYERS_JS)
+    for record in records:
+        record["z_index"] = _to_number(record["z_index"], int)
+        record["opacity"] = _to_number(record["opacity"], float)
+    return records
+
+
+_MAP_VIEW_JS = (
+    MAP_HANDLE_JS
+    + """
+var map = __frontendTestFindMap();
+if (!map) {
+    return null;
+}
+var center = map.getCenter();
+return {lat: center.lat, lng: center.lng, zoom: map.getZoom()};
+"""
+)
+
+_SET_MAP_VIEW_JS = (
+    MAP_HANDLE_JS
+    + """
+var map = __frontendTestFindMap();
+if (!map) {
+    return false;
+}
+map.closePopup();
+map.setView([arguments[0], arguments[1]], arguments[2], {animate: false});
+return true;
+"""
+)
+
+
+def get_map_view(driver):
+    """
+    get_map_view: centre and zoom of the leaflet map
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+
+    Returns:
+        dict|None: {"lat", "lng", "zoom"}, None if the map was not found
+    """
+    return driver.execute_script(_MAP_VIEW_JS)
+
+
+def set_map_view(driver, view):
+    """
+    set_map_view: close the popups and move the leaflet map, without animation
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+        view (dict): {"lat", "lng", "zoom"}, as returned by get_map_view
+
+    Returns:
+        bool: False if the map was not found
+    """
+    return driver.execute_script(_SET_MAP_VIEW_JS, view["lat"], view["lng"], view["zoom"])
+
+
+# named places of the Haig Fras area, as (lat, lng), used to click on the map
+# in geographic coordinates
+MAP_SITES = {
+    "haig fras reef": (50.27, -7.93),
+    "haig fras north": (50.33, -7.86),
+    "haig fras south": (50.2, -8.0),
+}
+
+# offsets of points from the centre of the map container, with the projection
+# of the map. If a point is outside the container, the map is first centred
+# on the points, without changing the zoom.
+_MAP_OFFSETS_JS = (
+    MAP_HANDLE_JS
+    + """
+var map = __frontendTestFindMap();
+if (!map) {
+    return null;
+}
+var points = arguments[0];
+var size = map.getSize();
+var project = function () {
+    return points.map(function (point) {
+        return map.latLngToContainerPoint(point);
+    });
+};
+var inside = function (pixels) {
+    return pixels.every(function (pixel) {
+        return pixel.x >= 1 && pixel.y >= 1
+            && pixel.x < size.x - 1 && pixel.y < size.y - 1;
+    });
+};
+var pixels = project();
+if (!inside(pixels) && arguments[1]) {
+    map.closePopup();
+    // the leaflet module is bundled in the frontend, there is no global L
+    var center = [0, 1].map(function (axis) {
+        var values = points.map(function (point) {
+            return point[axis];
+        });
+        return (Math.min.apply(null, values) + Math.max.apply(null, values)) / 2;
+    });
+    map.setView(center, map.getZoom(), {animate: false});
+    pixels = project();
+}
+if (!inside(pixels)) {
+    return [];
+}
+return pixels.map(function (pixel) {
+    return [Math.round(pixel.x - size.x / 2), Math.round(pixel.y - size.y / 2)];
+});
+"""
+)
+
+
+def map_location(location):
+    """
+    map_location: coordinates of a location of the map
+
+    Args:
+        location (str|tuple): name of a place of MAP_SITES or (lat, lng)
+
+    Returns:
+        tuple: (lat, lng)
+    """
+    if isinstance(location, str):
+        try:
+            return MAP_SITES[location.lower()]
+        except KeyError:
+            raise ValueError(f"unknown place {location}") from None
+    lat, lng = location
+    return float(lat), float(lng)
+
+
+@timed
+def map_offsets(driver, locations, pan=True):
+    """
+    map_offsets: convert geographic locations to offsets in pixels from the
+        centre of the map, with the projection and zoom of the map in the page
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+        locations (list): names of places of MAP_SITES or (lat, lng) tuples
+        pan (bool, optional): centre the map on the locations when they are
+    not all visible. Defaults to True.
+
+    Returns:
+        list: (x, y) offsets, one by location
+    """
+    points = [list(map_location(location)) for location in locations]
+    offsets = driver.execute_script(_MAP_OFFSETS_JS, points, pan)
+    if offsets is None:
+        raise ValueError("the leaflet map was not found")
+    if len(offsets) != len(points):
+        raise ValueError(f"the locations {locations} are not visible on the map")
+    return [tuple(offset) for offset in offsets]
+
+
+_OFFSET_LOCATIONS_JS = (
+    MAP_HANDLE_JS
+    + """
+var map = __frontendTestFindMap();
+if (!map) {
+    return null;
+}
+var size = map.getSize();
+return arguments[0].map(function (offset) {
+    var point = map.containerPointToLatLng([
+        offset[0] + size.x / 2, offset[1] + size.y / 2
+    ]);
+    return [point.lat, point.lng];
+});
+"""
+)
+
+
+def offset_locations(driver, offsets):
+    """
+    offset_locations: geographic locations of offsets from the centre of the
+        map, as the points really clicked by click_map (the offsets are
+        rounded to pixels)
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+        offsets (list): (x, y) offsets in pixels
+
+    Returns:
+        list: (lat, lng) tuples, one by offset
+    """
+    locations = driver.execute_script(_OFFSET_LOCATIONS_JS, [list(offset) for offset in offsets])
+    if locations is None:
+        raise ValueError("the leaflet map was not found")
+    return [tuple(location) for location in locations]
@@ -0,0 +1,228 @@
+"""
+load.py: load generation with the flows of the tests. Several headless
+browsers (virtual users) repeat the flows of the benchmark at the same time,
+so the frontend, the tile servers and the calculations API are exercised
+under concurrency. The latency of every step is recorded and the percentiles
+and error rate of each step are reported.
+
+The users are started one after the other during the ramp-up, wait a random
+think time between two steps and stop when the duration is over.
+
+Usage:
+    python -m frontend_test.load --users 10 --ramp-up 60 --duration 600
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+from time import monotonic, sleep
+from dotenv import load_dotenv
+from selenium.common.exceptions import WebDriverException
+from frontend_test import flows
+from frontend_test.benchmark import FLOWS, percentile
+from frontend_test.driver import BrowserSession
+
+LOAD_USERS = int(os.getenv("LOAD_USERS", "5"))
+LOAD_RAMP_UP = float(os.getenv("LOAD_RAMP_UP", "30"))
+LOAD_DURATION = float(os.getenv("LOAD_DURATION", "300"))
+LOAD_THINK_TIME = float(os.getenv("LOAD_THINK_TIME", "2"))
+LOAD_FLOWS = os.getenv("LOAD_FLOWS", "bathymetry,graph,wms,mbtiles,infobox")
+
+
+class VirtualUser(threading.Thread):
+    """
+    VirtualUser: a headless browser that repeats the flows until the end of
+        the run. Every step is added to the samples of the LoadRun.
+    """
+
+    def __init__(self, load_run, index, start_delay):
+        super().__init__(name=f"load{index}", daemon=True)
+        self.load_run = load_run
+        self.index = index
+        self.start_delay = start_delay
+        self.random = random.Random(index)
+
+    def _think(self):
+        think_time = self.load_run.think_time * self.random.uniform(0.5, 1.5)
+        sleep(max(0.0, min(think_time, self.load_run.deadline - monotonic())))
+
+    def _step(self, name, action):
+        start = monotonic()
+        error = None
+        try:
+            action()
+        except Exception as exception:
+            # any failure of a flow is an error of the step, the user goes on
+            error = type(exception).__name__
+        self.load_run.add_sample(
+            {
+                "user": self.index,
+                "step": name,
+                "start": start - self.load_run.started,
+                "latency": (monotonic() - start) * 1000,
+                "error": error,
+            }
+        )
+        return error is None
+
+    def run(self):
+        sleep(self.start_delay)
+        if monotonic() >= self.load_run.deadline:
+            return
+        session = BrowserSession(worker_id=self.name, mode="HEADLESS")
+        try:
+            driver = session.start()
+        except WebDriverException as exception:
+            self.load_run.add_sample(
+                {
+                    "user": self.index,
+                    "step": "start",
+                    "start": monotonic() - self.load_run.started,
+                    "latency": 0.0,
+                    "error": type(exception).__name__,
+                }
+            )
+            session.quit()
+            return
+        url = self.load_run.url
+        try:
+            loaded = self._step("load", lambda: flows.open_app(driver, url))
+            while monotonic() < self.load_run.deadline:
+                for name in self.load_run.flow_names:
+                    if monotonic() >= self.load_run.deadline:
+                        break
+                    self._think()
+                    if FLOWS[name] is None or not loaded:
+                        loaded = self._step("load", lambda: flows.open_app(driver, url))
+                        continue
+                    if not self._step("reset", lambda: flows.reset_app(driver, url)):
+                        loaded = False
+                        continue
+                    if not self._step(name, lambda: FLOWS[name](driver)):
+                        loaded = False
+        finally:
+            session.quit()
+
+
+class LoadRun:
+    """
+    LoadRun: the virtual users of a run and the samples they record
+    """
+
+    def __init__(self, url, users, ramp_up, duration, think_time, flow_names):
+        self.url = url
+        self.users = users
+        self.ramp_up = ramp_up
+        self.duration = duration
+        self.think_time = think_time
+        self.flow_names = flow_names
+        self.samples = []
+        self._lock = threading.Lock()
+        self.started = None
+        self.deadline = None
+
+    def add_sample(self, sample):
+        """
+        add_sample: record a step of a user
+        """
+        with self._lock:
+            self.samples.append(sample)
+
+    def run(self):
+        """
+        run: start the users during the ramp-up and wait until they finish
+
+        Returns:
+            dict[]: the samples, one by step
+        """
+        self.started = monotonic()
+        self.deadline = self.started + self.duration
+        users = [
+            VirtualUser(self, index, self.ramp_up * index / max(self.users, 1))
+            for index in range(self.users)
+        ]
+        for user in users:
+            user.start()
+        for user in users:
+            user.join()
+        return self.samples
+
+
+def summarise_samples(samples, duration):
+    """
+    summarise_samples: percentiles of the latency and error rate of each step
+
+    Args:
+        samples (dict[]): samples of the run
+        duration (float): duration of the run in seconds
+
+    Returns:
+        dict: {step: {"count", "errors", "error_rate", "throughput" (steps by
+    second), "p50", "p90", "p95", "p99" and "max" (milliseconds, of the
+    successful steps)}}
+    """
+    summary = {}
+    for step in sorted({sample["step"] for sample in samples}):
+        step_samples = [sample for sample in samples if sample["step"] == step]
+        latencies = [sample["latency"] for sample in step_samples if sample["error"] is None]
+        errors = len(step_samples) - len(latencies)
+        summary[step] = {
+            "count": len(step_samples),
+            "errors": errors,
+            "error_rate": errors / len(step_samples),
+            "throughput": len(step_samples) / duration if duration > 0 else 0.0,
+        }
+        for q in (50, 90, 95, 99):
+            summary[step][f"p{q}"] = percentile(latencies, q) if latencies else None
+        summary[step]["max"] = max(latencies, default=None)
+    return summary
+
+
+def main(argv=None):
+    """
+    main: command line interface of the load mode
+    """
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default=os.getenv("FRONTEND_URL_LOCAL"))
+    parser.add_argument("--users", type=int, default=LOAD_USERS)
+    parser.add_argument("--ramp-up", type=float, default=LOAD_RAMP_UP)
+    parser.add_argument("--duration", type=float, default=LOAD_DURATION)
+    parser.add_argument("--think-time", type=float, default=LOAD_THINK_TIME)
+    parser.add_argument("--flows", default=LOAD_FLOWS)
+    parser.add_argument("--output", default="load.json")
+    args = parser.parse_args(argv)
+
+    flow_names = args.flows.split(",")
+    unknown = [name for name in flow_names if name not in FLOWS]
+    if unknown:
+        parser.error(f"unknown flows: {', '.join(unknown)}")
+
+    load_run = LoadRun(
+        args.url, args.users, args.ramp_up, args.duration, args.think_time, flow_names
+    )
+    samples = load_run.run()
+    elapsed = monotonic() - load_run.started
+    summary = summarise_samples(samples, elapsed)
+    with open(args.output, "w") as output:
+        json.dump({"summary": summary, "samples": samples}, output, indent=2)
+
+    for step, result in summary.items():
+        p50 = "-" if result["p50"] is None else f"{result['p50']:.0f}"
+        p95 = "-" if result["p95"] is None else f"{result['p95']:.0f}"
+        print(
+            f"{step:>12}: {result['count']:5d} steps  p50 {p50:>7} ms  "
+            f"p95 {p95:>7} ms  errors {100 * result['error_rate']:5.1f}%"
+        )
+    errors = sum(result["errors"] for result in summary.values())
+    print(
+        f"{args.users} users, {len(samples) / elapsed:.2f} steps/s, "
+        f"{100 * errors / max(len(samples), 1):.1f}% errors"
+    )
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
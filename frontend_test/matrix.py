@@ -0,0 +1,248 @@
+"""
+matrix.py: run the tests with several browser configurations at the same
+time. Each configuration is a separate pytest process with its own browsers,
+profiles and output directory (MATRIX_DIR/<configuration>). When every run is
+finished, their JUnit reports are merged in one report, with the time of each
+test in each configuration side by side.
+
+A configuration is written as browser[:mode][:WIDTHxHEIGHT], as "firefox",
+"chrome:headless" or "chrome:headless:1280x800"; MATRIX is a comma separated
+list of configurations.
+
+Usage:
+    python -m frontend_test.matrix --matrix chrome,firefox,chrome:headless:1280x800
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import xml.etree.ElementTree as ET
+from time import perf_counter, sleep
+from frontend_test.tileserver import MBTILES_FILE, TileServer
+
+MATRIX = os.getenv("MATRIX", "chrome,firefox")
+MATRIX_DIR = os.getenv("MATRIX_DIR", "matrix")
+
+
+def parse_configuration(text):
+    """
+    parse_configuration: convert a configuration as "chrome:headless:1280x800"
+
+    Args:
+        text (str): browser[:mode][:WIDTHxHEIGHT]
+
+    Returns:
+        dict: name, browser, mode ("HEADLESS" or "") and window_size ("" for a
+    maximized window)
+    """
+    parts = [part.strip() for part in text.strip().split(":")]
+    configuration = {
+        "name": re.sub(r"[^\w.-]+", "_", text.strip()),
+        "browser": parts[0].lower(),
+        "mode": "",
+        "window_size": "",
+    }
+    for part in parts[1:]:
+        if re.fullmatch(r"\d+x\d+", part.lower()):
+            configuration["window_size"] = part.lower()
+        elif part.lower() == "headless":
+            configuration["mode"] = "HEADLESS"
+        elif part.lower() not in ("headed", ""):
+            raise ValueError(f"unknown option {part} in the configuration {text}")
+    return configuration
+
+
+def configuration_env(configuration, index, directory):
+    """
+    configuration_env: environment of the pytest process of a configuration
+
+    Args:
+        configuration (dict): configuration, from parse_configuration
+        index (int): index of the configuration, to separate the driver ports
+        directory (str): output directory of the configuration
+
+    Returns:
+        dict: environment variables
+    """
+    env = dict(os.environ)
+    env.update(
+        {
+            "SELENIUM_BROWSER": configuration["browser"],
+            "SELENIUM_MODE": configuration["mode"],
+            "SELENIUM_WINDOW_SIZE": configuration["window_size"],
+            "PROFILE_DIR": os.path.join(directory, "profile"),
+            "FAILURE_TRACE_DIR": os.path.join(directory, "failures"),
+            # the mbtiles server is shared, started by the matrix
+            "MBTILES_FILE": "",
+        }
+    )
+    # the durations, the passed tests and the history of each configuration
+    # are kept in separate files, next to the configured ones (kept between
+    # the runs)
+    for name, default in (
+        ("DURATIONS_FILE", "durations.json"),
+        ("INCREMENTAL_FILE", "passed.json"),
+        ("HISTORY_DB", "history.sqlite"),
+    ):
+        if env.get(name):
+            root, extension = os.path.splitext(env[name])
+            env[name] = f"{root}.{configuration['name']}{extension}"
+        else:
+            env[name] = os.path.join(directory, default)
+    if env.get("SELENIUM_BASE_PORT"):
+        env["SELENIUM_BASE_PORT"] = str(int(env["SELENIUM_BASE_PORT"]) + 1000 * index)
+    return env
+
+
+def read_junit(path):
+    """
+    read_junit: results of the tests in a JUnit report
+
+    Args:
+        path (str): path of the report
+
+    Returns:
+        dict: {test: {"outcome": "passed", "failed", "error" or "skipped",
+    "time": seconds}}
+    """
+    if not os.path.isfile(path):
+        return {}
+    results = {}
+    for testcase in ET.parse(path).getroot().iter("testcase"):
+        outcome = "passed"
+        for child, name in (("failure", "failed"), ("error", "error"), ("skipped", "skipped")):
+            if testcase.find(child) is not None:
+                outcome = name
+                break
+        test = f"{testcase.get('classname')}::{testcase.get('name')}"
+        results[test] = {"outcome": outcome, "time": float(testcase.get("time", 0))}
+    return results
+
+
+def merge_results(runs):
+    """
+    merge_results: put the results of the configurations side by side
+
+    Args:
+        runs (dict[]): one dict by configuration, with name and results
+
+    Returns:
+        dict: {test: {configuration: result}}
+    """
+    merged = {}
+    for run in runs:
+        for test, result in run["results"].items():
+            merged.setdefault(test, {})[run["name"]] = result
+    return dict(sorted(merged.items()))
+
+
+def run_matrix(configurations, pytest_args, directory=None):
+    """
+    run_matrix: start one pytest process by configuration and wait for all
+        of them
+
+    Args:
+        configurations (dict[]): configurations, from parse_configuration
+        pytest_args (str[]): arguments of pytest, as the test files
+        directory (str, optional): output directory. Defaults to MATRIX_DIR.
+
+    Returns:
+        dict[]: the configurations with returncode, duration (seconds) and
+    results
+    """
+    directory = directory or MATRIX_DIR
+    processes = []
+    start = perf_counter()
+    for index, configuration in enumerate(configurations):
+        run_directory = os.path.join(directory, configuration["name"])
+        os.makedirs(run_directory, exist_ok=True)
+        junit = os.path.join(run_directory, "junit.xml")
+        if os.path.isfile(junit):
+            os.remove(junit)
+        log = open(os.path.join(run_directory, "output.log"), "w")
+        process = subprocess.Popen(
+            [sys.executable, "-m", "pytest", "-p", "no:cacheprovider", f"--junitxml={junit}"]
+            + list(pytest_args),
+            env=configuration_env(configuration, index, run_directory),
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+        processes.append((configuration, process, log, junit))
+
+    durations = {}
+    while len(durations) < len(processes):
+        for idx, (_, process, log, _) in enumerate(processes):
+            if idx not in durations and process.poll() is not None:
+                durations[idx] = perf_counter() - start
+                log.close()
+        sleep(0.5)
+    return [
+        dict(
+            configuration,
+            returncode=process.returncode,
+            duration=durations[idx],
+            results=read_junit(junit),
+        )
+        for idx, (configuration, process, _, junit) in enumerate(processes)
+    ]
+
+
+def report_lines(runs, merged):
+    """
+    report_lines: table of the time of each test in each configuration
+
+    Returns:
+        str[]: lines of the table
+    """
+    names = [run["name"] for run in runs]
+    width = max([len(test) for test in merged] + [4])
+    lines = [f"{'test':<{width}}  " + "  ".join(f"{name:>22}" for name in names)]
+    for test, results in merged.items():
+        cells = []
+        for name in names:
+            result = results.get(name)
+            cell = "-" if result is None else f"{result['time']:8.1f}s {result['outcome']}"
+            cells.append(f"{cell:>22}")
+        lines.append(f"{test:<{width}}  " + "  ".join(cells))
+    totals = [
+        f"{run['duration']:8.1f}s rc={run['returncode']}".rjust(22) for run in runs
+    ]
+    lines.append(f"{'total':<{width}}  " + "  ".join(totals))
+    return lines
+
+
+def main(argv=None):
+    """
+    main: command line interface of the matrix runner. The arguments after
+        "--" are given to pytest.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--matrix", default=MATRIX)
+    parser.add_argument("--output", default=os.path.join(MATRIX_DIR, "matrix.json"))
+    parser.add_argument("pytest_args", nargs="*", default=["tests/test_with_pytest.py"])
+    args = parser.parse_args(argv)
+    configurations = [parse_configuration(text) for text in args.matrix.split(",")]
+
+    server = None
+    if MBTILES_FILE:
+        server = TileServer()
+        server.start()
+    try:
+        runs = run_matrix(configurations, args.pytest_args)
+    finally:
+        if server is not None:
+            server.stop()
+
+    merged = merge_results(runs)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as output:
+        json.dump({"runs": runs, "tests": merged}, output, indent=2)
+    for line in report_lines(runs, merged):
+        print(line)
+    return max(run["returncode"] for run in runs)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+"""
+memory.py: leak detection of the Frontend Haig Fras. A flow of the tests
+(toggle a layer, open a popup or a graph and close it) is repeated several
+times in the same page. After each cycle the garbage is collected and the JS
+heap size, the number of DOM nodes and the number of event listeners are read
+with the Chrome DevTools Protocol (Performance.getMetrics). A line is fitted
+to each metric and the metrics that grow faster than a threshold by cycle
+are reported as leaks.
+
+With the browsers without the Chrome DevTools Protocol, only the number of
+DOM nodes (and the heap size, if performance.memory exists) are sampled.
+
+Usage:
+    python -m frontend_test.memory --flow images --cycles 30
+"""
+import argparse
+import json
+import os
+import sys
+import numpy as np
+from dotenv import load_dotenv
+from selenium.webdriver.common.by import By
+from frontend_test import flows
+from frontend_test.driver import BrowserSession
+from frontend_test.network import network_mark, wait_layer_loaded
+from frontend_test.utils import click_fontawesome, get_layers
+from frontend_test.wait import element_count, wait_until
+
+MEMORY_CYCLES = int(os.getenv("MEMORY_CYCLES", "20"))
+# first cycles ignored by the fit, while the caches of the page are filled
+MEMORY_WARMUP = int(os.getenv("MEMORY_WARMUP", "3"))
+# growth by cycle above which a metric is reported as a leak
+MEMORY_THRESHOLDS = {
+    "JSHeapUsedSize": float(os.getenv("MEMORY_HEAP_THRESHOLD", str(256 * 1024))),
+    "Nodes": float(os.getenv("MEMORY_NODES_THRESHOLD", "20")),
+    "JSEventListeners": float(os.getenv("MEMORY_LISTENERS_THRESHOLD", "10")),
+}
+SEABED_IMAGES = "Seabed Images"
+
+_DOM_METRICS_JS = """
+var memory = performance.memory;
+return {
+    JSHeapUsedSize: memory ? memory.usedJSHeapSize : null,
+    Nodes: document.getElementsByTagName("*").length,
+    JSEventListeners: null
+};
+"""
+
+
+def memory_metrics(driver):
+    """
+    memory_metrics: collect the garbage and read the memory metrics of the
+        page
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+
+    Returns:
+        dict: JSHeapUsedSize (bytes), Nodes and JSEventListeners. The metrics
+    that the browser does not give are None.
+    """
+    if not hasattr(driver, "execute_cdp_cmd"):
+        return driver.execute_script(_DOM_METRICS_JS)
+    driver.execute_cdp_cmd("HeapProfiler.collectGarbage", {})
+    driver.execute_cdp_cmd("Performance.enable", {})
+    metrics = driver.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]
+    values = {metric["name"]: metric["value"] for metric in metrics}
+    return {name: values.get(name) for name in MEMORY_THRESHOLDS}
+
+
+def _setup_images(driver):
+    flows.open_section(driver, flows.DATA_EXPLORATION)
+    flows.open_general_type(driver, name=SEABED_IMAGES)
+    return flows.layer_checkbox(driver, idx=0)
+
+
+def _cycle_images(driver, check_layer):
+    check_layer.click()
+    wait_until(driver, element_count((By.CLASS_NAME, "all-icon"), minimum=1))
+    driver.find_element(By.CLASS_NAME, "leaflet-marker-icon").click()
+    wait_until(
+        driver, element_count((By.CLASS_NAME, "leaflet-popup-content"), minimum=1)
+    )
+    driver.find_element(By.CLASS_NAME, "leaflet-popup-close-button").click()
+    wait_until(driver, element_count((By.CLASS_NAME, "leaflet-popup"), maximum=0))
+    check_layer.click()
+    wait_until(driver, element_count((By.CLASS_NAME, "all-icon"), maximum=0))
+
+
+def _setup_bathymetry(driver):
+    flows.open_section(driver, flows.DATA_EXPLORATION)
+    flows.open_general_type(driver, idx=0)
+    return flows.layer_checkbox(driver, idx=0)
+
+
+def _cycle_bathymetry(driver, check_layer):
+    since = network_mark(driver)
+    check_layer.click()
+    wait_layer_loaded(driver, timeout=30, since=since)
+    check_layer.click()
+    wait_until(driver, lambda page: not get_layers(page))
+
+
+def _setup_graph(driver):
+    return flows.toggle_bathymetry(driver)
+
+
+def _cycle_graph(driver, _):
+    flows.open_bathymetry_graph(driver)
+    layer_edit = driver.find_elements(By.ID, "layer-edit")
+    click_fontawesome(driver=layer_edit[0], button_name="chart-simple")
+    wait_until(driver, element_count((By.ID, "graph-box"), maximum=0), timeout=10)
+
+
+# flow: (setup, run once in the page, and cycle, repeated)
+CYCLES = {
+    "images": (_setup_images, _cycle_images),
+    "bathymetry": (_setup_bathymetry, _cycle_bathymetry),
+    "graph": (_setup_graph, _cycle_graph),
+}
+
+
+def run_cycles(driver, url, flow, cycles):
+    """
+    run_cycles: open the frontend and repeat the cycle of a flow, sampling
+        the memory before the first cycle and after each cycle
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+        url (str): url of the frontend
+        flow (str): name of the flow, key of CYCLES
+        cycles (int): number of cycles
+
+    Returns:
+        dict[]: metrics of each sample
+    """
+    setup, cycle = CYCLES[flow]
+    flows.open_app(driver, url)
+    context = setup(driver)
+    samples = [memory_metrics(driver)]
+    for _ in range(cycles):
+        cycle(driver, context)
+        samples.append(memory_metrics(driver))
+    return samples
+
+
+def leak_trend(samples, warmup=None, thresholds=None):
+    """
+    leak_trend: fit a line to each metric, after the warm-up cycles
+
+    Args:
+        samples (dict[]): metrics of each sample, from run_cycles
+        warmup (int, optional): first samples ignored. Defaults to
+    MEMORY_WARMUP.
+        thresholds (dict, optional): growth by cycle allowed for each metric.
+    Defaults to MEMORY_THRESHOLDS.
+
+    Returns:
+        dict: {metric: {"slope" (growth by cycle), "r2", "first", "last" and
+    "leak" (True if the slope is above the threshold)}}
+    """
+    warmup = MEMORY_WARMUP if warmup is None else warmup
+    thresholds = MEMORY_THRESHOLDS if thresholds is None else thresholds
+    trend = {}
+    for metric, threshold in thresholds.items():
+        values = np.array(
+            [sample.get(metric) for sample in samples[warmup:]], dtype=float
+        )
+        if len(values) < 2 or np.isnan(values).any():
+            continue
+        cycles = np.arange(len(values))
+        slope, intercept = np.polyfit(cycles, values, 1)
+        residuals = values - (slope * cycles + intercept)
+        variance = np.sum((values - values.mean()) ** 2)
+        r2 = 1 - np.sum(residuals**2) / variance if variance > 0 else 1.0
+        trend[metric] = {
+            "slope": float(slope),
+            "r2": float(r2),
+            "first": float(values[0]),
+            "last": float(values[-1]),
+            "leak": bool(slope > threshold),
+        }
+    return trend
+
+
+def main(argv=None):
+    """
+    main: command line interface of the leak detection
+    """
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default=os.getenv("FRONTEND_URL_LOCAL"))
+    parser.add_argument("--flow", choices=list(CYCLES), default="images")
+    parser.add_argument("--cycles", type=int, default=MEMORY_CYCLES)
+    parser.add_argument("--output", default="memory.json")
+    args = parser.parse_args(argv)
+
+    session = BrowserSession(worker_id="memory")
+    try:
+        samples = run_cycles(session.start(), args.url, args.flow, args.cycles)
+    finally:
+        session.quit()
+
+    trend = leak_trend(samples)
+    with open(args.output, "w") as output:
+        json.dump({"flow": args.flow, "samples": samples, "trend": trend}, output, indent=2)
+    for metric, result in trend.items():
+        status = "LEAK" if result["leak"] else "ok"
+        print(
+            f"{metric:>16}: {result['first']:14.0f} -> {result['last']:14.0f}  "
+            f"{result['slope']:+12.1f} by cycle (r2 {result['r2']:.2f})  {status}"
+        )
+    return 1 if any(result["leak"] for result in trend.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
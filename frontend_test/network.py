@@ -0,0 +1,370 @@
+"""
+network.py: network activity of the browser. With Chrome, the Network events
+of the Chrome DevTools Protocol are read from the performance log of the
+driver; they give the requests in flight and the number of requests, bytes
+and duration for each layer. With the other browsers, the waits fall back to
+the tiles marked as loaded by leaflet (the leaflet-tile-loaded class is set by
+the tileload event).
+
+The performance log can only be read once, so every consumer subscribes to
+the PerformanceLog of the driver instead of calling get_log itself.
+"""
+import json
+import os
+from time import monotonic
+from selenium.common.exceptions import WebDriverException
+from frontend_test.instrumentation import enabled, timed
+from frontend_test.utils import get_layers
+from frontend_test.wait import wait_until
+
+NETWORK_TRACKING = os.getenv("NETWORK_TRACKING", "1") not in ("", "0")
+# time without network activity after which the requests are considered drained
+NETWORK_QUIET_PERIOD = float(os.getenv("NETWORK_QUIET_PERIOD", "0.5"))
+# trace categories added to the performance log, for the failure traces. The
+# trace events are parsed at every read of the log: the failure traces only
+# enable the main thread timeline and the user timings, the profiled runs
+# (SELENIUM_PROFILE=1) also enable the JavaScript execution
+DEFAULT_TRACE_CATEGORIES = "devtools.timeline,blink.user_timing,v8.execute"
+FAILURE_TRACE_CATEGORIES = "devtools.timeline,blink.user_timing"
+TRACE_CATEGORIES = os.getenv("TRACE_CATEGORIES")
+if TRACE_CATEGORIES is None:
+    if enabled():
+        TRACE_CATEGORIES = DEFAULT_TRACE_CATEGORIES
+    elif os.getenv("FAILURE_TRACE", "1") not in ("", "0"):
+        TRACE_CATEGORIES = FAILURE_TRACE_CATEGORIES
+    else:
+        TRACE_CATEGORIES = ""
+
+
+def logging_prefs():
+    """
+    logging_prefs: logging preferences of chromedriver that enable the
+        performance log (with the Network events) and the console log
+
+    Returns:
+        dict: value of the goog:loggingPrefs capability
+    """
+    prefs = {"browser": "ALL"}
+    if NETWORK_TRACKING:
+        prefs["performance"] = "ALL"
+    return prefs
+
+
+def perf_logging_prefs():
+    """
+    perf_logging_prefs: content of the performance log of chromedriver, the
+        Network and Page events and the trace events of TRACE_CATEGORIES
+
+    Returns:
+        dict: value of the perfLoggingPrefs option
+    """
+    prefs = {"enableNetwork": True, "enablePage": True}
+    if TRACE_CATEGORIES:
+        prefs["traceCategories"] = TRACE_CATEGORIES
+    return prefs
+
+
+class PerformanceLog:
+    """
+    PerformanceLog: read the performance log of the driver and send each
+        DevTools event to the subscribers
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.subscribers = []
+        try:
+            self.supported = NETWORK_TRACKING and "performance" in driver.log_types
+        except (AttributeError, WebDriverException):
+            self.supported = False
+
+    def subscribe(self, callback):
+        """
+        subscribe: register a callback that receives (method, params) of
+            each event
+        """
+        self.subscribers.append(callback)
+
+    def drain(self):
+        """
+        drain: read the events logged since the last call
+
+        Returns:
+            int: number of events read
+        """
+        if not self.supported:
+            return 0
+        entries = self.driver.get_log("performance")
+        for entry in entries:
+            message = json.loads(entry["message"])["message"]
+            for callback in self.subscribers:
+                callback(message["method"], message.get("params", {}))
+        return len(entries)
+
+
+def performance_log(driver):
+    """
+    performance_log: the PerformanceLog of a driver, created on first use
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+
+    Returns:
+        PerformanceLog: the log shared by all the consumers of the driver
+    """
+    log = getattr(driver, "_frontend_test_performance_log", None)
+    if log is None:
+        log = PerformanceLog(driver)
+        driver._frontend_test_performance_log = log
+    return log
+
+
+class NetworkTracker:
+    """
+    NetworkTracker: requests of the page, built from the Network events
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.log = performance_log(driver)
+        self.requests = {}
+        # number of requests seen, to separate the requests of each action
+        self.sequence = 0
+        self.log.subscribe(self._on_event)
+
+    @property
+    def supported(self):
+        """
+        supported: True if the browser gives the Network events
+        """
+        return self.log.supported
+
+    def _on_event(self, method, params):
+        if not method.startswith("Network."):
+            return
+        request_id = params.get("requestId")
+        if method == "Network.requestWillBeSent":
+            self.requests[request_id] = {
+                "url": params["request"]["url"],
+                "start": params["timestamp"],
+                "end": None,
+                "bytes": 0,
+                "status": None,
+                "failed": False,
+                "sequence": self.sequence,
+                # time of the last event of the request, for the quiet period
+                "activity": None,
+            }
+            self.sequence += 1
+        elif request_id not in self.requests:
+            return
+        elif method == "Network.responseReceived":
+            self.requests[request_id]["status"] = params["response"]["status"]
+        elif method == "Network.loadingFinished":
+            self.requests[request_id]["end"] = params["timestamp"]
+            self.requests[request_id]["bytes"] = params.get("encodedDataLength", 0)
+        elif method == "Network.loadingFailed":
+            self.requests[request_id]["end"] = params["timestamp"]
+            self.requests[request_id]["failed"] = True
+        else:
+            return
+        self.requests[request_id]["activity"] = monotonic()
+
+    def reset(self):
+        """
+        reset: forget the requests seen until now
+        """
+        self.log.drain()
+        self.requests = {}
+
+    def mark(self):
+        """
+        mark: marker of the requests sent from now, to take before an action
+
+        Returns:
+            int: the marker, for the since argument
+        """
+        self.log.drain()
+        return self.sequence
+
+    def _matching(self, url_part=None, since=None):
+        return [
+            request
+            for request in self.requests.values()
+            if (url_part is None or url_part in request["url"])
+            and (since is None or request["sequence"] >= since)
+        ]
+
+    def in_flight(self, url_part=None, since=None):
+        """
+        in_flight: requests not finished yet
+
+        Args:
+            url_part (str, optional): only the requests whose url contains
+        this text. Defaults to None (all the requests).
+            since (int, optional): only the requests sent after a marker,
+        from mark. Defaults to None.
+
+        Returns:
+            dict[]: requests in flight
+        """
+        self.log.drain()
+        return [
+            request for request in self._matching(url_part, since) if request["end"] is None
+        ]
+
+    def drained(self, url_part=None, quiet_period=None, since=None):
+        """
+        drained: wait condition, true when there is no request in flight and
+            no activity of the requests during the quiet period (counted from
+            the creation of the condition when there is no request)
+
+        Args:
+            url_part (str, optional): only the requests whose url contains
+        this text. Defaults to None (all the requests).
+            quiet_period (float, optional): time in seconds without network
+        activity. Defaults to NETWORK_QUIET_PERIOD.
+            since (int, optional): only the requests sent after a marker,
+        from mark. Defaults to None.
+
+        Returns:
+            callable: predicate
+        """
+        if quiet_period is None:
+            quiet_period = NETWORK_QUIET_PERIOD
+        created = monotonic()
+
+        def _predicate(_):
+            if self.in_flight(url_part, since):
+                return False
+            last_activity = max(
+                (request["activity"] for request in self._matching(url_part, since)),
+                default=created,
+            )
+            return monotonic() - last_activity >= quiet_period
+
+        return _predicate
+
+    def stats(self, url_part=None, since=None):
+        """
+        stats: number of requests, bytes and duration of the requests
+
+        Args:
+            url_part (str, optional): only the requests whose url contains
+        this text, as the url of a layer. Defaults to None.
+            since (int, optional): only the requests sent after a marker,
+        from mark. Defaults to None (since the last reset).
+
+        Returns:
+            dict: requests, failed, bytes and duration (seconds from the first
+        request to the last response)
+        """
+        self.log.drain()
+        requests = self._matching(url_part, since)
+        finished = [request["end"] for request in requests if request["end"] is not None]
+        duration = 0.0
+        if requests and finished:
+            duration = max(finished) - min(request["start"] for request in requests)
+        return {
+            "requests": len(requests),
+            "failed": sum(request["failed"] for request in requests),
+            "bytes": sum(request["bytes"] for request in requests),
+            "duration": duration,
+        }
+
+
+def network_tracker(driver):
+    """
+    network_tracker: the NetworkTracker of a driver, created on first use
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+
+    Returns:
+        NetworkTracker: the tracker
+    """
+    tracker = getattr(driver, "_frontend_test_network_tracker", None)
+    if tracker is None:
+        tracker = NetworkTracker(driver)
+        driver._frontend_test_network_tracker = tracker
+    return tracker
+
+
+def network_mark(driver):
+    """
+    network_mark: marker of the requests sent from now by the page, taken
+        before an action as toggling a layer
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+
+    Returns:
+        int: the marker, for the since argument of wait_layer_loaded
+    """
+    return network_tracker(driver).mark()
+
+
+def tiles_loaded(find_layer):
+    """
+    tiles_loaded: wait condition, true when the layer is on the map and all
+        of its visible tiles are settled: loaded, or failed (a layer can have
+        holes, as the tiles outside of a COG or missing in a mbtiles file)
+
+    Args:
+        find_layer (callable): function that receives the driver and returns
+    the layer record or None, as get_layers
+
+    Returns:
+        callable: predicate that returns the layer record (see inspect_layers)
+    """
+
+    def _predicate(driver):
+        layer = find_layer(driver)
+        if not layer or layer["tiles_count"] == 0:
+            return False
+        settled = layer["tiles_loaded"] + layer.get("tiles_failed", 0)
+        return layer if settled >= layer["tiles_count"] else False
+
+    return _predicate
+
+
+@timed
+def wait_layer_loaded(driver, url_part="haig", timeout=None, find_layer=None, since=None):
+    """
+    wait_layer_loaded: wait until every visible tile of a layer is loaded and,
+        with Chrome, until the requests of the layer are drained
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+        url_part (str, optional): url part of the requests of the layer.
+    Defaults to "haig".
+        timeout (float, optional): maximum time. Defaults to WAIT_TIMEOUT.
+        find_layer (callable, optional): function that returns the layer
+    record. Defaults to None, that uses get_layers with url_part.
+        since (int, optional): marker taken before the layer was toggled
+    (see network_mark), so the stats only count the requests of this toggle.
+    Defaults to None, all the requests since the tracker was reset.
+
+    Returns:
+        dict: the layer record, with the network stats of the layer under the
+    key "network" (None if the browser does not give the Network events)
+    """
+    if find_layer is None:
+        def find_layer(page):
+            return get_layers(page, url_part=url_part)
+
+    tracker = network_tracker(driver)
+    message = f"the layer of {url_part} is not loaded"
+    layer = wait_until(driver, tiles_loaded(find_layer), timeout=timeout, message=message)
+    stats = None
+    if tracker.supported:
+        wait_until(driver, tracker.drained(url_part, since=since), timeout=timeout)
+        stats = tracker.stats(url_part, since)
+        # the layer can be redrawn while its requests are drained
+        layer = wait_until(driver, tiles_loaded(find_layer), timeout=timeout, message=message)
+    layer["network"] = stats
+    return layer
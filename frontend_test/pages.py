@@ -0,0 +1,299 @@
+"""
+pages.py: page objects of the Frontend Haig Fras. The element handles are
+found once and cached; they are only found again when selenium raises a
+StaleElementReferenceException because the frontend re-rendered them.
+"""
+from selenium.common.exceptions import StaleElementReferenceException
+from selenium.webdriver.common.action_chains import ActionChains
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.select import Select
+from frontend_test.wait import element_count, wait_until
+
+
+class CachedElement:
+    """
+    CachedElement: handle of a element that finds the element again when it
+        becomes stale. The methods and properties of the WebElement can be
+        used directly; use .element when the WebElement itself is needed,
+        for example as argument of execute_script.
+    """
+
+    def __init__(self, parent, locator, idx=None, element=None):
+        """
+        Args:
+            parent (webdriver.Chrome|CachedElement): where the element is
+        searched
+            locator (tuple): selenium locator, as (By.ID, "general-types")
+            idx (int, optional): index of the element when the locator finds
+        several elements. Defaults to None (first element).
+            element (WebElement, optional): the element, when it was already
+        found. Defaults to None (found on first use).
+        """
+        self._parent = parent
+        self._locator = locator
+        self._idx = idx
+        self._element = element
+
+    @property
+    def element(self):
+        """
+        element: the WebElement, found if it is not cached yet
+        """
+        if self._element is None:
+            self._element = self._find()
+        return self._element
+
+    def _find(self):
+        parent = self._parent
+        if isinstance(parent, CachedElement):
+            parent = parent.element
+        if self._idx is None:
+            return parent.find_element(*self._locator)
+        return parent.find_elements(*self._locator)[self._idx]
+
+    def refresh(self):
+        """
+        refresh: forget the cached WebElement (and the cached parents)
+        """
+        self._element = None
+        if isinstance(self._parent, CachedElement):
+            self._parent.refresh()
+
+    def _retry(self, action):
+        try:
+            return action(self.element)
+        except StaleElementReferenceException:
+            self.refresh()
+            return action(self.element)
+
+    def __getattr__(self, name):
+        value = self._retry(lambda element: getattr(element, name))
+        if not callable(value):
+            return value
+
+        def _method(*args, **kwargs):
+            return self._retry(lambda element: getattr(element, name)(*args, **kwargs))
+
+        return _method
+
+
+class CachedElementList:
+    """
+    CachedElementList: cached list of the elements found by a locator. Each
+        item is a CachedElement that is found again by its index.
+    """
+
+    def __init__(self, parent, locator):
+        self._parent = parent
+        self._locator = locator
+        self._items = None
+
+    def _find(self):
+        parent = self._parent
+        if isinstance(parent, CachedElement):
+            parent = parent.element
+        # the items are seeded with the elements found, so the list costs a
+        # single roundtrip; they are only found by index when they are stale
+        return [
+            CachedElement(self._parent, self._locator, idx, element)
+            for idx, element in enumerate(parent.find_elements(*self._locator))
+        ]
+
+    @property
+    def items(self):
+        """
+        items: the list of CachedElement
+        """
+        if self._items is None:
+            self._items = self._find()
+        return self._items
+
+    def refresh(self):
+        """
+        refresh: find the elements again, as after a new section is opened
+        """
+        self._items = None
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(list(self.items))
+
+    def __getitem__(self, idx):
+        return self.items[idx]
+
+
+class Sidebar:
+    """
+    Sidebar: the sections of the side bar and their groups of options
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self._sections = {}
+        self.general_types = CachedElementList(driver, (By.ID, "general-types"))
+        self.type_options = CachedElementList(driver, (By.ID, "type-option"))
+        self.expand_buttons = CachedElementList(
+            driver, (By.XPATH, "//span[@title='expand']")
+        )
+
+    def section_button(self, section_name):
+        """
+        section_button: button of a section, as "Biodiversity"
+        """
+        if section_name not in self._sections:
+            self._sections[section_name] = CachedElement(
+                self.driver, (By.ID, section_name)
+            )
+        return self._sections[section_name]
+
+    def _refresh(self):
+        self.general_types.refresh()
+        self.type_options.refresh()
+        self.expand_buttons.refresh()
+
+    def open_section(self, section_name):
+        """
+        open_section: open a section and wait for its title
+        """
+        self.section_button(section_name).click()
+        wait_until(
+            self.driver, element_count((By.TAG_NAME, "h1"), minimum=2), timeout=10
+        )
+        self._refresh()
+
+    def close_section(self, section_name):
+        """
+        close_section: close the opened section
+        """
+        self.section_button(section_name).click()
+        wait_until(
+            self.driver, element_count((By.TAG_NAME, "h1"), maximum=1), timeout=10
+        )
+        self._refresh()
+
+    def section_titles(self):
+        """
+        section_titles: texts of the h1 titles
+        """
+        return [title.text for title in self.driver.find_elements(By.TAG_NAME, "h1")]
+
+    def expand(self, general_type):
+        """
+        expand: click in a group of options and find its options again
+
+        Args:
+            general_type (CachedElement|int): group or index of the
+        expand button
+        """
+        if isinstance(general_type, int):
+            general_type = self.expand_buttons[general_type]
+        general_type.click()
+        self.type_options.refresh()
+
+
+class LeafletMap:
+    """
+    LeafletMap: the container of the leaflet map and its zoom control. The
+        actions on the map are sent again if the container was re-rendered.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.container = CachedElement(driver, (By.CLASS_NAME, "leaflet-container"))
+        self.zoom_out_button = CachedElement(
+            driver, (By.CLASS_NAME, "leaflet-control-zoom-out")
+        )
+
+    def click_offsets(self, offsets):
+        """
+        click_offsets: click on the map in points given as offsets from the
+            centre of the container, in a single action chain
+
+        Args:
+            offsets (list): list of (x, y) offsets in pixels
+        """
+
+        def _click(container):
+            act_driver = ActionChains(self.driver)
+            for x_offset, y_offset in offsets:
+                act_driver.move_to_element(container).move_by_offset(x_offset, y_offset)
+                act_driver.click()
+            act_driver.perform()
+
+        self.container._retry(_click)
+
+    def drag_by(self, x_offset, y_offset):
+        """
+        drag_by: move the map by dragging its container
+        """
+        self.container._retry(
+            lambda container: ActionChains(self.driver)
+            .drag_and_drop_by_offset(container, x_offset, y_offset)
+            .perform()
+        )
+
+    def zoom_out(self):
+        """
+        zoom_out: click in the zoom out button
+        """
+        self.zoom_out_button.click()
+
+
+def leaflet_map(driver):
+    """
+    leaflet_map: the LeafletMap of a driver, created on first use
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+
+    Returns:
+        LeafletMap: the map shared by the flows and helpers of the driver
+    """
+    page = getattr(driver, "_frontend_test_leaflet_map", None)
+    if page is None:
+        page = LeafletMap(driver)
+        driver._frontend_test_leaflet_map = page
+    return page
+
+
+class GraphBox:
+    """
+    GraphBox: the box with the results of a option and its plotly graph
+    """
+
+    def __init__(self, driver, box_id="dynamic-graph"):
+        self.driver = driver
+        self.box = CachedElement(driver, (By.ID, box_id))
+        self._selects = {}
+
+    def select(self, select_id):
+        """
+        select: Select of a select box, as "select_habitat". The Select keeps
+            working after the box is re-rendered.
+        """
+        if select_id not in self._selects:
+            self._selects[select_id] = Select(
+                CachedElement(self.driver, (By.ID, select_id))
+            )
+        return self._selects[select_id]
+
+    def has_select(self, select_id):
+        """
+        has_select: check if a select box is shown
+        """
+        return len(self.driver.find_elements(By.ID, select_id)) > 0
+
+    def title(self):
+        """
+        title: text of the first paragraph of the box
+        """
+        return self.box.find_elements(By.TAG_NAME, "p")[0].text
+
+    def count(self, element_id):
+        """
+        count: number of elements of the box with a id, as "range-value"
+        """
+        return len(self.box.find_elements(By.ID, element_id))
@@ -0,0 +1,333 @@
+"""
+replay.py: record and replay of the network traffic of the browser. The
+browser is pointed to a local proxy:
+    - record: the proxy forwards every request and stores the response
+    - replay: the proxy answers with the stored responses, so the tests run
+    without the object store, the tile servers, WMS and the calculations API
+
+The responses are stored on disk as HAR-like json entries, one file by
+request, and the bodies are content-addressed (sha256), so responses shared
+by several requests are stored only once and several workers can record at
+the same time. HTTPS requests are intercepted with a self-signed certificate,
+accepted by the browser because the driver is started with insecure
+certificates allowed.
+
+It is enabled with the environment variables REPLAY_MODE (record or replay),
+REPLAY_DIR (default "replay") and REPLAY_LATENCY (milliseconds added to each
+replayed response, default 0).
+"""
+import hashlib
+import json
+import os
+import ssl
+import subprocess
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import perf_counter, sleep
+import requests
+
+REPLAY_MODE = os.getenv("REPLAY_MODE", "")
+REPLAY_DIR = os.getenv("REPLAY_DIR", "replay")
+REPLAY_LATENCY = float(os.getenv("REPLAY_LATENCY", "0"))
+
+_HOP_BY_HOP = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "proxy-connection",
+    "te",
+    "trailers",
+    "transfer-encoding",
+    "upgrade",
+}
+
+# headers that are not valid anymore after the body is decoded by requests
+_BODY_HEADERS = {"content-encoding", "content-length"}
+
+_active_proxy = None
+
+
+def active_proxy():
+    """
+    active_proxy: address of the proxy running in this process
+
+    Returns:
+        str|None: address as "http://127.0.0.1:port", None if no proxy runs
+    """
+    return _active_proxy.address if _active_proxy is not None else None
+
+
+def _write_atomic(path, content):
+    """
+    _write_atomic: write a file that is never seen partially written by
+        another process
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as output:
+        output.write(content)
+    os.replace(tmp_path, path)
+
+
+class ResponseStore:
+    """
+    ResponseStore: responses stored on disk, indexed by method, url and body
+        of the request
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.entries_dir = os.path.join(directory, "entries")
+        self.blobs_dir = os.path.join(directory, "blobs")
+        os.makedirs(self.entries_dir, exist_ok=True)
+        os.makedirs(self.blobs_dir, exist_ok=True)
+
+    @staticmethod
+    def key(method, url, body=b""):
+        """
+        key: identifier of a request
+
+        Args:
+            method (str): http method
+            url (str): full url of the request
+            body (bytes, optional): body of the request. Defaults to b"".
+
+        Returns:
+            str: sha256 of the request
+        """
+        digest = hashlib.sha256(f"{method} {url}\n".encode())
+        digest.update(body or b"")
+        return digest.hexdigest()
+
+    def _blob_path(self, sha):
+        return os.path.join(self.blobs_dir, sha[:2], sha)
+
+    def get(self, method, url, body=b""):
+        """
+        get: find the stored response of a request
+
+        Returns:
+            tuple|None: (status, headers, content), None if the request was
+        not recorded
+        """
+        entry_path = os.path.join(self.entries_dir, f"{self.key(method, url, body)}.json")
+        if not os.path.isfile(entry_path):
+            return None
+        with open(entry_path) as entry_file:
+            entry = json.load(entry_file)
+        response = entry["response"]
+        with open(self._blob_path(response["content"]["sha256"]), "rb") as blob:
+            content = blob.read()
+        headers = [(header["name"], header["value"]) for header in response["headers"]]
+        return response["status"], headers, content
+
+    def put(self, method, url, body, status, headers, content, time=0.0):
+        """
+        put: store the response of a request
+
+        Args:
+            method (str): http method
+            url (str): full url of the request
+            body (bytes): body of the request
+            status (int): status code of the response
+            headers (list): list of (name, value) of the response
+            content (bytes): body of the response
+            time (float, optional): time of the request in ms. Defaults to 0.
+        """
+        sha = hashlib.sha256(content).hexdigest()
+        blob_path = self._blob_path(sha)
+        if not os.path.isfile(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            _write_atomic(blob_path, content)
+        entry = {
+            "request": {"method": method, "url": url, "bodySize": len(body or b"")},
+            "response": {
+                "status": status,
+                "headers": [{"name": name, "value": value} for name, value in headers],
+                "content": {"size": len(content), "sha256": sha},
+            },
+            "time": time,
+        }
+        entry_path = os.path.join(self.entries_dir, f"{self.key(method, url, body)}.json")
+        _write_atomic(entry_path, json.dumps(entry, indent=1).encode())
+
+
+def make_certificate(directory):
+    """
+    make_certificate: create the self-signed certificate used to intercept
+        the HTTPS requests, with the openssl command. The key and the
+        certificate are written in a single file, replaced atomically, so the
+        pytest-xdist workers starting at the same time never read the key of
+        one worker with the certificate of another.
+
+    Args:
+        directory (str): directory of the certificate
+
+    Returns:
+        str: path of the file with the certificate and its key
+    """
+    pem_path = os.path.join(directory, "proxy.pem")
+    if os.path.isfile(pem_path):
+        return pem_path
+    tmp_prefix = f"{pem_path}.{os.getpid()}.{threading.get_ident()}"
+    key_path, cert_path = f"{tmp_prefix}.key", f"{tmp_prefix}.crt"
+    try:
+        subprocess.run(
+            [
+                "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+                "-keyout", key_path, "-out", cert_path, "-days", "3650",
+                "-subj", "/CN=frontend-test-replay",
+            ],
+            check=True,
+            capture_output=True,
+        )
+        with open(key_path, "rb") as key_file, open(cert_path, "rb") as cert_file:
+            _write_atomic(pem_path, key_file.read() + cert_file.read())
+    finally:
+        for path in (key_path, cert_path):
+            if os.path.isfile(path):
+                os.remove(path)
+    return pem_path
+
+
+class _ProxyHandler(BaseHTTPRequestHandler):
+    """
+    _ProxyHandler: handle the requests sent by the browser to the proxy
+    """
+
+    protocol_version = "HTTP/1.1"
+    tunnel_host = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_CONNECT(self):
+        host, _, port = self.path.partition(":")
+        self.send_response(200, "Connection Established")
+        self.end_headers()
+        try:
+            self.connection = self.server.ssl_context.wrap_socket(
+                self.connection, server_side=True
+            )
+        except (ssl.SSLError, OSError):
+            self.close_connection = True
+            return
+        self.rfile = self.connection.makefile("rb", self.rbufsize)
+        self.wfile = self.connection.makefile("wb")
+        self.tunnel_host = host if port in ("", "443") else self.path
+        self.close_connection = False
+
+    def _url(self):
+        if self.tunnel_host is None:
+            return self.path
+        return f"https://{self.tunnel_host}{self.path}"
+
+    def _proxy(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        url = self._url()
+        store = self.server.store
+        if self.server.mode == "replay":
+            stored = store.get(self.command, url, body)
+            if stored is None:
+                self._respond(502, [("X-Replay-Miss", "1")], b"")
+                return
+            if self.server.latency:
+                sleep(self.server.latency / 1000)
+            self._respond(*stored)
+            return
+
+        headers = {
+            name: value
+            for name, value in self.headers.items()
+            if name.lower() not in _HOP_BY_HOP and name.lower() != "host"
+        }
+        start = perf_counter()
+        try:
+            response = self.server.session.request(
+                self.command,
+                url,
+                headers=headers,
+                data=body or None,
+                allow_redirects=False,
+                timeout=60,
+            )
+        except requests.RequestException:
+            self._respond(502, [], b"")
+            return
+        time = (perf_counter() - start) * 1000
+        response_headers = [
+            (name, value)
+            for name, value in response.headers.items()
+            if name.lower() not in _HOP_BY_HOP | _BODY_HEADERS
+        ]
+        store.put(
+            self.command, url, body, response.status_code, response_headers,
+            response.content, time,
+        )
+        self._respond(response.status_code, response_headers, response.content)
+
+    def _respond(self, status, headers, content):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        if self.command != "HEAD" and status not in (204, 304):
+            self.wfile.write(content)
+
+    do_GET = _proxy
+    do_POST = _proxy
+    do_PUT = _proxy
+    do_HEAD = _proxy
+    do_DELETE = _proxy
+    do_OPTIONS = _proxy
+    do_PATCH = _proxy
+
+
+class ReplayProxy:
+    """
+    ReplayProxy: local proxy that records or replays the responses
+    """
+
+    def __init__(self, mode=None, directory=None, latency=None, port=0):
+        self.mode = mode or REPLAY_MODE
+        if self.mode not in ("record", "replay"):
+            raise ValueError(f"REPLAY_MODE should be record or replay, not {self.mode}")
+        directory = directory or REPLAY_DIR
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), _ProxyHandler)
+        self.server.daemon_threads = True
+        self.server.mode = self.mode
+        self.server.store = ResponseStore(directory)
+        self.server.latency = REPLAY_LATENCY if latency is None else latency
+        self.server.session = requests.Session()
+        self.server.ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self.server.ssl_context.load_cert_chain(make_certificate(directory))
+        self._thread = None
+
+    @property
+    def address(self):
+        """
+        address: address of the proxy, as "http://127.0.0.1:port"
+        """
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """
+        start: serve the requests in a background thread
+        """
+        global _active_proxy
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        _active_proxy = self
+
+    def stop(self):
+        """
+        stop: stop the proxy
+        """
+        global _active_proxy
+        self.server.shutdown()
+        self.server.server_close()
+        if _active_proxy is self:
+            _active_proxy = None
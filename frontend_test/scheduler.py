@@ -0,0 +1,225 @@
+"""
+scheduler.py: duration aware distribution of the tests. The durations of the
+tests (one entry by node id, so each parametrised case has its own) are kept
+in a json file, updated after every run. The tests are split into shards with
+the longest-processing-time-first rule: the longest test goes to the shard
+with the smallest load, until every test is assigned.
+
+The shards are selected with the pytest options --shard-count and
+--shard-index (see tests/conftest.py), or with the variables SHARD_COUNT and
+SHARD_INDEX, or CI_NODE_TOTAL and CI_NODE_INDEX of the gitlab parallel jobs.
+
+Usage:
+    python -m frontend_test.scheduler --shards 4 --output shard_plan.json
+"""
+import argparse
+import heapq
+import json
+import os
+import subprocess
+import sys
+from statistics import median
+
+DURATIONS_FILE = os.getenv("DURATIONS_FILE", "durations.json")
+# weight of the last run in the stored duration of a test
+DURATIONS_SMOOTHING = float(os.getenv("DURATIONS_SMOOTHING", "0.5"))
+# duration of a test when no test has a stored duration
+DEFAULT_DURATION = 1.0
+
+
+def _env_int(*names):
+    """
+    _env_int: value of the first environment variable that is set
+    """
+    for name in names:
+        value = os.getenv(name, "")
+        if value:
+            return int(value)
+    return None
+
+
+def shard_count():
+    """
+    shard_count: number of shards, from SHARD_COUNT or CI_NODE_TOTAL
+
+    Returns:
+        int: number of shards, 1 if the variables are not set
+    """
+    value = _env_int("SHARD_COUNT", "CI_NODE_TOTAL")
+    return 1 if value is None else value
+
+
+def shard_index():
+    """
+    shard_index: index of this shard, from SHARD_INDEX (starting at 0) or
+        CI_NODE_INDEX (starting at 1)
+
+    Returns:
+        int: index of the shard, starting at 0
+    """
+    value = _env_int("SHARD_INDEX")
+    if value is not None:
+        return value
+    value = _env_int("CI_NODE_INDEX")
+    return 0 if value is None else value - 1
+
+
+class DurationStore:
+    """
+    DurationStore: durations of the tests in past runs, saved as json
+    """
+
+    def __init__(self, path=None):
+        self.path = path or DURATIONS_FILE
+        self.tests = {}
+        if os.path.isfile(self.path):
+            with open(self.path, encoding="utf-8") as durations_file:
+                self.tests = json.load(durations_file).get("tests", {})
+
+    def update(self, nodeid, duration):
+        """
+        update: add the duration of a run of a test. The stored duration is
+            a exponential moving average of the runs.
+
+        Args:
+            nodeid (str): pytest node id of the test
+            duration (float): duration in seconds
+        """
+        entry = self.tests.get(nodeid)
+        if entry is None:
+            self.tests[nodeid] = {"duration": duration, "runs": 1}
+            return
+        entry["duration"] = (
+            DURATIONS_SMOOTHING * duration
+            + (1 - DURATIONS_SMOOTHING) * entry["duration"]
+        )
+        entry["runs"] += 1
+
+    def estimate(self, nodeid):
+        """
+        estimate: expected duration of a test. The tests without stored
+            duration get the median of the known durations.
+
+        Returns:
+            float: duration in seconds
+        """
+        if nodeid in self.tests:
+            return self.tests[nodeid]["duration"]
+        if not self.tests:
+            return DEFAULT_DURATION
+        return median(entry["duration"] for entry in self.tests.values())
+
+    def save(self):
+        """
+        save: write the durations in the json file
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as durations_file:
+            json.dump({"tests": self.tests}, durations_file, indent=2, sort_keys=True)
+
+
+def lpt_schedule(durations, bins):
+    """
+    lpt_schedule: split the tests into bins with the
+        longest-processing-time-first rule. Ties are broken by the name of the
+        test, so every runner computes the same plan.
+
+    Args:
+        durations (dict): duration of each test, by node id
+        bins (int): number of bins
+
+    Returns:
+        tuple: list of the tests of each bin and list of the load of each bin
+    """
+    heap = [(0.0, idx) for idx in range(bins)]
+    shards = [[] for _ in range(bins)]
+    loads = [0.0] * bins
+    for nodeid, duration in sorted(durations.items(), key=lambda item: (-item[1], item[0])):
+        load, idx = heapq.heappop(heap)
+        shards[idx].append(nodeid)
+        loads[idx] = load + duration
+        heapq.heappush(heap, (loads[idx], idx))
+    return shards, loads
+
+
+def shard_plan(nodeids, store, shards):
+    """
+    shard_plan: assign the tests to the shards
+
+    Args:
+        nodeids (str[]): node ids of the tests
+        store (DurationStore): durations of the past runs
+        shards (int): number of shards
+
+    Returns:
+        dict: shards (list of dicts with index, tests and duration), makespan
+    (duration of the longest shard) and lower_bound (the best possible
+    makespan)
+    """
+    durations = {nodeid: store.estimate(nodeid) for nodeid in nodeids}
+    tests, loads = lpt_schedule(durations, shards)
+    total = sum(durations.values())
+    return {
+        "shards": [
+            {"index": idx, "tests": tests[idx], "duration": loads[idx]}
+            for idx in range(shards)
+        ],
+        "makespan": max(loads) if loads else 0.0,
+        "lower_bound": max([total / shards] + list(durations.values())),
+    }
+
+
+def collect_nodeids(paths):
+    """
+    collect_nodeids: node ids of the tests found by pytest, without sharding
+        and without the incremental selection (the inputs are not
+        fingerprinted)
+
+    Args:
+        paths (str[]): files or directories of the tests
+
+    Returns:
+        str[]: node ids
+    """
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "pytest",
+            "--collect-only",
+            "-q",
+            "--shard-count=1",
+            "--no-incremental",
+        ]
+        + list(paths),
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return [line.strip() for line in output.splitlines() if "::" in line]
+
+
+def main(argv=None):
+    """
+    main: print the shard plan of the tests and save it as json
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("paths", nargs="*", default=["tests/test_with_pytest.py"])
+    parser.add_argument("--shards", type=int, default=shard_count())
+    parser.add_argument("--durations", default=DURATIONS_FILE)
+    parser.add_argument("--output", default="")
+    args = parser.parse_args(argv)
+
+    plan = shard_plan(collect_nodeids(args.paths), DurationStore(args.durations), args.shards)
+    for shard in plan["shards"]:
+        print(f"shard {shard['index']}: {len(shard['tests'])} tests, {shard['duration']:.1f}s")
+    print(f"makespan {plan['makespan']:.1f}s, lower bound {plan['lower_bound']:.1f}s")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as plan_file:
+            json.dump(plan, plan_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""
+selection.py: incremental selection of the tests. The inputs of the tests
+are fingerprinted before the run: the code of the tests and of their helpers,
+the bundle of the frontend (the hashed assets referenced by the served
+index.html), the layer catalogue (layers.json), the data of each layer (the
+responses of its smoke probes: a sample tile, the COG info or the WMS
+capabilities and map), the version of the calculations API and the browser
+configuration. After a run, the fingerprints of the inputs of each passed
+test are saved in INCREMENTAL_FILE, and with INCREMENTAL=1 the tests whose
+inputs did not change since their last pass are deselected.
+
+The tests of Test_Layers depend on the code, the frontend, the browser and
+their layer; the other tests depend on every input. An input that can not be
+read has no fingerprint, and the tests that depend on it are always run: the
+calculations API has no fingerprint unless INCREMENTAL_API_VERSION_URL gives
+an endpoint that changes with its deployments, as its OpenAPI schema does not
+change with the calculations.
+
+Usage:
+    python -m frontend_test.selection
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from dotenv import load_dotenv
+from frontend_test.assets import MAX_WORKERS, get_session
+from frontend_test.catalogue import layer_cases, load_catalogue
+from frontend_test.smoke import backend_urls, layer_probes
+
+INCREMENTAL = os.getenv("INCREMENTAL", "") not in ("", "0")
+INCREMENTAL_FILE = os.getenv("INCREMENTAL_FILE", "passed.json")
+INCREMENTAL_TIMEOUT = float(os.getenv("INCREMENTAL_TIMEOUT", "10"))
+# endpoint of the calculations API that changes with each deployment
+INCREMENTAL_API_VERSION_URL = os.getenv("INCREMENTAL_API_VERSION_URL", "")
+# inputs of the tests that are not in the layer catalogue
+GLOBAL_INPUTS = ("code", "frontend", "layers", "api", "browser")
+LAYER_PREFIX = "layer:"
+# sources of the tests and of their helpers, relative to the repository
+CODE_PATTERNS = (
+    re.compile(r"^(frontend_test|tests)/[^/]+\.py$"),
+    re.compile(r"^requirements\.txt$"),
+)
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_ASSET_RE = re.compile(r"""<(?:script|link)\b[^>]*\b(?:src|href)=["']([^"']+)["']""")
+
+
+def fingerprint(content):
+    """
+    fingerprint: short hash of a content
+
+    Args:
+        content (str|bytes|dict|list): content; the dicts and lists are
+    hashed as canonical json
+
+    Returns:
+        str: hexadecimal hash
+    """
+    if isinstance(content, (dict, list)):
+        content = json.dumps(content, sort_keys=True)
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return hashlib.sha256(content).hexdigest()[:16]
+
+
+def bundle_fingerprint(html):
+    """
+    bundle_fingerprint: fingerprint of the frontend build. The names of the
+        scripts and stylesheets built by vite contain the hash of their
+        content, so they identify the bundle.
+
+    Args:
+        html (str): the index.html served by the frontend
+
+    Returns:
+        str: fingerprint of the assets, or of the whole page if it has none
+    """
+    assets = sorted(set(_ASSET_RE.findall(html)))
+    return fingerprint("\n".join(assets) if assets else html)
+
+
+def code_fingerprint(root=None):
+    """
+    code_fingerprint: fingerprint of the sources of the tests and of their
+        helpers (tests/*.py, frontend_test/*.py and requirements.txt), so a
+        change of a test is never deselected
+
+    Args:
+        root (str, optional): directory of the repository. Defaults to the
+    parent of the frontend_test package.
+
+    Returns:
+        str: fingerprint of the paths and contents of the sources
+    """
+    root = root or ROOT_DIR
+    sources = []
+    for directory in ("", "frontend_test", "tests"):
+        if not os.path.isdir(os.path.join(root, directory)):
+            continue
+        for name in os.listdir(os.path.join(root, directory)):
+            path = f"{directory}/{name}" if directory else name
+            if any(pattern.match(path) for pattern in CODE_PATTERNS):
+                with open(os.path.join(root, path), "rb") as source:
+                    sources.append([path, fingerprint(source.read())])
+    return fingerprint(sorted(sources))
+
+
+def _url_fingerprint(url, timeout):
+    """
+    _url_fingerprint: fingerprint of the content of a url, None if it can
+        not be read
+    """
+    if not url:
+        return None
+    try:
+        response = get_session().get(url, timeout=timeout)
+        response.raise_for_status()
+    except requests.RequestException:
+        return None
+    return fingerprint(response.content)
+
+
+def input_fingerprints(frontend_url=None, urls=None, catalogue=None, timeout=None):
+    """
+    input_fingerprints: fingerprints of the inputs of the tests
+
+    Args:
+        frontend_url (str, optional): url of the frontend. Defaults to
+    FRONTEND_URL_LOCAL.
+        urls (dict, optional): urls of the backends. Defaults to
+    smoke.backend_urls().
+        catalogue (dict, optional): layers.json. Defaults to load_catalogue().
+        timeout (float, optional): timeout of each request. Defaults to
+    INCREMENTAL_TIMEOUT.
+
+    Returns:
+        dict: {input: fingerprint or None}, with one "layer:<id>" input by
+    layer of the catalogue
+    """
+    timeout = INCREMENTAL_TIMEOUT if timeout is None else timeout
+    if frontend_url is None:
+        load_dotenv()
+        frontend_url = os.getenv("FRONTEND_URL_LOCAL", "")
+    urls = urls or backend_urls()
+    catalogue = load_catalogue() if catalogue is None else catalogue
+
+    fingerprints = {"code": code_fingerprint(), "frontend": None}
+    if frontend_url:
+        try:
+            response = get_session().get(frontend_url, timeout=timeout)
+            response.raise_for_status()
+            fingerprints["frontend"] = bundle_fingerprint(response.text)
+        except requests.RequestException:
+            pass
+    fingerprints["layers"] = fingerprint(catalogue) if catalogue else None
+    fingerprints["api"] = _url_fingerprint(INCREMENTAL_API_VERSION_URL, timeout)
+    fingerprints["browser"] = fingerprint(
+        [
+            os.getenv("SELENIUM_BROWSER", "chrome"),
+            os.getenv("SELENIUM_MODE", ""),
+            os.getenv("SELENIUM_WINDOW_SIZE", ""),
+        ]
+    )
+    # the data of a layer is fingerprinted with the responses of its probes,
+    # so new tiles or a new tile server are seen even with the same schema
+    cases = layer_cases(catalogue)
+    probes = {
+        case["id"]: [
+            probe["url"]
+            for probe in layer_probes(
+                case["id"],
+                {"dataType": case["data_type"], "url": case["url"], "params": case["params"]},
+                urls,
+            )
+        ]
+        for case in cases
+    }
+    probe_urls = list(
+        dict.fromkeys(url for layer_urls in probes.values() for url in layer_urls)
+    )
+    contents = {}
+    if probe_urls:
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(probe_urls))) as pool:
+            contents = dict(
+                zip(
+                    probe_urls,
+                    pool.map(lambda url: _url_fingerprint(url, timeout), probe_urls),
+                )
+            )
+    for case in cases:
+        data = [contents[url] for url in probes[case["id"]]]
+        value = None
+        if all(data):
+            value = fingerprint([case, data])
+        fingerprints[f"{LAYER_PREFIX}{case['id']}"] = value
+    return fingerprints
+
+
+def inputs_of(nodeid, fingerprints):
+    """
+    inputs_of: fingerprints of the inputs of a test
+
+    Args:
+        nodeid (str): pytest node id of the test
+        fingerprints (dict): fingerprints of all the inputs, from
+    input_fingerprints
+
+    Returns:
+        dict: {input: fingerprint or None}
+    """
+    match = re.search(r"\[(.*)\]$", nodeid)
+    layer = f"{LAYER_PREFIX}{match.group(1)}" if match else None
+    if layer in fingerprints:
+        names = ("code", "frontend", "browser", layer)
+    else:
+        layers = sorted(name for name in fingerprints if name.startswith(LAYER_PREFIX))
+        names = GLOBAL_INPUTS + tuple(layers)
+    return {name: fingerprints.get(name) for name in names}
+
+
+class PassStore:
+    """
+    PassStore: fingerprints of the inputs of the tests at their last pass,
+        saved as json
+    """
+
+    def __init__(self, path=None):
+        self.path = path or INCREMENTAL_FILE
+        self.tests = {}
+        if os.path.isfile(self.path):
+            with open(self.path, encoding="utf-8") as passed_file:
+                self.tests = json.load(passed_file).get("tests", {})
+
+    def unchanged(self, nodeid, inputs):
+        """
+        unchanged: if the test passed with the same inputs
+
+        Args:
+            nodeid (str): pytest node id of the test
+            inputs (dict): fingerprints of the inputs, from inputs_of
+
+        Returns:
+            bool: False if an input has no fingerprint
+        """
+        if any(value is None for value in inputs.values()):
+            return False
+        return self.tests.get(nodeid) == inputs
+
+    def record(self, nodeid, inputs):
+        """
+        record: save the inputs of a passed test
+        """
+        if any(value is None for value in inputs.values()):
+            self.tests.pop(nodeid, None)
+        else:
+            self.tests[nodeid] = inputs
+
+    def forget(self, nodeid):
+        """
+        forget: remove a test that failed, so it is run the next time
+        """
+        self.tests.pop(nodeid, None)
+
+    def save(self):
+        """
+        save: write the inputs in the json file
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as passed_file:
+            json.dump({"tests": self.tests}, passed_file, indent=2, sort_keys=True)
+
+
+def main(argv=None):
+    """
+    main: command line interface, print the fingerprints of the inputs and
+        the tests that would be run
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--file", default=INCREMENTAL_FILE)
+    args = parser.parse_args(argv)
+
+    fingerprints = input_fingerprints()
+    store = PassStore(args.file)
+    for name, value in fingerprints.items():
+        print(f"{name:>40}: {value or 'unavailable'}")
+    unchanged = [
+        nodeid
+        for nodeid in store.tests
+        if store.unchanged(nodeid, inputs_of(nodeid, fingerprints))
+    ]
+    print(f"{len(unchanged)} of {len(store.tests)} passed tests have unchanged inputs")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
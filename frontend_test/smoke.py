@@ -0,0 +1,258 @@
+"""
+smoke.py: fast checks of the backends, without browser. The layer catalogue
+used by the frontend (VITE_LAYERS_JSON_URL) is loaded and every layer is
+probed concurrently: a sample tile for the COG (through the tile server) and
+mbtiles layers, GetCapabilities and GetMap for the WMS layers, a request of
+the file for the other layers, and the calculations API. The latency of each
+probe is reported.
+
+The requests are sent from a thread pool over the pooled session of
+assets.py, with at most ASSETS_MAX_WORKERS connections at the same time (the
+requests are blocking, so the threads are not wrapped in asyncio tasks).
+A missing VITE_LAYERS_JSON_URL is a failed probe. make test runs the smoke checks first and does not start the browsers if one
+fails (unless SMOKE_TEST=0).
+
+Usage:
+    python -m frontend_test.smoke --output smoke.json
+"""
+import argparse
+import json
+import math
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from urllib.parse import quote
+import requests
+from dotenv import load_dotenv
+from frontend_test.assets import MAX_WORKERS, get_session
+from frontend_test.catalogue import catalogue_layers
+
+SMOKE_TIMEOUT = float(os.getenv("SMOKE_TIMEOUT", "10"))
+# point inside the Haig Fras area, used for the sample tiles and maps
+SAMPLE_POINT = (50.27, -7.9)
+SAMPLE_ZOOM = 10
+
+
+def backend_urls():
+    """
+    backend_urls: urls of the backends, from the environment or from the
+        .env-frontend file written by make_env_files.sh
+
+    Returns:
+        dict: layers_json, api, tile_server and mbtiles urls
+    """
+    load_dotenv(".env-frontend")
+    return {
+        "layers_json": os.getenv("VITE_LAYERS_JSON_URL", ""),
+        "api": os.getenv("VITE_API_URL", "http://localhost:8081/"),
+        "tile_server": os.getenv("VITE_TILE_SERVER_URL", "http://localhost:8083/"),
+        "mbtiles": os.getenv("VITE_MBTILES_URL", "http://localhost:8082/"),
+    }
+
+
+def sample_tile(lat, lng, zoom):
+    """
+    sample_tile: XYZ tile that contains a point
+
+    Returns:
+        tuple: (zoom, x, y)
+    """
+    n = 2**zoom
+    x = int((lng + 180) / 360 * n)
+    lat_rad = math.radians(lat)
+    y = int((1 - math.asinh(math.tan(lat_rad)) / math.pi) / 2 * n)
+    return zoom, x, y
+
+
+def _wms_bbox(lat, lng, size=0.5):
+    return f"{lng - size},{lat - size},{lng + size},{lat + size}"
+
+
+def layer_probes(name, layer, urls):
+    """
+    layer_probes: requests that check a layer
+
+    Args:
+        name (str): name of the layer
+        layer (dict): the layer in the catalogue
+        urls (dict): urls of the backends, from backend_urls
+
+    Returns:
+        list: probes, dicts with name, kind, url and expected ("image",
+    "xml", "json" or None for any successful response)
+    """
+    data_type = str(layer.get("dataType", "")).lower()
+    url = layer["url"]
+    zoom, x, y = sample_tile(*SAMPLE_POINT, SAMPLE_ZOOM)
+    if data_type == "cog":
+        tile_url = (
+            f"{urls['tile_server']}cog/tiles/{zoom}/{x}/{y}.png?url={quote(url, safe='')}"
+        )
+        info_url = f"{urls['tile_server']}cog/info?url={quote(url, safe='')}"
+        return [
+            {"name": name, "kind": "cog info", "url": info_url, "expected": "json"},
+            {"name": name, "kind": "cog tile", "url": tile_url, "expected": "image"},
+        ]
+    if data_type == "wms":
+        separator = "&" if "?" in url else "?"
+        params = layer.get("params", {})
+        get_map = (
+            f"{url}{separator}service=WMS&version=1.1.1&request=GetMap"
+            f"&layers={quote(str(params.get('layers', '')))}&styles="
+            f"&srs=EPSG:4326&bbox={_wms_bbox(*SAMPLE_POINT)}"
+            "&width=256&height=256&format=image/png&transparent=true"
+        )
+        capabilities = f"{url}{separator}service=WMS&request=GetCapabilities"
+        return [
+            {"name": name, "kind": "wms capabilities", "url": capabilities, "expected": "xml"},
+            {"name": name, "kind": "wms map", "url": get_map, "expected": "image"},
+        ]
+    if data_type == "mbtiles" or "{z}" in url:
+        if "{z}" not in url:
+            url = f"{url.rstrip('/')}/{{z}}/{{x}}/{{y}}"
+        tile_url = url.replace("{z}", str(zoom)).replace("{x}", str(x)).replace("{y}", str(y))
+        return [{"name": name, "kind": "tile", "url": tile_url, "expected": None}]
+    return [{"name": name, "kind": data_type or "file", "url": url, "expected": None}]
+
+
+def _fetch(probe, timeout):
+    """
+    _fetch: send the request of a probe and check the answer
+
+    Returns:
+        dict: the probe with status, latency (ms), ok and error
+    """
+    result = dict(probe, status=None)
+    start = perf_counter()
+    try:
+        headers = {} if probe["expected"] else {"Range": "bytes=0-0"}
+        response = get_session().get(probe["url"], timeout=timeout, headers=headers)
+        result["status"] = response.status_code
+        content_type = response.headers.get("Content-Type", "")
+        error = None
+        if response.status_code >= 400:
+            error = f"status {response.status_code}"
+        elif probe["expected"] == "image" and not content_type.startswith("image/"):
+            error = f"not an image ({content_type})"
+        elif probe["expected"] == "xml" and "Capabilities" not in response.text:
+            error = "no capabilities"
+        elif probe["expected"] == "json":
+            result["json"] = response.json()
+        result["error"] = error
+    except requests.RequestException as exception:
+        result["error"] = type(exception).__name__
+    except ValueError:
+        result["error"] = "not json"
+    result["latency"] = (perf_counter() - start) * 1000
+    result["ok"] = result["error"] is None
+    return result
+
+
+def run_probes(probes, timeout=None, max_connections=None):
+    """
+    run_probes: send the requests of the probes concurrently
+
+    Args:
+        probes (dict[]): probes, from layer_probes
+        timeout (float, optional): timeout of each request. Defaults to
+    SMOKE_TIMEOUT.
+        max_connections (int, optional): maximum number of requests at the
+    same time. Defaults to ASSETS_MAX_WORKERS.
+
+    Returns:
+        dict[]: results, in the order of the probes
+    """
+    timeout = SMOKE_TIMEOUT if timeout is None else timeout
+    with ThreadPoolExecutor(max_workers=max_connections or MAX_WORKERS) as executor:
+        return list(executor.map(lambda probe: _fetch(probe, timeout), probes))
+
+
+def run_smoke(urls=None, timeout=None):
+    """
+    run_smoke: load the catalogue and probe every layer and the calculations
+        API
+
+    Args:
+        urls (dict, optional): urls of the backends. Defaults to backend_urls().
+        timeout (float, optional): timeout of each request. Defaults to
+    SMOKE_TIMEOUT.
+
+    Returns:
+        dict[]: results of the probes, the first one being the catalogue
+    (failed, without probing the layers, when VITE_LAYERS_JSON_URL is not set)
+    """
+    urls = urls or backend_urls()
+    catalogue_probe = {
+        "name": "catalogue",
+        "kind": "layers.json",
+        "url": urls["layers_json"],
+        "expected": "json",
+    }
+    probes = [
+        {"name": "calculations API", "kind": "api", "url": urls["api"], "expected": None}
+    ]
+    results = []
+    if urls["layers_json"]:
+        catalogue_result = _fetch(
+            catalogue_probe, SMOKE_TIMEOUT if timeout is None else timeout
+        )
+        for name, layer in catalogue_layers(catalogue_result.pop("json", None)):
+            probes += layer_probes(name, layer, urls)
+        results.append(catalogue_result)
+    else:
+        results.append(
+            dict(
+                catalogue_probe,
+                status=None,
+                error="VITE_LAYERS_JSON_URL is not set",
+                latency=0.0,
+                ok=False,
+            )
+        )
+    results += run_probes(probes, timeout)
+    for result in results:
+        result.pop("json", None)
+    return results
+
+
+def failures(results):
+    """
+    failures: description of the probes that failed
+
+    Returns:
+        str[]: one line by failure
+    """
+    return [
+        f"{result['name']} ({result['kind']}): {result['error']} - {result['url']}"
+        for result in results
+        if not result["ok"]
+    ]
+
+
+def main(argv=None):
+    """
+    main: command line interface of the smoke checks
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--timeout", type=float, default=SMOKE_TIMEOUT)
+    parser.add_argument("--output", default="")
+    args = parser.parse_args(argv)
+
+    results = run_smoke(timeout=args.timeout)
+    for result in sorted(results, key=lambda result: -result["latency"]):
+        status = "ok" if result["ok"] else result["error"]
+        print(
+            f"{result['latency']:8.0f} ms  {result['kind']:>16}  "
+            f"{result['name']}: {status}"
+        )
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+    lines = failures(results)
+    print(f"{len(results)} probes, {len(lines)} failed")
+    return 1 if lines else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
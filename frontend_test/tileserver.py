@@ -0,0 +1,239 @@
+"""
+tileserver.py: lightweight tile server that serves the z/x/y tiles of a local
+.mbtiles (SQLite) file. It replaces the docker tile server when the tests only
+need the mbtiles layer.
+
+The tiles are requested as /{identifier}/{z}/{x}/{y}.{ext} or /{z}/{x}/{y}.{ext}
+(XYZ scheme, as used by leaflet). The hot tiles are kept in a LRU cache and the
+responses have ETag and Cache-Control headers.
+
+It is started by the tests when the environment variable MBTILES_FILE is set,
+on the port MBTILES_PORT (default 8082, the port of VITE_MBTILES_URL).
+
+Usage:
+    python -m frontend_test.tileserver habitats.mbtiles --port 8082
+"""
+import argparse
+import hashlib
+import os
+import queue
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MBTILES_FILE = os.getenv("MBTILES_FILE", "")
+MBTILES_PORT = int(os.getenv("MBTILES_PORT", "8082"))
+MBTILES_CACHE_SIZE = int(os.getenv("MBTILES_CACHE_SIZE", "4096"))
+
+_TILE_PATH = re.compile(r"^/(?:[^/]+/)?(\d+)/(\d+)/(\d+)(?:\.\w+)?/?(?:\?.*)?$")
+
+_TILE_QUERY = (
+    "SELECT tile_data FROM tiles "
+    "WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?"
+)
+
+_CONTENT_TYPES = {
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "webp": "image/webp",
+    "pbf": "application/x-protobuf",
+}
+
+
+class TileCache:
+    """
+    TileCache: LRU cache of tiles, shared by the threads of the server
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._tiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        get: return a cached tile and mark it as recently used
+
+        Returns:
+            tuple|None: (data, etag), None if the tile is not cached
+        """
+        with self._lock:
+            if key not in self._tiles:
+                return None
+            self._tiles.move_to_end(key)
+            return self._tiles[key]
+
+    def put(self, key, value):
+        """
+        put: cache a tile, removing the least recently used tile if needed
+        """
+        with self._lock:
+            self._tiles[key] = value
+            self._tiles.move_to_end(key)
+            while len(self._tiles) > self.size:
+                self._tiles.popitem(last=False)
+
+
+class MBTiles:
+    """
+    MBTiles: read access to a .mbtiles file. The read-only connections are
+        kept in a pool and reused by the requests, so the tile query stays
+        prepared in their statement cache.
+    """
+
+    def __init__(self, path, cache_size=None):
+        if not os.path.isfile(path):
+            raise FileNotFoundError(path)
+        self.path = path
+        self.cache = TileCache(MBTILES_CACHE_SIZE if cache_size is None else cache_size)
+        self._pool = queue.LifoQueue()
+        with self._connection() as connection:
+            self.metadata = dict(connection.execute("SELECT name, value FROM metadata"))
+        self.format = self.metadata.get("format", "png")
+
+    @contextmanager
+    def _connection(self):
+        try:
+            connection = self._pool.get_nowait()
+        except queue.Empty:
+            connection = sqlite3.connect(
+                f"file:{self.path}?mode=ro", uri=True, check_same_thread=False
+            )
+        try:
+            yield connection
+        finally:
+            self._pool.put(connection)
+
+    def tile(self, zoom, column, row):
+        """
+        tile: return a tile in the XYZ scheme
+
+        Args:
+            zoom (int): zoom level
+            column (int): x of the tile
+            row (int): y of the tile, XYZ scheme (the mbtiles use TMS)
+
+        Returns:
+            tuple|None: (data, etag), None if the tile does not exist
+        """
+        key = (zoom, column, row)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        tms_row = (1 << zoom) - 1 - row
+        with self._connection() as connection:
+            result = connection.execute(_TILE_QUERY, (zoom, column, tms_row)).fetchone()
+        if result is None:
+            return None
+        data = bytes(result[0])
+        value = (data, f'"{hashlib.md5(data).hexdigest()}"')
+        self.cache.put(key, value)
+        return value
+
+
+class _TileHandler(BaseHTTPRequestHandler):
+    """
+    _TileHandler: answer the tile requests
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, headers=(), data=b""):
+        self.send_response(status)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    def do_GET(self):
+        match = _TILE_PATH.match(self.path)
+        if match is None:
+            self._send(404)
+            return
+        zoom, column, row = (int(value) for value in match.groups())
+        mbtiles = self.server.mbtiles
+        tile = mbtiles.tile(zoom, column, row)
+        if tile is None:
+            self._send(204)
+            return
+        data, etag = tile
+        headers = [("ETag", etag), ("Cache-Control", "public, max-age=86400")]
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, headers)
+            return
+        headers.append(
+            ("Content-Type", _CONTENT_TYPES.get(mbtiles.format, "application/octet-stream"))
+        )
+        if data[:2] == b"\x1f\x8b":
+            headers.append(("Content-Encoding", "gzip"))
+        self._send(200, headers, data)
+
+    do_HEAD = do_GET
+
+
+class TileServer:
+    """
+    TileServer: http server of a .mbtiles file, running in a background thread
+    """
+
+    def __init__(self, path=None, port=None, host="127.0.0.1", cache_size=None):
+        mbtiles = MBTiles(path or MBTILES_FILE, cache_size)
+        self.server = ThreadingHTTPServer(
+            (host, MBTILES_PORT if port is None else port), _TileHandler
+        )
+        self.server.daemon_threads = True
+        self.server.mbtiles = mbtiles
+        self._thread = None
+
+    @property
+    def url(self):
+        """
+        url: base url of the server, as "http://127.0.0.1:8082/"
+        """
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        """
+        start: serve the tiles in a background thread
+        """
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        stop: stop the server
+        """
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main(argv=None):
+    """
+    main: serve a .mbtiles file until interrupted
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("path", nargs="?", default=MBTILES_FILE)
+    parser.add_argument("--port", type=int, default=MBTILES_PORT)
+    parser.add_argument("--host", default="127.0.0.1")
+    args = parser.parse_args(argv)
+    server = TileServer(args.path, port=args.port, host=args.host)
+    print(f"serving {args.path} on {server.url}")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        server.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
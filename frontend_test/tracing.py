@@ -0,0 +1,199 @@
+"""
+tracing.py: evidence of the failed and slow tests. During each test, the
+last trace events, network events and console messages of the browser are
+kept in bounded ring buffers. They are only written to disk when the test
+fails or takes longer than its time budget: a Chrome trace (trace.json, opened
+with chrome://tracing or the Performance panel of the DevTools), a HAR file
+(network.har) and the console messages (console.json).
+
+The trace and network events come from the performance log of Chrome (see
+network.py). With the other browsers, only the console messages are kept,
+when the driver gives them.
+"""
+import json
+import os
+import re
+from collections import deque
+from datetime import datetime, timezone
+from selenium.common.exceptions import WebDriverException
+from frontend_test.network import performance_log
+
+FAILURE_TRACE = os.getenv("FAILURE_TRACE", "1") not in ("", "0")
+FAILURE_TRACE_DIR = os.getenv("FAILURE_TRACE_DIR", "failures")
+# maximum number of events kept in each buffer
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "20000"))
+# time budget of a test in seconds (0 for no budget); see the time_budget marker
+TEST_TIME_BUDGET = float(os.getenv("TEST_TIME_BUDGET", "0"))
+
+
+def _headers(headers):
+    return [{"name": name, "value": str(value)} for name, value in (headers or {}).items()]
+
+
+def har_from_events(events):
+    """
+    har_from_events: build a HAR log from the Network events of the Chrome
+        DevTools Protocol
+
+    Args:
+        events (list): (method, params) tuples, in the order they were logged
+
+    Returns:
+        dict: HAR 1.2 content
+    """
+    requests = {}
+    order = []
+    for method, params in events:
+        request_id = params.get("requestId")
+        if method == "Network.requestWillBeSent":
+            if request_id not in requests:
+                order.append(request_id)
+            requests[request_id] = {"sent": params}
+        elif request_id in requests:
+            requests[request_id][method.split(".")[-1]] = params
+
+    entries = []
+    for request_id in order:
+        request = requests[request_id]
+        sent = request["sent"]
+        response = request.get("responseReceived", {}).get("response", {})
+        end = request.get("loadingFinished") or request.get("loadingFailed")
+        time = (end["timestamp"] - sent["timestamp"]) * 1000 if end else -1
+        started = datetime.fromtimestamp(sent.get("wallTime", 0), tz=timezone.utc)
+        entry = {
+            "startedDateTime": started.isoformat(),
+            "time": time,
+            "request": {
+                "method": sent["request"].get("method", "GET"),
+                "url": sent["request"]["url"],
+                "httpVersion": response.get("protocol", ""),
+                "headers": _headers(sent["request"].get("headers")),
+                "queryString": [],
+                "cookies": [],
+                "headersSize": -1,
+                "bodySize": -1,
+            },
+            "response": {
+                "status": response.get("status", 0),
+                "statusText": response.get("statusText", ""),
+                "httpVersion": response.get("protocol", ""),
+                "headers": _headers(response.get("headers")),
+                "cookies": [],
+                "content": {"size": -1, "mimeType": response.get("mimeType", "")},
+                "redirectURL": "",
+                "headersSize": -1,
+                "bodySize": request.get("loadingFinished", {}).get("encodedDataLength", -1),
+            },
+            "cache": {},
+            "timings": {"send": 0, "wait": max(time, 0), "receive": 0},
+        }
+        if "loadingFailed" in request:
+            entry["_error"] = request["loadingFailed"].get("errorText", "")
+        entries.append(entry)
+    return {
+        "log": {
+            "version": "1.2",
+            "creator": {"name": "frontend_test", "version": "1.0"},
+            "pages": [],
+            "entries": entries,
+        }
+    }
+
+
+class FlightRecorder:
+    """
+    FlightRecorder: ring buffers with the last events of the browser
+    """
+
+    def __init__(self, driver, size=None):
+        self.driver = driver
+        size = TRACE_BUFFER_SIZE if size is None else size
+        self.trace = deque(maxlen=size)
+        self.network = deque(maxlen=size)
+        self.console = deque(maxlen=size)
+        self.log = performance_log(driver)
+        self.log.subscribe(self._on_event)
+
+    def _on_event(self, method, params):
+        if method == "Tracing.dataCollected":
+            self.trace.append(params)
+        elif method.startswith("Network."):
+            self.network.append((method, params))
+
+    def collect(self):
+        """
+        collect: read the events logged since the last call into the buffers
+        """
+        try:
+            self.log.drain()
+        except WebDriverException:
+            pass
+        try:
+            self.console.extend(self.driver.get_log("browser"))
+        except (AttributeError, WebDriverException):
+            pass
+
+    def clear(self):
+        """
+        clear: empty the buffers, as at the start of a test
+        """
+        self.collect()
+        self.trace.clear()
+        self.network.clear()
+        self.console.clear()
+
+    def flush(self, directory):
+        """
+        flush: write the buffers to a directory
+
+        Args:
+            directory (str): directory of the files
+
+        Returns:
+            str[]: paths of the written files
+        """
+        self.collect()
+        os.makedirs(directory, exist_ok=True)
+        files = {
+            "trace.json": {"traceEvents": list(self.trace)},
+            "network.har": har_from_events(self.network),
+            "console.json": list(self.console),
+        }
+        paths = []
+        for name, content in files.items():
+            path = os.path.join(directory, name)
+            with open(path, "w", encoding="utf-8") as output:
+                json.dump(content, output)
+            paths.append(path)
+        return paths
+
+
+def flight_recorder(driver):
+    """
+    flight_recorder: the FlightRecorder of a driver, created on first use
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+
+    Returns:
+        FlightRecorder: the recorder
+    """
+    recorder = getattr(driver, "_frontend_test_flight_recorder", None)
+    if recorder is None:
+        recorder = FlightRecorder(driver)
+        driver._frontend_test_flight_recorder = recorder
+    return recorder
+
+
+def trace_directory(nodeid):
+    """
+    trace_directory: directory of the files of a test
+
+    Args:
+        nodeid (str): pytest node id of the test
+
+    Returns:
+        str: path inside FAILURE_TRACE_DIR
+    """
+    return os.path.join(FAILURE_TRACE_DIR, re.sub(r"[^\w.-]+", "_", nodeid).strip("_"))
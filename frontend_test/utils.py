@@ -1,9 +1,28 @@
 """
 utils.py: functions that will be used by the other modules
 """
-from time import sleep
+from time import perf_counter
+import numpy as np
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.action_chains import ActionChains
+from frontend_test.geometry import circle_geometry, geometry_changed, moved_by
+from frontend_test.graph import is_monotonic, plot_figure
+from frontend_test.instrumentation import timed
+from frontend_test.leaflet import inspect_layers
+from frontend_test.pages import leaflet_map
+from frontend_test.wait import (
+    dom_settled,
+    element_count,
+    element_detached,
+    wait_until,
+)
+
+CIRCLES_LOCATOR = (By.CSS_SELECTOR, "svg.leaflet-zoom-animated>g path")
+# lowest and highest elevations of the earth, in meters
+ELEVATION_RANGE = (-11000, 9000)
+# the map changes while its tiles load, so the mutations of the map are not
+# waited after a click on a button of the panels
+MAP_SELECTOR = ".leaflet-container"
 
 
 def def_args_prefs(options, args, preferences):
@@ -30,7 +49,31 @@ def def_args_prefs(options, args, preferences):
     return options
 
 
-def click_fontawesome(driver, button_name="circle-xmark", exist=True):
+@timed
+def find_fontawesome(driver, button_name="circle-xmark"):
+    """
+    find_fontawesome: find the fontawesome buttons with a data-icon attribute.
+        The selection is done by the browser, with a single roundtrip.
+
+    Args:
+        driver (webdriver.Chrome):webdriver Chrome that could represent the
+    entire page or a part of the page. If it is a element, only the buttons
+    inside of the element are returned.
+        button_name (str, optional): Button data-icon attribute. Defaults to
+    "circle-xmark".
+
+    Returns:
+        tuple: list of buttons found and the time in seconds spent to find them
+    """
+    start = perf_counter()
+    buttons = driver.find_elements(By.CSS_SELECTOR, f'svg[data-icon="{button_name}"]')
+    return buttons, perf_counter() - start
+
+
+@timed
+def click_fontawesome(
+    driver, button_name="circle-xmark", exist=True, until=None, timeout=None
+):
     """
     click_fontawesome: click action in fontawesome frontend buttons
 
@@ -41,18 +84,35 @@ def click_fontawesome(driver, button_name="circle-xmark", exist=True):
     "circle-xmark".
         exist (bool, optional): If set top true, it will perform a test and it
     will return a error if the button is not present. Defaults to True.
+        until (callable, optional): condition that says when the UI is ready
+    after the click. Defaults to the button being removed from the DOM for the
+    close button and, for the other buttons, to the DOM outside of the map
+    being settled.
+        timeout (float, optional): maximum time waiting for the condition.
+    Defaults to WAIT_TIMEOUT.
+
+    Returns:
+        float: time in seconds spent to find the button
     """
-    buttons = driver.find_elements(By.TAG_NAME, "svg")
-    for button in buttons:
-        if button.get_attribute("data-icon") == button_name:
-            button.click()
-            # it takes a few seconds for a popup to fully disappear
-            sleep(3)
-            return
-    if exist:
-        assert False
+    buttons, resolve_time = find_fontawesome(driver, button_name)
+    if len(buttons) == 0:
+        if exist:
+            assert False, f"button {button_name} not found"
+        return resolve_time
+    button = buttons[0]
+    if until is None:
+        if button_name == "circle-xmark":
+            until = element_detached(button)
+        else:
+            until = dom_settled(ignore=MAP_SELECTOR)
+            # start watching the mutations before the click
+            until(driver)
+    button.click()
+    wait_until(driver, until, timeout=timeout)
+    return resolve_time
 
 
+@timed
 def clear_map(driver):
     """
     clear_map: click action in clear map button
@@ -64,8 +124,11 @@ def clear_map(driver):
     """
     trash = driver.find_element(By.XPATH, '//header[@title="Clean map"]')
     trash.click()
+    wait_until(driver, element_count(CIRCLES_LOCATOR, maximum=0))
+    wait_until(driver, element_count((By.CLASS_NAME, "all-icon"), maximum=0))
 
 
+@timed
 def check_info_section(driver, title, id_name="info-section-button", idx=0):
     """
     check_info_section: click to open and close info section
@@ -83,14 +146,15 @@ def check_info_section(driver, title, id_name="info-section-button", idx=0):
     info_section = driver.find_elements(By.ID, id_name)
     info_section = info_section[idx]
     info_section.click()
-    result = driver.find_element(By.ID, "info-subsection")
-    title_el = result.find_element(By.TAG_NAME, "p")
+    result = wait_until(driver, element_count((By.ID, "info-subsection"), minimum=1))
+    title_el = result[0].find_element(By.TAG_NAME, "p")
     assert title_el.text.lower() == title.lower()
-    click_fontawesome(driver)
+    click_fontawesome(driver, until=element_detached(result[0]))
     result = driver.find_elements(By.ID, "info-subsection")
     assert len(result) == 0
 
 
+@timed
 def verify_map_plot(driver, result, option_selected):
     """
     verify_map_plot: verify if the graphs and circles on the survey design part
@@ -105,15 +169,16 @@ def verify_map_plot(driver, result, option_selected):
     the graph
     """
     plot_container = result.find_element(By.CLASS_NAME, "plotly")
-    lines = plot_container.find_elements(By.CLASS_NAME, "scatter")
-    act_driver = ActionChains(driver)
-    for line in lines:
-        act_driver.move_to_element(line).perform()
-    circles = driver.find_elements(By.CSS_SELECTOR, "svg.leaflet-zoom-animated>g path")
-    assert circles[0].get_attribute("stroke") == "#ffd3c9"
-    assert circles[1].get_attribute("stroke") == "#ff96bc"
-    big_circle = circles[0].get_attribute("d")
-    small_circle = circles[1].get_attribute("d")
+    figure = plot_figure(driver, plot_container)
+    assert len(figure["traces"]) > 0
+    for trace in figure["traces"]:
+        assert len(trace["x"]) > 0
+        assert len(trace["x"]) == len(trace["y"])
+    assert figure["y_title"] == option_selected
+    assert figure["rangeslider"] is not None
+    circles = circle_geometry(driver)
+    assert circles["strokes"][:2] == ["#ffd3c9", "#ff96bc"]
+    big_radius, small_radius = circles["radii"][:2]
 
     rangeslider_min = plot_container.find_element(
         By.CLASS_NAME, "rangeslider-grabber-min"
@@ -122,34 +187,59 @@ def verify_map_plot(driver, result, option_selected):
         By.CLASS_NAME, "rangeslider-grabber-max"
     )
 
-    y_label_title = plot_container.find_element(By.CLASS_NAME, "ytitle")
-
-    assert y_label_title.text == option_selected
+    # the big circle shrinks when the maximum of the range decreases
     act_driver = ActionChains(driver)
     act_driver.click_and_hold(rangeslider_max).move_by_offset(
         -10, -10
     ).release().perform()
-    circles = driver.find_elements(By.CSS_SELECTOR, "svg.leaflet-zoom-animated>g path")
-    assert big_circle != circles[0].get_attribute("d")
+    circles = wait_until(driver, geometry_changed(circles))
+    assert circles["radii"][0] < big_radius
+    # the small circle grows when the minimum of the range increases
     act_driver = ActionChains(driver)
     act_driver.click_and_hold(rangeslider_min).move_by_offset(
         10, 10
     ).release().perform()
-    circles = driver.find_elements(By.CSS_SELECTOR, "svg.leaflet-zoom-animated>g path")
-    new_small_circle = circles[1].get_attribute("d")
-    new_big_circle = circles[0].get_attribute("d")
-    assert small_circle != new_small_circle
-    act_driver = ActionChains(driver)
-    leaflet_map = driver.find_element(By.CLASS_NAME, "leaflet-container")
-    act_driver = ActionChains(driver)
-    act_driver.drag_and_drop_by_offset(leaflet_map, 100, 200).perform()
-    sleep(2)
-    circles = driver.find_elements(By.CSS_SELECTOR, "svg.leaflet-zoom-animated>g path")
+    circles = wait_until(driver, geometry_changed(circles))
+    assert circles["radii"][1] > small_radius
+    # the circles follow the map when it is moved
+    leaflet_map(driver).drag_by(100, 200)
+    new_circles = wait_until(
+        driver, geometry_changed(circles, key="screen_centres")
+    )
+    assert moved_by(circles, new_circles, (100, 200))
 
-    assert new_big_circle != circles[0].get_attribute("d")
-    assert new_small_circle != circles[1].get_attribute("d")
 
+@timed
+def verify_bathymetry_profile(driver, graph):
+    """
+    verify_bathymetry_profile: verify the values of a bathymetry profile: the
+        distance starts at zero and increases along the profile, and the
+        depths are finite and inside the range of the elevations of the earth
 
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that represents the entire
+    page
+        graph (WebElement): the plotly graph of the profile
+
+    Returns:
+        dict: the figure of the graph (see plot_figure)
+    """
+    figure = plot_figure(driver, graph)
+    assert figure["x_title"] == "Distance (km)"
+    assert len(figure["traces"]) > 0
+    distance = figure["traces"][0]["x"]
+    depth = figure["traces"][0]["y"]
+    assert len(distance) > 1
+    assert len(distance) == len(depth)
+    assert abs(distance[0]) < 1e-6
+    assert is_monotonic(distance)
+    assert distance[-1] > 0
+    assert np.all(np.isfinite(depth))
+    assert np.all((depth >= ELEVATION_RANGE[0]) & (depth <= ELEVATION_RANGE[1]))
+    return figure
+
+
+@timed
 def get_layers(driver, url_part="haig"):
     """
     get_layers: verify if a layer exist in the leaflet map
@@ -158,35 +248,43 @@ def get_layers(driver, url_part="haig"):
         driver (webdriver.Chrome): webdriver Chrome that could represent the
     entire page or a part of the page.
         url_part (str, optional): url part that will be used to check which
-    type of layer is the layer that it was found.
+    type of layer is the layer that it was found, in the url of its tiles or
+    in its url template (the vector tiles are drawn on canvases).
 
     Returns:
-        new_layer: return a value that could be None or the selected layer
+        new_layer: return a value that could be None or the record of the
+    selected layer (see inspect_layers)
     """
-    layers = driver.find_elements(By.CLASS_NAME, "leaflet-layer")
     new_layer = None
-    for layer in layers:
-        if len(layer.find_elements(By.TAG_NAME, "img")) > 0:
-            src = layer.find_element(By.TAG_NAME, "img").get_attribute("src")
-            if url_part in src:
-                new_layer = layer
+    for layer in inspect_layers(driver):
+        urls = layer["tiles"][:1] + [layer["url"] or ""]
+        if any(url_part in url for url in urls):
+            new_layer = layer
     return new_layer
 
 
-def get_layers_mbtiles(driver):
+@timed
+def get_layers_mbtiles(driver, url_part=None):
     """
-    get_layers_mbtiles: verify if a mbtiles layer exist in the leaflet map
+    get_layers_mbtiles: verify if a mbtiles layer exist in the leaflet map.
+        The mbtiles layers are vector tiles, drawn on canvases.
 
     Args:
         driver (webdriver.Chrome): webdriver Chrome that could represent the
     entire page or a part of the page.
+        url_part (str, optional): url part of the layer, found in its url
+    template. Defaults to None, any layer drawn on canvases.
 
     Returns:
-        new_layer: return a value that could be None or the selected layer
+        new_layer: return a value that could be None or the record of the
+    selected layer (see inspect_layers)
     """
-    layers = driver.find_elements(By.CLASS_NAME, "leaflet-layer")
     new_layer = None
-    for layer in layers:
-        if layer.get_attribute("style")[-4:-2] == "0.":
+    for layer in inspect_layers(driver):
+        if url_part is not None:
+            urls = layer["tiles"][:1] + [layer["url"] or ""]
+            if any(url_part in url for url in urls):
+                new_layer = layer
+        elif layer["type"] == "canvas":
             new_layer = layer
     return new_layer
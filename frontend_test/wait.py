@@ -0,0 +1,241 @@
+"""
+wait.py: condition based waits that replace the fixed sleeps of the tests.
+Every predicate follows the selenium expected_conditions convention: it is a
+callable that receives the driver and returns a truthy value once the UI is
+ready.
+
+The timeout budget and the poll interval can be configured with the
+environment variables WAIT_TIMEOUT, WAIT_TIMEOUT_SCALE and WAIT_POLL_INTERVAL.
+"""
+import os
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    StaleElementReferenceException,
+)
+from selenium.webdriver.remote.webelement import WebElement
+from selenium.webdriver.support.ui import WebDriverWait
+from frontend_test.instrumentation import step
+
+DEFAULT_TIMEOUT = float(os.getenv("WAIT_TIMEOUT", "30"))
+TIMEOUT_SCALE = float(os.getenv("WAIT_TIMEOUT_SCALE", "1"))
+POLL_INTERVAL = float(os.getenv("WAIT_POLL_INTERVAL", "0.1"))
+
+# time without DOM mutations after which the page is considered settled
+QUIET_PERIOD = float(os.getenv("WAIT_QUIET_PERIOD", "0.3"))
+
+# time of the last DOM mutation, with one observer by ignored selector
+_MUTATION_OBSERVER_JS = """
+var ignore = arguments[0] || "";
+var observers = window.__frontendTestMutations = window.__frontendTestMutations || {};
+if (!observers[ignore]) {
+    var state = observers[ignore] = {last: performance.now()};
+    new MutationObserver(function (records) {
+        for (var i = 0; i < records.length; i++) {
+            var target = records[i].target;
+            var element = target.nodeType === 1 ? target : target.parentElement;
+            if (!ignore || !element || !element.closest(ignore)) {
+                state.last = performance.now();
+                return;
+            }
+        }
+    }).observe(document.documentElement, {
+        childList: true, subtree: true, attributes: true
+    });
+}
+return performance.now() - observers[ignore].last;
+"""
+
+
+def root_driver(driver):
+    """
+    root_driver: return the webdriver that owns a element
+
+    Args:
+        driver (webdriver.Chrome|WebElement): webdriver Chrome that could
+    represent the entire page or a part of the page
+
+    Returns:
+        webdriver.Chrome: the webdriver that represents the entire page
+    """
+    if isinstance(driver, WebElement):
+        return driver.parent
+    return driver
+
+
+def wait_until(driver, condition, timeout=None, poll_interval=None, message=""):
+    """
+    wait_until: poll a condition until it returns a truthy value
+
+    Args:
+        driver (webdriver.Chrome): webdriver Chrome that could represent the
+    entire page or a part of the page
+        condition (callable): predicate that receives the driver
+        timeout (float, optional): maximum time in seconds. Defaults to
+    WAIT_TIMEOUT. It is always multiplied by WAIT_TIMEOUT_SCALE.
+        poll_interval (float, optional): time between two checks. Defaults to
+    WAIT_POLL_INTERVAL.
+        message (str, optional): message of the TimeoutException.
+
+    Returns:
+        the value returned by the condition
+    """
+    if timeout is None:
+        timeout = DEFAULT_TIMEOUT
+    if poll_interval is None:
+        poll_interval = POLL_INTERVAL
+    wait = WebDriverWait(
+        driver,
+        timeout * TIMEOUT_SCALE,
+        poll_frequency=poll_interval,
+        ignored_exceptions=[StaleElementReferenceException, NoSuchElementException],
+    )
+    name = getattr(condition, "__qualname__", type(condition).__name__)
+    with step(name.split(".")[0], "wait"):
+        return wait.until(condition, message)
+
+
+def element_count(locator, minimum=None, maximum=None):
+    """
+    element_count: wait for the number of elements to reach a range
+
+    Args:
+        locator (tuple): selenium locator, for example (By.ID, "layer-edit")
+        minimum (int, optional): minimum number of elements. Defaults to None.
+        maximum (int, optional): maximum number of elements. Defaults to None.
+
+    Returns:
+        callable: predicate that returns the elements (or True when the
+    expected number of elements is 0)
+    """
+
+    def _predicate(driver):
+        elements = driver.find_elements(*locator)
+        if minimum is not None and len(elements) < minimum:
+            return False
+        if maximum is not None and len(elements) > maximum:
+            return False
+        return elements or True
+
+    return _predicate
+
+
+def element_detached(element):
+    """
+    element_detached: wait for a element (for example a popup) to be removed
+        from the DOM
+
+    Args:
+        element (WebElement): element that should disappear
+
+    Returns:
+        callable: predicate
+    """
+
+    def _predicate(_):
+        try:
+            element.is_enabled()
+            return False
+        except StaleElementReferenceException:
+            return True
+
+    return _predicate
+
+
+def text_contains(locator, text, case_sensitive=False):
+    """
+    text_contains: wait for a element to contain a text
+
+    Args:
+        locator (tuple): selenium locator of the element
+        text (str): text that should be found
+        case_sensitive (bool, optional): compare the text respecting the case.
+    Defaults to False.
+
+    Returns:
+        callable: predicate that returns the element
+    """
+
+    def _predicate(driver):
+        element = driver.find_element(*locator)
+        element_text = element.text
+        if case_sensitive:
+            return element if text in element_text else False
+        return element if text.lower() in element_text.lower() else False
+
+    return _predicate
+
+
+def attribute_changed(locator, attribute, old_value, idx=0):
+    """
+    attribute_changed: wait for the attribute of a element to change, as the
+        "d" attribute of a path after the map is moved
+
+    Args:
+        locator (tuple): selenium locator of the elements
+        attribute (str): name of the attribute
+        old_value (str): value before the action
+        idx (int, optional): index of the element in the list of elements
+    found. Defaults to 0.
+
+    Returns:
+        callable: predicate that returns the new value
+    """
+
+    def _predicate(driver):
+        elements = driver.find_elements(*locator)
+        if len(elements) <= idx:
+            return False
+        value = elements[idx].get_attribute(attribute)
+        return value if value != old_value else False
+
+    return _predicate
+
+
+def layer_present(url_part="haig", present=True):
+    """
+    layer_present: wait for a leaflet layer to be added to (or removed from)
+        the map
+
+    Args:
+        url_part (str, optional): url part used to identify the layer.
+    Defaults to "haig".
+        present (bool, optional): if False, wait for the layer to be removed.
+    Defaults to True.
+
+    Returns:
+        callable: predicate
+    """
+    from frontend_test.utils import get_layers
+
+    def _predicate(driver):
+        layer = get_layers(driver, url_part=url_part)
+        if present:
+            return layer or False
+        return layer is None
+
+    return _predicate
+
+
+def dom_settled(quiet_period=None, ignore=None):
+    """
+    dom_settled: wait for the DOM to stop changing. It is used after clicks
+        that do not have a more specific condition.
+
+    Args:
+        quiet_period (float, optional): time in seconds without mutations.
+    Defaults to WAIT_QUIET_PERIOD.
+        ignore (str, optional): css selector of the parts of the page whose
+    mutations are ignored, as the map that changes while its tiles load.
+    Defaults to None, the whole page.
+
+    Returns:
+        callable: predicate
+    """
+    if quiet_period is None:
+        quiet_period = QUIET_PERIOD
+
+    def _predicate(driver):
+        elapsed = root_driver(driver).execute_script(_MUTATION_OBSERVER_JS, ignore)
+        return elapsed >= quiet_period * 1000
+
+    return _predicate
@@ -10,6 +10,7 @@ setup(name='frontend_test',
       description="Project Description",
       packages=find_packages(),
       install_requires=requirements,
+      extras_require={"raster": ["rasterio"]},
       test_suite='tests',
       include_package_data=True,
       zip_safe=False)
@@ -22,9 +22,7 @@ vncserver -geometry 1600x900
 
 export DISPLAY=:1
 
-export SELENIUM_BROWSER=chrome
-make test
-
-export SELENIUM_BROWSER=firefox
-make test
+# chrome and firefox run at the same time, see frontend_test/matrix.py
+export MATRIX=${MATRIX:-chrome,firefox}
+make matrix
 
@@ -0,0 +1,507 @@
+"""
+Fixtures and hooks shared by the tests of the Frontend Haig Fras.
+"""
+import json
+import os
+import sqlite3
+from time import perf_counter
+import pytest
+from selenium.common.exceptions import WebDriverException
+from frontend_test.benchmark import page_metrics
+from frontend_test.catalogue import layer_cases, load_catalogue
+from frontend_test.driver import BrowserSession
+from frontend_test.history import HISTORY, HISTORY_DB, HistoryStore
+from frontend_test.instrumentation import (
+    PROFILE_DIR,
+    enabled,
+    get_recorder,
+    instrument_driver,
+    load_profiles,
+    summary_lines,
+)
+from frontend_test.replay import REPLAY_MODE, ReplayProxy
+from frontend_test.scheduler import (
+    DURATIONS_FILE,
+    DurationStore,
+    shard_count,
+    shard_index,
+    shard_plan,
+)
+from frontend_test.smoke import SAMPLE_POINT, SAMPLE_ZOOM, sample_tile
+from frontend_test.selection import (
+    INCREMENTAL,
+    INCREMENTAL_FILE,
+    PassStore,
+    input_fingerprints,
+    inputs_of,
+)
+from frontend_test.tileserver import MBTILES_FILE, TileServer
+from frontend_test.tracing import (
+    FAILURE_TRACE,
+    TEST_TIME_BUDGET,
+    flight_recorder,
+    trace_directory,
+)
+
+# time of the setup, call and teardown of the tests run in this session
+_TEST_DURATIONS = {}
+_SKIPPED_TESTS = set()
+# outcome of the tests run in this session, for the incremental selection
+_FAILED_TESTS = set()
+_PASSED_TESTS = set()
+# metrics of the page at the end of each test, for the history
+_PAGE_METRICS = {}
+
+
+def _worker_id(config):
+    """
+    _worker_id: id of the pytest-xdist worker, "master" if the tests are not
+        distributed
+    """
+    return getattr(config, "workerinput", {}).get("workerid", "master")
+
+
+def _layer_catalogue(config):
+    """
+    _layer_catalogue: the layer catalogue (layers.json), read once by the
+        main process and given to the pytest-xdist workers
+    """
+    if not hasattr(config, "layer_catalogue"):
+        workerinput = getattr(config, "workerinput", {})
+        if "layer_catalogue" in workerinput:
+            config.layer_catalogue = workerinput["layer_catalogue"]
+        else:
+            config.layer_catalogue = load_catalogue()
+    return config.layer_catalogue
+
+
+def pytest_addoption(parser):
+    """
+    pytest_addoption: options of the duration aware sharding
+    """
+    group = parser.getgroup("shard")
+    group.addoption(
+        "--shard-count",
+        type=int,
+        default=shard_count(),
+        help="number of shards (default SHARD_COUNT or CI_NODE_TOTAL, or 1)",
+    )
+    group.addoption(
+        "--shard-index",
+        type=int,
+        default=shard_index(),
+        help="index of the shard to run, from 0 (default SHARD_INDEX, or CI_NODE_INDEX - 1)",
+    )
+    group.addoption(
+        "--durations-file",
+        default=DURATIONS_FILE,
+        help="json file with the durations of the tests (default DURATIONS_FILE)",
+    )
+    group = parser.getgroup("incremental")
+    group.addoption(
+        "--incremental",
+        action="store_true",
+        default=INCREMENTAL,
+        help="run only the tests whose inputs changed since their last pass (default INCREMENTAL)",
+    )
+    group.addoption(
+        "--no-incremental",
+        action="store_false",
+        dest="incremental",
+        help="run all the tests, even when INCREMENTAL is set",
+    )
+    group.addoption(
+        "--incremental-file",
+        default=INCREMENTAL_FILE,
+        help="json file with the inputs of the passed tests (default INCREMENTAL_FILE)",
+    )
+
+
+def pytest_configure(config):
+    """
+    pytest_configure: check the shard, remove the profiles of the previous run
+        and start the local mbtiles server. The server is started by the main process only,
+        so it is shared by the pytest-xdist workers.
+    """
+    config.addinivalue_line(
+        "markers",
+        "time_budget(seconds): save the failure trace of the test if it takes longer",
+    )
+    count, index = config.getoption("shard_count"), config.getoption("shard_index")
+    if not 0 <= index < max(count, 1):
+        raise pytest.UsageError(
+            f"--shard-index {index} is not in the {count} shards (from 0 to {count - 1})"
+        )
+    config.duration_store = DurationStore(config.getoption("durations_file"))
+    if hasattr(config, "workerinput"):
+        config.input_fingerprints = config.workerinput.get("input_fingerprints")
+        return
+    # the inputs are fingerprinted once, and given to the pytest-xdist workers
+    config.input_fingerprints = None
+    if config.getoption("incremental"):
+        config.input_fingerprints = input_fingerprints(
+            catalogue=_layer_catalogue(config)
+        )
+    if enabled() and os.path.isdir(PROFILE_DIR):
+        for name in os.listdir(PROFILE_DIR):
+            if name.endswith(".json"):
+                os.remove(os.path.join(PROFILE_DIR, name))
+    if MBTILES_FILE:
+        config.mbtiles_server = TileServer()
+        config.mbtiles_server.start()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    """
+    pytest_configure_node: give the layer catalogue and the fingerprints of
+        the inputs to a pytest-xdist worker, so all the workers collect and
+        select the same tests
+    """
+    node.workerinput["layer_catalogue"] = _layer_catalogue(node.config)
+    node.workerinput["input_fingerprints"] = node.config.input_fingerprints
+
+
+def pytest_generate_tests(metafunc):
+    """
+    pytest_generate_tests: one case of the layer tests by tile layer of the
+        catalogue. The tests are skipped if the catalogue can not be read.
+    """
+    if "layer_case" not in metafunc.fixturenames:
+        return
+    cases = layer_cases(_layer_catalogue(metafunc.config))
+    if not cases:
+        cases = [
+            pytest.param(
+                None,
+                marks=pytest.mark.skip(
+                    reason="the layer catalogue (LAYERS_JSON_FILE or "
+                    "VITE_LAYERS_JSON_URL) can not be read or has no tile layer"
+                ),
+            )
+        ]
+        metafunc.parametrize("layer_case", cases, ids=["catalogue"])
+        return
+    metafunc.parametrize("layer_case", cases, ids=[case["id"] for case in cases])
+
+
+def pytest_collection_modifyitems(config, items):
+    """
+    pytest_collection_modifyitems: with --incremental, remove the tests whose
+        inputs did not change since their last pass. Then keep the tests of
+        this shard, assigned with the durations of the past runs, and order
+        them longest first so the pytest-xdist workers finish at the same time.
+        The reports of the tests that use a browser are marked, as they are
+        the only ones whose durations, outcome and metrics are recorded.
+    """
+    for item in items:
+        if "driver_init" in item.fixturenames:
+            item.user_properties.append(("browser_test", True))
+    fingerprints = config.input_fingerprints
+    if fingerprints is not None:
+        passed = PassStore(config.getoption("incremental_file"))
+        unchanged = [
+            item
+            for item in items
+            if passed.unchanged(item.nodeid, inputs_of(item.nodeid, fingerprints))
+        ]
+        if unchanged:
+            config.hook.pytest_deselected(items=unchanged)
+            items[:] = [item for item in items if item not in unchanged]
+    store = config.duration_store
+    count = config.getoption("shard_count")
+    if count > 1:
+        plan = shard_plan([item.nodeid for item in items], store, count)
+        selected = set(plan["shards"][config.getoption("shard_index")]["tests"])
+        deselected = [item for item in items if item.nodeid not in selected]
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+            items[:] = [item for item in items if item.nodeid in selected]
+    if config.getoption("numprocesses", default=None):
+        items.sort(key=lambda item: -store.estimate(item.nodeid))
+
+
+def pytest_runtest_logreport(report):
+    """
+    pytest_runtest_logreport: add the time of the setup, call and teardown of
+        each test that uses a browser. With pytest-xdist, the reports of the
+        workers are received by the main process.
+    """
+    if ("browser_test", True) not in report.user_properties:
+        # the unit tests are not sharded nor kept in the history
+        return
+    if report.skipped:
+        _SKIPPED_TESTS.add(report.nodeid)
+    if report.failed:
+        _FAILED_TESTS.add(report.nodeid)
+    elif report.when == "call" and report.passed:
+        _PASSED_TESTS.add(report.nodeid)
+    for name, value in report.user_properties:
+        if name == "page_metrics":
+            _PAGE_METRICS[report.nodeid] = value
+    _TEST_DURATIONS[report.nodeid] = _TEST_DURATIONS.get(report.nodeid, 0.0) + report.duration
+
+
+def pytest_unconfigure(config):
+    """
+    pytest_unconfigure: stop the local mbtiles server
+    """
+    server = getattr(config, "mbtiles_server", None)
+    if server is not None:
+        server.stop()
+
+
+def pytest_sessionfinish(session):
+    """
+    pytest_sessionfinish: save the steps recorded by this process and, in the
+        main process, the durations of the tests, the inputs of the passed
+        tests and the history of the run
+    """
+    config = session.config
+    durations = {
+        nodeid: duration
+        for nodeid, duration in _TEST_DURATIONS.items()
+        if nodeid not in _SKIPPED_TESTS
+    }
+    if not hasattr(config, "workerinput") and durations:
+        store = DurationStore(config.getoption("durations_file"))
+        for nodeid, duration in durations.items():
+            store.update(nodeid, duration)
+        store.save()
+    fingerprints = config.input_fingerprints
+    if not hasattr(config, "workerinput") and fingerprints is not None:
+        passed = PassStore(config.getoption("incremental_file"))
+        for nodeid in _FAILED_TESTS:
+            passed.forget(nodeid)
+        for nodeid in _PASSED_TESTS - _FAILED_TESTS:
+            passed.record(nodeid, inputs_of(nodeid, fingerprints))
+        passed.save()
+        if session.exitstatus == pytest.ExitCode.NO_TESTS_COLLECTED:
+            # every test is unchanged since its last pass
+            session.exitstatus = pytest.ExitCode.OK
+    if not hasattr(config, "workerinput") and HISTORY and durations:
+        _save_history(durations)
+    recorder = get_recorder()
+    if recorder is not None:
+        recorder.save(os.path.join(PROFILE_DIR, f"{_worker_id(session.config)}.json"))
+
+
+def _save_history(durations):
+    """
+    _save_history: store the results of the run in HISTORY_DB, with the
+        steps recorded by the workers and the metrics of the page
+    """
+    results = {
+        nodeid: {
+            "outcome": "failed" if nodeid in _FAILED_TESTS else "passed",
+            "duration": duration,
+        }
+        for nodeid, duration in durations.items()
+    }
+    store = HistoryStore(HISTORY_DB)
+    try:
+        store.add_run(
+            results,
+            steps=load_profiles() if enabled() else None,
+            metrics=_PAGE_METRICS,
+        )
+    finally:
+        store.close()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item):
+    """
+    pytest_runtest_makereport: keep the report of each phase in the item, so
+        the fixtures know if the test failed
+    """
+    outcome = yield
+    report = outcome.get_result()
+    setattr(item, f"rep_{report.when}", report)
+
+
+def pytest_terminal_summary(terminalreporter):
+    """
+    pytest_terminal_summary: print the directories of the failure traces,
+        the time spent by each test and the slowest steps
+    """
+    traces = [
+        (report.nodeid, value)
+        for reports in terminalreporter.stats.values()
+        for report in reports
+        if hasattr(report, "user_properties")
+        for name, value in report.user_properties
+        if name == "failure_trace"
+    ]
+    if traces:
+        terminalreporter.write_sep("=", "failure traces")
+        for nodeid, directory in traces:
+            terminalreporter.write_line(f"{nodeid}: {directory}")
+    if not enabled():
+        return
+    terminalreporter.write_sep("=", "profile")
+    for line in summary_lines(load_profiles()):
+        terminalreporter.write_line(line)
+
+
+@pytest.fixture(autouse=True)
+def profile_test(request):
+    """
+    profile_test: associate the recorded steps with the running test
+    """
+    recorder = get_recorder()
+    if recorder is not None:
+        recorder.test = request.node.nodeid
+    yield
+    if recorder is not None:
+        recorder.test = None
+
+
+@pytest.fixture(autouse=True)
+def failure_trace(request):
+    """
+    failure_trace: keep the last events of the browser during the test and
+        save them if the test fails or takes longer than its time budget
+        (time_budget marker or TEST_TIME_BUDGET)
+    """
+    driver = getattr(request.cls, "driver", None) if request.cls else None
+    if not FAILURE_TRACE or driver is None:
+        yield
+        return
+    recorder = flight_recorder(driver)
+    recorder.clear()
+    start = perf_counter()
+    yield
+    duration = perf_counter() - start
+    marker = request.node.get_closest_marker("time_budget")
+    budget = marker.args[0] if marker else TEST_TIME_BUDGET
+    report = getattr(request.node, "rep_call", None)
+    failed = report is not None and report.failed
+    if failed or (budget and duration > budget):
+        directory = trace_directory(request.node.nodeid)
+        recorder.flush(directory)
+        request.node.user_properties.append(("failure_trace", directory))
+
+
+@pytest.fixture(autouse=True)
+def page_metrics_history(request):
+    """
+    page_metrics_history: read the metrics of the page at the end of the
+        test, stored in the history by the main process
+    """
+    yield
+    driver = getattr(request.cls, "driver", None) if request.cls else None
+    if not HISTORY or driver is None:
+        return
+    try:
+        metrics = page_metrics(driver)
+    except WebDriverException:
+        return
+    request.node.user_properties.append(("page_metrics", metrics))
+
+
+class _LogDriver:
+    """
+    _LogDriver: driver that only gives a performance log and a console log,
+        for the unit tests of the network tracking and of the failure traces
+    """
+
+    log_types = ["browser", "performance"]
+
+    def __init__(self):
+        self.logs = {"browser": [], "performance": []}
+
+    def send(self, method, **params):
+        """
+        send: add a DevTools event to the performance log
+        """
+        message = {"message": {"method": method, "params": params}}
+        self.logs["performance"].append({"message": json.dumps(message)})
+
+    def get_log(self, log_type):
+        entries, self.logs[log_type] = self.logs[log_type], []
+        return entries
+
+
+@pytest.fixture
+def log_driver():
+    """
+    log_driver: fake driver with a performance log, filled with send
+
+    Returns:
+        _LogDriver: the driver
+    """
+    return _LogDriver()
+
+
+@pytest.fixture
+def tile_server(tmp_path):
+    """
+    tile_server: local mbtiles server of a small file, with the tile z=2, x=1,
+        y=0 and the sample tile of the smoke checks
+
+    Returns:
+        TileServer: the started server
+    """
+    path = str(tmp_path / "test.mbtiles")
+    zoom, x, y = sample_tile(*SAMPLE_POINT, SAMPLE_ZOOM)
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE metadata (name text, value text)")
+        connection.execute(
+            "CREATE TABLE tiles (zoom_level integer, tile_column integer, "
+            "tile_row integer, tile_data blob)"
+        )
+        connection.execute("INSERT INTO metadata VALUES ('format', 'png')")
+        # the mbtiles use the TMS scheme: tile z=2, x=1, y=0 (XYZ) is row 3
+        connection.executemany(
+            "INSERT INTO tiles VALUES (?, ?, ?, ?)",
+            [(2, 1, 3, b"tile"), (zoom, x, 2**zoom - 1 - y, b"tile")],
+        )
+    server = TileServer(path, port=0)
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture(scope="session")
+def replay_proxy():
+    """
+    replay_proxy: start the record/replay proxy when REPLAY_MODE is set
+
+    Returns:
+        str|None: address of the proxy
+    """
+    if not REPLAY_MODE:
+        yield None
+        return
+    proxy = ReplayProxy()
+    proxy.start()
+    yield proxy.address
+    proxy.stop()
+
+
+@pytest.fixture(scope="class")
+def driver_init(request, replay_proxy):
+    """
+    driver_init: initialization of the driver using a fixture that
+        shares requested elements with scope class (other classes).
+        In this case, the following elements are being sharing: driver and url.
+        When the tests are distributed with pytest-xdist, each worker has its
+        own isolated browser.
+
+    Args:
+        request: The request fixture is a special fixture providing information
+    of the requesting test function
+    """
+    session = BrowserSession(worker_id=_worker_id(request.config), proxy=replay_proxy)
+    try:
+        driver = instrument_driver(session.start())
+    except Exception:
+        # the temporary directories of the session are removed
+        session.quit()
+        raise
+
+    request.cls.driver = driver
+    request.cls.url = os.getenv("FRONTEND_URL_LOCAL")
+    yield
+    session.quit()
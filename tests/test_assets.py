@@ -0,0 +1,86 @@
+"""
+Tests of the checks of the images, against a local http server.
+"""
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from frontend_test.assets import check_url, check_urls, clear_cache
+
+
+class _ImageHandler(BaseHTTPRequestHandler):
+    """
+    _ImageHandler: /ok.png is found, /missing.png is not found, /flaky.png
+        fails once with a server error and /get-only.png does not allow HEAD
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _answer(self):
+        self.server.requests.append((self.command, self.path))
+        status = 200
+        if self.path == "/missing.png":
+            status = 404
+        elif self.path == "/flaky.png" and self.server.requests.count(("HEAD", self.path)) == 1:
+            status = 503
+        elif self.path == "/get-only.png":
+            status = 405 if self.command == "HEAD" else 206
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    do_HEAD = _answer
+    do_GET = _answer
+
+
+@pytest.fixture
+def image_server():
+    """
+    image_server: local http server of the images, with the requests received
+
+    Returns:
+        ThreadingHTTPServer: the server
+    """
+    clear_cache()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ImageHandler)
+    server.requests = []
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    clear_cache()
+
+
+def test_check_urls(image_server):
+    """
+    test_check_urls: the status of each url, in order, with one request by
+        url shared by several images
+    """
+    ok, missing = f"{image_server.url}/ok.png", f"{image_server.url}/missing.png"
+    assert check_urls([ok, missing, ok]) == [(ok, 200), (missing, 404), (ok, 200)]
+    assert check_urls([ok, missing]) == [(ok, 200), (missing, 404)]
+    assert sorted(image_server.requests) == [("HEAD", "/missing.png"), ("HEAD", "/ok.png")]
+    assert check_url(f"{image_server.url}/get-only.png") == 200
+    assert image_server.requests[-1] == ("GET", "/get-only.png")
+
+
+def test_check_url_not_cached(image_server):
+    """
+    test_check_url_not_cached: a server error is checked again, and a failed
+        request has no status
+    """
+    flaky = f"{image_server.url}/flaky.png"
+    assert check_url(flaky) == 503
+    assert check_url(flaky) == 200
+    assert check_url(flaky) == 200
+    assert image_server.requests.count(("HEAD", "/flaky.png")) == 2
+
+    with socket.socket() as closed:
+        closed.bind(("127.0.0.1", 0))
+        unreachable = f"http://127.0.0.1:{closed.getsockname()[1]}/ok.png"
+    assert check_url(unreachable, timeout=1) is None
@@ -0,0 +1,62 @@
+"""
+Tests of the validation of the bathymetry profiles against a raster.
+"""
+import numpy as np
+from frontend_test.bathymetry import compare_profile, haversine, load_raster, sample_raster
+
+# raster of 0.01 degree pixels from (-8.1, 50.4), with a plane elevation
+TRANSFORM = (0.01, 0.0, -8.1, 0.0, -0.01, 50.4)
+
+
+def _plane(lats, lngs):
+    return -100.0 + 200.0 * (lngs + 8.0) - 300.0 * (lats - 50.3)
+
+
+def _raster(tmp_path):
+    rows, cols = np.mgrid[0:30, 0:40]
+    lngs = TRANSFORM[2] + (cols + 0.5) * TRANSFORM[0]
+    lats = TRANSFORM[5] + (rows + 0.5) * TRANSFORM[4]
+    elevation = _plane(lats, lngs)
+    elevation[0, 0] = -9999
+    path = str(tmp_path / "bathymetry.npz")
+    np.savez(path, elevation=elevation, transform=np.array(TRANSFORM), nodata=-9999)
+    return load_raster(path)
+
+
+def test_sample_raster(tmp_path):
+    """
+    test_sample_raster: the interpolation of a plane is exact, and the
+        points outside of the raster or next to no data are NaN
+    """
+    raster = _raster(tmp_path)
+    lats = np.array([50.27, 50.2, 50.33, 51.0, 50.398])
+    lngs = np.array([-7.93, -8.0, -7.86, -7.9, -8.098])
+    values = sample_raster(raster, lats, lngs)
+    np.testing.assert_allclose(values[:3], _plane(lats[:3], lngs[:3]))
+    assert np.isnan(values[3:]).all()
+
+
+def test_compare_profile(tmp_path):
+    """
+    test_compare_profile: a profile plotted as depths matches the raster, a
+        shifted profile or a profile of elevations does not, unless the sign
+        is given
+    """
+    raster = _raster(tmp_path)
+    start, end = (50.27, -7.93), (50.2, -8.0)
+    length = haversine(start, end)
+    distance = np.linspace(0, length, 50)
+    fraction = distance / length
+    depth = -_plane(
+        start[0] + fraction * (end[0] - start[0]),
+        start[1] + fraction * (end[1] - start[1]),
+    )
+    report = compare_profile(distance, depth, start, end, raster)
+    assert report["ok"]
+    assert report["sign"] == -1
+    assert report["compared"] == 50
+    assert report["max_error"] < 1e-6
+    assert not compare_profile(distance, depth + 25, start, end, raster)["ok"]
+    assert not compare_profile(distance * 1.2, depth, start, end, raster)["ok"]
+    assert not compare_profile(distance, -depth, start, end, raster)["ok"]
+    assert compare_profile(distance, -depth, start, end, raster, sign=1)["ok"]
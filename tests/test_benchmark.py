@@ -0,0 +1,57 @@
+"""
+Tests of the statistics of the benchmark and of the comparison with its
+baseline.
+"""
+import pytest
+from frontend_test.benchmark import compare, percentile, summarise
+
+
+def test_percentile():
+    """
+    test_percentile: linear interpolation between the ordered values
+    """
+    values = [40, 10, 30, 20]
+    assert percentile(values, 0) == 10
+    assert percentile(values, 50) == 25
+    assert percentile(values, 100) == 40
+    assert percentile(values, 95) == pytest.approx(38.5)
+    assert percentile([7], 95) == 7
+
+
+def test_summarise():
+    """
+    test_summarise: median and 95th percentile of each metric
+    """
+    samples = [
+        {"duration": 100.0, "long_tasks": 0},
+        {"duration": 300.0, "long_tasks": 2},
+        {"duration": 200.0, "long_tasks": 1},
+    ]
+    summary = summarise(samples)
+    assert summary["duration"] == {"median": 200.0, "p95": pytest.approx(290.0)}
+    assert summary["long_tasks"]["median"] == 1
+
+
+def test_compare():
+    """
+    test_compare: the flows slower than the baseline beyond the threshold,
+        for the median and the 95th percentile
+    """
+    baseline = {
+        "load": {"duration": {"median": 1000.0, "p95": 1500.0}},
+        "graph": {"duration": {"median": 500.0, "p95": 600.0}},
+        "empty": {"duration": {"median": 0.0, "p95": 0.0}},
+    }
+    results = {
+        "load": {"duration": {"median": 1100.0, "p95": 2000.0}},
+        "graph": {"duration": {"median": 700.0, "p95": 900.0}},
+        "empty": {"duration": {"median": 50.0, "p95": 50.0}},
+        "new": {"duration": {"median": 5000.0, "p95": 5000.0}},
+    }
+    assert compare(results, baseline, threshold=0.2) == [
+        "load duration p95: 2000 ms (baseline 1500 ms, +33%)",
+        "graph duration median: 700 ms (baseline 500 ms, +40%)",
+        "graph duration p95: 900 ms (baseline 600 ms, +50%)",
+    ]
+    assert compare(results, baseline, threshold=0.6) == []
+    assert compare(results, baseline, threshold=0.2, metric="long_tasks") == []
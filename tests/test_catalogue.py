@@ -0,0 +1,63 @@
+"""
+Tests of the test cases generated from the layer catalogue.
+"""
+import json
+from frontend_test.catalogue import layer_cases, load_catalogue, url_prefix
+
+CATALOGUE = {
+    "Data Exploration": {
+        "layerNames": {
+            "Bathymetry": {
+                "layerNames": {
+                    "Haig Fras 5m": {
+                        "dataType": "COG",
+                        "url": "https://store/haig-fras/bathymetry_5m.tif",
+                    },
+                }
+            },
+            "Seabed Habitats": {
+                "layerNames": {
+                    "EUSeaMap": {
+                        "dataType": "WMS",
+                        "url": "https://ows.emodnet-seabedhabitats.eu/wms",
+                    },
+                    "Seabed Habitats-MBTiles": {
+                        "dataType": "MBTiles",
+                        "url": "http://localhost:8082/mytiles",
+                    },
+                    "Photos": {"dataType": "Photo", "url": "https://store/photos.json"},
+                }
+            },
+        }
+    }
+}
+
+
+def test_layer_cases(tmp_path):
+    """
+    test_layer_cases: one case by tile layer, with the text of its tile urls
+    """
+    path = tmp_path / "layers.json"
+    path.write_text(json.dumps(CATALOGUE))
+    cases = layer_cases(load_catalogue(str(path)))
+    assert [case["id"] for case in cases] == [
+        "Data Exploration/Bathymetry/Haig Fras 5m",
+        "Data Exploration/Seabed Habitats/EUSeaMap",
+        "Data Exploration/Seabed Habitats/Seabed Habitats-MBTiles",
+    ]
+    assert cases[1]["section"] == "Data Exploration"
+    assert cases[1]["group"] == "Seabed Habitats"
+    assert cases[1]["name"] == "EUSeaMap"
+    assert [case["url_part"] for case in cases] == [
+        "bathymetry_5m.tif",
+        "ows.emodnet-seabedhabitats.eu",
+        "localhost:8082/mytiles/",
+    ]
+
+
+def test_url_prefix():
+    """
+    test_url_prefix: the host and path of the tiles, without their template
+    """
+    assert url_prefix("http://tiles.local:8082/mytiles/{z}/{x}/{y}") == "tiles.local:8082/mytiles/"
+    assert url_prefix("http://localhost:8082/") == "localhost:8082/"
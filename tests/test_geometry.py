@@ -0,0 +1,31 @@
+"""
+Tests of the geometry of the survey design circles.
+"""
+import numpy as np
+from frontend_test.geometry import moved_by, parse_circle_paths
+
+
+def test_parse_circle_paths():
+    """
+    test_parse_circle_paths: centre and radius of leaflet circle paths
+    """
+    paths = [
+        "M90,50a10,10 0 1,0 20,0 a10,10 0 1,0 -20,0 ",
+        "M-5.5,1e2a2.5,2.5 0 1,0 5,0 a2.5,2.5 0 1,0 -5,0 ",
+        "M0 0",
+    ]
+    centres, radii = parse_circle_paths(paths)
+    np.testing.assert_allclose(centres[:2], [[100, 50], [-3, 100]])
+    np.testing.assert_allclose(radii[:2], [10, 2.5])
+    assert np.isnan(radii[2])
+
+
+def test_moved_by():
+    """
+    test_moved_by: the circles moved in the direction of the drag
+    """
+    before = {"screen_centres": np.array([[10.0, 10.0], [20.0, 20.0]])}
+    after = {"screen_centres": np.array([[112.0, 215.0], [125.0, 228.0]])}
+    assert moved_by(before, after, (100, 200))
+    assert not moved_by(before, after, (-100, 200))
+    assert not moved_by(before, before, (100, 200))
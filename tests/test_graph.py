@@ -0,0 +1,38 @@
+"""
+Tests of the conversion of the plotly figures.
+"""
+import numpy as np
+from frontend_test.graph import is_monotonic, parse_figure
+
+
+def test_parse_figure():
+    """
+    test_parse_figure: the values of the traces become NumPy arrays
+    """
+    figure = parse_figure(
+        {
+            "traces": [
+                {"name": "depth", "type": "scatter", "x": [0, 0.5, 1], "y": [-50, None, -52.5]},
+                {"name": None, "type": "bar", "x": ["A5.37", "A5.27"], "y": [3, 4]},
+            ],
+            "x_title": "Distance (km)",
+            "y_title": None,
+            "x_range": [0, 1],
+            "rangeslider": None,
+        }
+    )
+    depth = figure["traces"][0]
+    np.testing.assert_allclose(depth["x"], [0, 0.5, 1])
+    assert depth["y"].dtype == float
+    assert np.isnan(depth["y"][1])
+    assert figure["traces"][1]["x"].dtype == object
+    assert figure["x_title"] == "Distance (km)"
+
+
+def test_is_monotonic():
+    """
+    test_is_monotonic: distances of a profile
+    """
+    assert is_monotonic([0, 0.1, 0.1, np.nan, 0.3])
+    assert not is_monotonic([0, 0.1, 0.1], strict=True)
+    assert not is_monotonic([0, 0.2, 0.1])
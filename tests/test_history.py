@@ -0,0 +1,82 @@
+"""
+Tests of the history of the runs.
+"""
+import sqlite3
+from frontend_test.history import HistoryStore, run_configuration, slowdown, trend_lines
+
+
+def test_slowdown():
+    """
+    test_slowdown: only a last value far from the previous ones is a
+        regression
+    """
+    values = [10.0, 10.5, 9.8, 10.2, 10.1, 9.9, 10.3]
+    assert not slowdown(values + [10.4], min_runs=5)["regression"]
+    result = slowdown(values + [14.0], min_runs=5)
+    assert result["regression"]
+    assert result["median"] == 10.1
+    # not enough previous runs
+    assert not slowdown(values[:3] + [14.0], min_runs=5)["regression"]
+    assert slowdown([10.0]) is None
+
+
+def test_history_store(tmp_path):
+    """
+    test_history_store: runs stored and read back as series
+    """
+    store = HistoryStore(str(tmp_path / "history.sqlite"))
+    steps = {
+        "a": {
+            "steps": [
+                {"name": "open_app", "kind": "helper", "depth": 0, "duration": 2.0, "wait": 1.5},
+                {"name": "get", "kind": "command", "depth": 1, "duration": 1.9, "wait": 0.0},
+            ]
+        }
+    }
+    for duration in (5.0, 5.1, 4.9, 5.0, 5.2, 5.0):
+        store.add_run(
+            {"a": {"outcome": "passed", "duration": duration}},
+            steps=steps,
+            metrics={"a": {"load_event": 800.0}},
+        )
+    store.add_run({"a": {"outcome": "failed", "duration": 50.0}})
+    run_id = store.add_run({"a": {"outcome": "passed", "duration": 9.0}})
+    assert store.tests() == ["a"]
+    assert store.series("a")[-1] == (run_id, 9.0)
+    assert len(store.series("a")) == 7
+    assert [value for _, value in store.series("a", "load_event")] == [800.0] * 6
+    assert [value for _, value in store.series("a", "open_app")] == [2.0] * 6
+    lines, regressions = trend_lines(store, store.tests())
+    assert regressions == ["a"]
+    assert "SLOWER" in lines[-1]
+    store.close()
+
+
+def test_history_configuration(tmp_path, monkeypatch):
+    """
+    test_history_configuration: the runs are compared in the same browser
+        configuration, and the runs of a previous database keep their browser
+    """
+    path = str(tmp_path / "history.sqlite")
+    connection = sqlite3.connect(path)
+    connection.executescript(
+        "CREATE TABLE runs (id INTEGER PRIMARY KEY AUTOINCREMENT, started TEXT NOT NULL,"
+        " commit_id TEXT, browser TEXT);"
+        "CREATE TABLE results (run_id INTEGER NOT NULL, test TEXT NOT NULL,"
+        " outcome TEXT NOT NULL, duration REAL NOT NULL);"
+        "INSERT INTO runs VALUES (1, '2026-01-01', NULL, 'chrome');"
+        "INSERT INTO results VALUES (1, 'a', 'passed', 4.0);"
+    )
+    connection.commit()
+    connection.close()
+    monkeypatch.setenv("SELENIUM_BROWSER", "firefox")
+    monkeypatch.setenv("SELENIUM_MODE", "HEADLESS")
+    monkeypatch.setenv("SELENIUM_WINDOW_SIZE", "1280x800")
+    assert run_configuration() == "firefox:headless:1280x800"
+    store = HistoryStore(path)
+    store.add_run({"a": {"outcome": "passed", "duration": 5.0}})
+    store.add_run({"a": {"outcome": "passed", "duration": 6.0}}, configuration="firefox")
+    assert [value for _, value in store.series("a")] == [5.0]
+    assert [value for _, value in store.series("a", configuration="firefox")] == [6.0]
+    assert [value for _, value in store.series("a", configuration="chrome")] == [4.0]
+    store.close()
@@ -0,0 +1,45 @@
+"""
+Tests of the recording of the steps and of the merge of the profiles of the
+workers.
+"""
+from frontend_test.instrumentation import StepRecorder, load_profiles, summary_lines
+
+
+def _profile(path, test, name):
+    """
+    _profile: save the profile of a worker with one command and one helper
+        of a test
+    """
+    recorder = StepRecorder()
+    recorder.test = test
+    with recorder.step(name, "helper"):
+        with recorder.step("findElement", "command"):
+            pass
+    recorder.test = None
+    with recorder.step("quit", "command"):
+        pass
+    recorder.save(str(path))
+    return recorder.breakdown()
+
+
+def test_load_profiles(tmp_path):
+    """
+    test_load_profiles: the tests found in several profiles are merged
+    """
+    gw0 = _profile(tmp_path / "gw0.json", "test_a", "open_section")
+    gw1 = _profile(tmp_path / "gw1.json", "test_b", "toggle_layer")
+    tests = load_profiles(str(tmp_path))
+    assert sorted(tests) == ["null", "test_a", "test_b"]
+    assert tests["test_a"]["steps"] == gw0["test_a"]["steps"]
+    assert tests["test_a"]["commands"] == 1
+    assert tests["null"]["commands"] == 2
+    assert len(tests["null"]["steps"]) == 2
+    assert tests["null"]["total"] == gw0[None]["total"] + gw1[None]["total"]
+    assert any("toggle_layer (test_b)" in line for line in summary_lines(tests))
+
+
+def test_load_profiles_missing(tmp_path):
+    """
+    test_load_profiles_missing: no profiles without the directory
+    """
+    assert load_profiles(str(tmp_path / "profile")) == {}
@@ -0,0 +1,43 @@
+"""
+Tests of the conversion of the map locations.
+"""
+import pytest
+from frontend_test.leaflet import MAP_SITES, map_location, map_offsets
+
+
+class _ScriptDriver:
+    """
+    _ScriptDriver: driver that returns a fixed result to execute_script
+    """
+
+    def __init__(self, result):
+        self.result = result
+        self.arguments = None
+
+    def execute_script(self, script, *arguments):
+        self.arguments = arguments
+        return self.result
+
+
+def test_map_location():
+    """
+    test_map_location: named places and (lat, lng) tuples
+    """
+    assert map_location("Haig Fras Reef") == MAP_SITES["haig fras reef"]
+    assert map_location(("50.1", -8)) == (50.1, -8.0)
+    with pytest.raises(ValueError):
+        map_location("atlantis")
+
+
+def test_map_offsets():
+    """
+    test_map_offsets: one offset by location, an error if they are not visible
+    """
+    driver = _ScriptDriver([[10, -20], [35, 4]])
+    offsets = map_offsets(driver, ["haig fras reef", (50.2, -8.0)])
+    assert offsets == [(10, -20), (35, 4)]
+    assert driver.arguments == ([list(MAP_SITES["haig fras reef"]), [50.2, -8.0]], True)
+    with pytest.raises(ValueError):
+        map_offsets(_ScriptDriver([]), ["haig fras reef"], pan=False)
+    with pytest.raises(ValueError):
+        map_offsets(_ScriptDriver(None), ["haig fras reef"])
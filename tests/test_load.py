@@ -0,0 +1,38 @@
+"""
+Tests of the report of the load mode and of the steps of a virtual user.
+"""
+from time import monotonic
+from frontend_test.load import LoadRun, VirtualUser, summarise_samples
+
+
+def test_summarise_samples():
+    """
+    test_summarise_samples: percentiles of the successful steps and error rate
+    """
+    samples = [
+        {"user": 0, "step": "wms", "start": 0.0, "latency": latency, "error": None}
+        for latency in (100.0, 200.0, 300.0, 400.0)
+    ]
+    samples.append(
+        {"user": 1, "step": "wms", "start": 1.0, "latency": 10000.0, "error": "TimeoutException"}
+    )
+    summary = summarise_samples(samples, duration=10.0)["wms"]
+    assert summary["count"] == 5
+    assert summary["errors"] == 1
+    assert summary["error_rate"] == 0.2
+    assert summary["throughput"] == 0.5
+    assert summary["p50"] == 250.0
+    assert summary["max"] == 400.0
+
+
+def test_step_error():
+    """
+    test_step_error: any exception of a flow is recorded as an error of the
+        step
+    """
+    load_run = LoadRun("http://frontend/", 1, 0.0, 10.0, 0.0, ["wms"])
+    load_run.started = monotonic()
+    user = VirtualUser(load_run, 0, 0.0)
+    assert user._step("load", lambda: None)
+    assert not user._step("wms", lambda: {}["layer"])
+    assert [sample["error"] for sample in load_run.samples] == [None, "KeyError"]
@@ -0,0 +1,69 @@
+"""
+Tests of the browser matrix runner.
+"""
+import pytest
+from frontend_test.matrix import (
+    configuration_env,
+    merge_results,
+    parse_configuration,
+    read_junit,
+)
+
+JUNIT = """<?xml version="1.0" encoding="utf-8"?>
+<testsuites><testsuite name="pytest" tests="3">
+<testcase classname="tests.test_with_pytest.Test_URL" name="test_open_url" time="3.5"/>
+<testcase classname="tests.test_with_pytest.Test_URL" name="test_infobox" time="7.25">
+<failure message="assert False">assert False</failure></testcase>
+<testcase classname="tests.test_with_pytest.Test_Layers" name="test_layer[a]" time="0.1">
+<skipped message="skip"/></testcase>
+</testsuite></testsuites>
+"""
+
+
+def test_parse_configuration():
+    """
+    test_parse_configuration: browser, mode and window size
+    """
+    assert parse_configuration("chrome:headless:1280x800") == {
+        "name": "chrome_headless_1280x800",
+        "browser": "chrome",
+        "mode": "HEADLESS",
+        "window_size": "1280x800",
+    }
+    assert parse_configuration("firefox")["mode"] == ""
+    with pytest.raises(ValueError):
+        parse_configuration("chrome:fast")
+
+
+def test_configuration_env(monkeypatch):
+    """
+    test_configuration_env: the configured durations file and history are
+        kept, with the name of the configuration
+    """
+    configuration = parse_configuration("firefox")
+    monkeypatch.setenv("DURATIONS_FILE", "/durations/durations.json")
+    monkeypatch.delenv("INCREMENTAL_FILE", raising=False)
+    monkeypatch.setenv("HISTORY_DB", "/durations/history.sqlite")
+    env = configuration_env(configuration, 1, "matrix/firefox")
+    assert env["DURATIONS_FILE"] == "/durations/durations.firefox.json"
+    assert env["INCREMENTAL_FILE"] == "matrix/firefox/passed.json"
+    assert env["HISTORY_DB"] == "/durations/history.firefox.sqlite"
+
+
+def test_merge_results(tmp_path):
+    """
+    test_merge_results: the results of the configurations side by side
+    """
+    path = tmp_path / "junit.xml"
+    path.write_text(JUNIT)
+    results = read_junit(str(path))
+    assert results["tests.test_with_pytest.Test_URL::test_infobox"] == {
+        "outcome": "failed",
+        "time": 7.25,
+    }
+    assert results["tests.test_with_pytest.Test_Layers::test_layer[a]"]["outcome"] == "skipped"
+    merged = merge_results(
+        [{"name": "chrome", "results": results}, {"name": "firefox", "results": {}}]
+    )
+    assert list(merged["tests.test_with_pytest.Test_URL::test_open_url"]) == ["chrome"]
+    assert read_junit(str(tmp_path / "missing.xml")) == {}
@@ -0,0 +1,20 @@
+"""
+Tests of the trend of the memory metrics.
+"""
+from frontend_test.memory import leak_trend
+
+
+def test_leak_trend():
+    """
+    test_leak_trend: a metric growing by cycle is a leak, a stable one is not
+    """
+    samples = [
+        {"JSHeapUsedSize": 1e7 + 5e5 * cycle, "Nodes": 900 + cycle % 2, "JSEventListeners": None}
+        for cycle in range(10)
+    ]
+    trend = leak_trend(samples, warmup=2)
+    assert trend["JSHeapUsedSize"]["leak"]
+    assert abs(trend["JSHeapUsedSize"]["slope"] - 5e5) < 1e-3
+    assert trend["JSHeapUsedSize"]["r2"] > 0.99
+    assert not trend["Nodes"]["leak"]
+    assert "JSEventListeners" not in trend
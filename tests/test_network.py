@@ -0,0 +1,119 @@
+"""
+Tests of the network tracker, with the performance log of chromedriver
+given by a fake driver (log_driver fixture, conftest.py).
+"""
+import pytest
+from selenium.common.exceptions import TimeoutException
+from frontend_test import network
+from frontend_test.network import (
+    NetworkTracker,
+    performance_log,
+    tiles_loaded,
+    wait_layer_loaded,
+)
+
+
+def test_network_tracker(log_driver):
+    """
+    test_network_tracker: requests in flight and stats of a layer
+    """
+    driver = log_driver
+    tracker = NetworkTracker(driver)
+    for request_id, url in (("1", "https://haig/1.png"), ("2", "https://wms/1.png")):
+        driver.send(
+            "Network.requestWillBeSent",
+            requestId=request_id,
+            timestamp=10.0,
+            request={"url": url},
+        )
+    driver.send("Network.loadingFinished", requestId="1", timestamp=10.5, encodedDataLength=300)
+    assert tracker.in_flight("haig") == []
+    assert len(tracker.in_flight()) == 1
+    assert not tracker.drained(quiet_period=0)(driver)
+    assert tracker.drained("haig", quiet_period=0)(driver)
+    driver.send("Network.loadingFailed", requestId="2", timestamp=11.0)
+    assert tracker.stats() == {"requests": 2, "failed": 1, "bytes": 300, "duration": 1.0}
+    assert tracker.stats("haig") == {
+        "requests": 1,
+        "failed": 0,
+        "bytes": 300,
+        "duration": 0.5,
+    }
+    since = tracker.mark()
+    driver.send(
+        "Network.requestWillBeSent",
+        requestId="3",
+        timestamp=12.0,
+        request={"url": "https://haig/2.png"},
+    )
+    assert tracker.in_flight("haig", since=since)[0]["url"] == "https://haig/2.png"
+    driver.send("Network.loadingFinished", requestId="3", timestamp=12.25, encodedDataLength=100)
+    assert tracker.stats("haig", since=since) == {
+        "requests": 1,
+        "failed": 0,
+        "bytes": 100,
+        "duration": 0.25,
+    }
+
+
+def test_performance_log_shared(log_driver):
+    """
+    test_performance_log_shared: every subscriber receives the events that
+        are read once from the driver
+    """
+    driver = log_driver
+    log = performance_log(driver)
+    assert performance_log(driver) is log
+    received = []
+    log.subscribe(lambda method, params: received.append(method))
+    log.subscribe(lambda method, params: received.append(method))
+    driver.send("Page.loadEventFired", timestamp=1.0)
+    assert log.drain() == 1
+    assert log.drain() == 0
+    assert received == ["Page.loadEventFired", "Page.loadEventFired"]
+
+
+def test_tiles_loaded():
+    """
+    test_tiles_loaded: the failed tiles are settled, the pending ones are not
+    """
+    layer = {"tiles_count": 4, "tiles_loaded": 3, "tiles_failed": 0}
+    predicate = tiles_loaded(lambda driver: layer)
+    assert not predicate(None)
+    layer["tiles_failed"] = 1
+    assert predicate(None) is layer
+    assert not tiles_loaded(lambda driver: None)(None)
+
+
+def test_drained_by_url(log_driver, monkeypatch):
+    """
+    test_drained_by_url: the quiet period of a layer only counts the activity
+        of its own requests
+    """
+    driver = log_driver
+    clock = [100.0]
+    monkeypatch.setattr(network, "monotonic", lambda: clock[0])
+    tracker = NetworkTracker(driver)
+    driver.send("Network.requestWillBeSent", requestId="1", timestamp=1.0, request={"url": "https://haig/1.png"})
+    driver.send("Network.loadingFinished", requestId="1", timestamp=1.5)
+    drained = tracker.drained("haig", quiet_period=0.5)
+    assert not drained(driver)
+    clock[0] = 100.4
+    driver.send("Network.requestWillBeSent", requestId="2", timestamp=2.0, request={"url": "https://wms/1.png"})
+    driver.send("Network.loadingFinished", requestId="2", timestamp=2.5)
+    clock[0] = 100.6
+    assert drained(driver)
+    assert not tracker.drained(quiet_period=0.5)(driver)
+    other = tracker.drained("cog", quiet_period=0.5)
+    assert not other(driver)
+    clock[0] = 101.1
+    assert other(driver)
+
+
+def test_wait_layer_loaded_missing(log_driver):
+    """
+    test_wait_layer_loaded_missing: a layer that is not on the map is a
+        timeout, not an error on the missing record
+    """
+    with pytest.raises(TimeoutException, match="haig"):
+        wait_layer_loaded(log_driver, timeout=0.2, find_layer=lambda driver: None)
@@ -0,0 +1,64 @@
+"""
+Tests of the cached element handles of the page objects.
+"""
+from selenium.common.exceptions import StaleElementReferenceException
+from selenium.webdriver.common.by import By
+from frontend_test.pages import CachedElementList, leaflet_map
+
+
+class _Element:
+    """
+    _Element: element with a text, stale when its page was re-rendered
+    """
+
+    def __init__(self, page, text):
+        self.page = page
+        self.render = page.render
+        self._text = text
+
+    @property
+    def text(self):
+        if self.render != self.page.render:
+            raise StaleElementReferenceException("stale element")
+        return self._text
+
+
+class _Page:
+    """
+    _Page: parent that counts the calls to find_elements
+    """
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.render = 0
+        self.calls = 0
+
+    def find_elements(self, by, value):
+        self.calls += 1
+        return [_Element(self, text) for text in self.texts]
+
+
+def test_cached_element_list():
+    """
+    test_cached_element_list: the items are found with one call, and found
+        again by index when they are stale
+    """
+    page = _Page(["Bathymetry", "Seabed Habitats", "Photos"])
+    items = CachedElementList(page, (By.ID, "general-types"))
+    assert [item.text for item in items] == ["Bathymetry", "Seabed Habitats", "Photos"]
+    assert page.calls == 1
+
+    page.render += 1
+    page.texts = ["Bathymetry", "Habitats", "Photos"]
+    assert items[1].text == "Habitats"
+    assert page.calls == 2
+
+
+def test_leaflet_map():
+    """
+    test_leaflet_map: one map by driver, its container found on first use
+    """
+    page = _Page(["map"])
+    assert leaflet_map(page) is leaflet_map(page)
+    assert leaflet_map(page) is not leaflet_map(_Page([]))
+    assert page.calls == 0
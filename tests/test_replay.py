@@ -0,0 +1,125 @@
+"""
+Tests of the record and replay proxy, against a local http server.
+"""
+import ssl
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+from frontend_test.assets import check_url, clear_cache, get_session
+from frontend_test.replay import ReplayProxy, ResponseStore, make_certificate
+
+
+class _OriginHandler(BaseHTTPRequestHandler):
+    """
+    _OriginHandler: answer with the path and the body of the request
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+    def _answer(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        content = self.path.encode() + self.rfile.read(length)
+        self.server.requests += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = _answer
+    do_POST = _answer
+
+
+@pytest.fixture
+def origin():
+    """
+    origin: local http server, stopped at the end of the test
+
+    Returns:
+        ThreadingHTTPServer: the server, with the number of requests received
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _OriginHandler)
+    server.requests = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _get(proxy, url, data=None):
+    """
+    _get: send a request through the proxy
+    """
+    method = "POST" if data else "GET"
+    return requests.request(
+        method, url, data=data, proxies={"http": proxy.address}, timeout=10
+    )
+
+
+def test_record_replay(origin, tmp_path):
+    """
+    test_record_replay: the recorded responses are replayed without the
+        origin server, and a request that was not recorded is a miss
+    """
+    url = f"http://127.0.0.1:{origin.server_address[1]}/tiles/3/4/5.png"
+    proxy = ReplayProxy(mode="record", directory=str(tmp_path))
+    proxy.start()
+    try:
+        recorded = _get(proxy, url)
+        posted = _get(proxy, url, data=b"profile")
+    finally:
+        proxy.stop()
+    assert recorded.content == b"/tiles/3/4/5.png"
+    assert posted.content == b"/tiles/3/4/5.pngprofile"
+    assert origin.requests == 2
+    origin.shutdown()
+
+    proxy = ReplayProxy(mode="replay", directory=str(tmp_path))
+    proxy.start()
+    try:
+        replayed = _get(proxy, url)
+        replayed_post = _get(proxy, url, data=b"profile")
+        missed = _get(proxy, url + "?other")
+    finally:
+        proxy.stop()
+    assert replayed.status_code == 200
+    assert replayed.content == recorded.content
+    assert replayed.headers["Content-Type"] == "text/plain"
+    assert replayed_post.content == posted.content
+    assert missed.status_code == 502
+    assert missed.headers["X-Replay-Miss"] == "1"
+    assert origin.requests == 2
+
+
+def test_make_certificate(tmp_path):
+    """
+    test_make_certificate: the certificate and its key are created once, in
+        a single file
+    """
+    path = make_certificate(str(tmp_path))
+    assert make_certificate(str(tmp_path)) == path
+    assert sorted(item.name for item in tmp_path.iterdir()) == ["proxy.pem"]
+    ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER).load_cert_chain(path)
+
+
+def test_session_replayed(tmp_path):
+    """
+    test_session_replayed: the checks of the images use the proxy started
+        after the session was created
+    """
+    url = "http://images.invalid/photo.png"
+    ResponseStore(str(tmp_path)).put("HEAD", url, b"", 200, [], b"")
+    clear_cache()
+    get_session()
+    proxy = ReplayProxy(mode="replay", directory=str(tmp_path))
+    proxy.start()
+    try:
+        assert get_session().proxies["http"] == proxy.address
+        assert check_url(url) == 200
+    finally:
+        proxy.stop()
+        clear_cache()
+    assert not get_session().proxies
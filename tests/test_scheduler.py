@@ -0,0 +1,34 @@
+"""
+Tests of the duration aware scheduler.
+"""
+from frontend_test.scheduler import DurationStore, lpt_schedule, shard_plan
+
+
+def test_lpt_schedule():
+    """
+    test_lpt_schedule: the longest tests are spread over the bins
+    """
+    durations = {"a": 7.0, "b": 5.0, "c": 4.0, "d": 3.0, "e": 1.0}
+    shards, loads = lpt_schedule(durations, 2)
+    assert shards == [["a", "d"], ["b", "c", "e"]]
+    assert loads == [10.0, 10.0]
+
+
+def test_duration_store(tmp_path):
+    """
+    test_duration_store: durations saved, averaged and estimated
+    """
+    path = str(tmp_path / "durations.json")
+    store = DurationStore(path)
+    assert store.estimate("test_a") == 1.0
+    store.update("test_a", 10.0)
+    store.update("test_b", 2.0)
+    store.save()
+    store = DurationStore(path)
+    store.update("test_a", 20.0)
+    assert store.tests["test_a"] == {"duration": 15.0, "runs": 2}
+    assert store.estimate("test_new") == 8.5
+    plan = shard_plan(["test_a", "test_b", "test_new"], store, 2)
+    assert [shard["tests"] for shard in plan["shards"]] == [["test_a"], ["test_new", "test_b"]]
+    assert plan["makespan"] == 15.0
+    assert plan["lower_bound"] == 15.0
@@ -0,0 +1,122 @@
+"""
+Tests of the incremental selection of the tests.
+"""
+import sqlite3
+from frontend_test.selection import (
+    PassStore,
+    bundle_fingerprint,
+    code_fingerprint,
+    input_fingerprints,
+    inputs_of,
+)
+
+INDEX = """<html><head>
+<script type="module" crossorigin src="/assets/index-4f2a9c.js"></script>
+<link rel="stylesheet" href="/assets/index-81be07.css">
+</head><body><div id="root"></div></body></html>"""
+
+
+def _catalogue(mbtiles_url):
+    """
+    _catalogue: catalogue with a COG layer and a mbtiles layer
+    """
+    return {
+        "Data Exploration": {
+            "Bathymetry": {
+                "layerNames": {
+                    "Haig Fras 5m": {"dataType": "COG", "url": "https://store/haig.tif"},
+                }
+            },
+            "Seabed Habitats": {
+                "layerNames": {
+                    "Habitats": {"dataType": "MBTiles", "url": mbtiles_url},
+                }
+            },
+        }
+    }
+
+
+def test_bundle_fingerprint():
+    """
+    test_bundle_fingerprint: only the assets of the build change the
+        fingerprint
+    """
+    fingerprint = bundle_fingerprint(INDEX)
+    assert bundle_fingerprint(INDEX.replace("<body>", "<body class='x'>")) == fingerprint
+    assert bundle_fingerprint(INDEX.replace("4f2a9c", "0d1e2f")) != fingerprint
+
+
+def test_inputs_of(tile_server):
+    """
+    test_inputs_of: the layer tests depend on the code and their layer, the
+        other tests on every input
+    """
+    urls = {"api": "http://127.0.0.1:9/", "tile_server": "http://127.0.0.1:9/"}
+    tile_server.server.mbtiles.cache.size = 0
+    habitats = "layer:Data Exploration/Seabed Habitats/Habitats"
+    fingerprints = input_fingerprints(
+        frontend_url="",
+        urls=urls,
+        catalogue=_catalogue(f"{tile_server.url}mytiles"),
+        timeout=1,
+    )
+    assert fingerprints["layers"] is not None
+    assert fingerprints["code"] == code_fingerprint()
+    # the calculations API has no version endpoint
+    assert fingerprints["api"] is None
+    # the cog layer has no fingerprint while the tile server is unavailable
+    assert fingerprints["layer:Data Exploration/Bathymetry/Haig Fras 5m"] is None
+    assert fingerprints[habitats] is not None
+    inputs = inputs_of(
+        f"tests/test_with_pytest.py::Test_Layers::test_layer[{habitats[6:]}]",
+        fingerprints,
+    )
+    assert list(inputs) == ["code", "frontend", "browser", habitats]
+    inputs = inputs_of("tests/test_with_pytest.py::Test_URL::test_infobox", fingerprints)
+    assert "api" in inputs
+    assert habitats in inputs
+
+    # new tiles in the mbtiles file change the fingerprint of the layer
+    with sqlite3.connect(tile_server.server.mbtiles.path) as connection:
+        connection.execute("UPDATE tiles SET tile_data = ?", (b"new tile",))
+    changed = input_fingerprints(
+        frontend_url="",
+        urls=urls,
+        catalogue=_catalogue(f"{tile_server.url}mytiles"),
+        timeout=1,
+    )
+    assert changed[habitats] != fingerprints[habitats]
+
+
+def test_code_fingerprint(tmp_path):
+    """
+    test_code_fingerprint: the sources of the tests and helpers change the
+        fingerprint, the other files do not
+    """
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "frontend_test").mkdir()
+    (tmp_path / "tests" / "test_a.py").write_text("assert True\n")
+    (tmp_path / "frontend_test" / "flows.py").write_text("STEP = 1\n")
+    value = code_fingerprint(str(tmp_path))
+    (tmp_path / "README.md").write_text("notes")
+    (tmp_path / "tests" / "notes.txt").write_text("notes")
+    assert code_fingerprint(str(tmp_path)) == value
+    (tmp_path / "frontend_test" / "flows.py").write_text("STEP = 2\n")
+    assert code_fingerprint(str(tmp_path)) != value
+
+
+def test_pass_store(tmp_path):
+    """
+    test_pass_store: a test is unchanged if it passed with the same inputs
+    """
+    path = str(tmp_path / "passed.json")
+    store = PassStore(path)
+    store.record("a", {"frontend": "1", "layers": "2"})
+    store.record("b", {"frontend": "1", "layers": None})
+    store.save()
+    store = PassStore(path)
+    assert store.unchanged("a", {"frontend": "1", "layers": "2"})
+    assert not store.unchanged("a", {"frontend": "3", "layers": "2"})
+    assert not store.unchanged("b", {"frontend": "1", "layers": None})
+    store.forget("a")
+    assert not store.unchanged("a", {"frontend": "1", "layers": "2"})
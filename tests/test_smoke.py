@@ -0,0 +1,86 @@
+"""
+Tests of the smoke checks of the backends, against the local mbtiles server
+(tile_server fixture, conftest.py).
+"""
+from frontend_test.catalogue import catalogue_layers
+from frontend_test.smoke import failures, layer_probes, run_probes, run_smoke
+
+CATALOGUE = {
+    "Data Exploration": {
+        "layerNames": {
+            "Bathymetry": {
+                "layerNames": {
+                    "Haig Fras": {"dataType": "COG", "url": "https://store/haig.tif"},
+                }
+            },
+            "Seabed Habitats": {
+                "layerNames": {
+                    "EUSeaMap": {
+                        "dataType": "WMS",
+                        "url": "https://ows.emodnet-seabedhabitats.eu/wms",
+                        "params": {"layers": "eusm2021_eunis2019_group"},
+                    },
+                    "Habitats": {"dataType": "MBTiles", "url": "http://localhost:8082/mytiles"},
+                }
+            },
+        }
+    }
+}
+
+URLS = {
+    "layers_json": "",
+    "api": "http://localhost:8081/",
+    "tile_server": "http://localhost:8083/",
+    "mbtiles": "http://localhost:8082/",
+}
+
+
+def test_layer_probes():
+    """
+    test_layer_probes: every layer of the catalogue gets its probes
+    """
+    layers = catalogue_layers(CATALOGUE)
+    assert [name for name, _ in layers] == [
+        "Data Exploration - Bathymetry - Haig Fras",
+        "Data Exploration - Seabed Habitats - EUSeaMap",
+        "Data Exploration - Seabed Habitats - Habitats",
+    ]
+    probes = [probe for name, layer in layers for probe in layer_probes(name, layer, URLS)]
+    assert [probe["kind"] for probe in probes] == [
+        "cog info",
+        "cog tile",
+        "wms capabilities",
+        "wms map",
+        "tile",
+    ]
+    assert probes[1]["url"].startswith("http://localhost:8083/cog/tiles/10/")
+    assert "layers=eusm2021_eunis2019_group" in probes[3]["url"]
+    assert probes[4]["url"].startswith("http://localhost:8082/mytiles/10/")
+
+
+def test_run_probes(tile_server):
+    """
+    test_run_probes: the probes are sent concurrently and the failures are
+        reported
+    """
+    layer = {"dataType": "MBTiles", "url": f"{tile_server.url}mytiles"}
+    probes = layer_probes("Habitats", layer, URLS)
+    probes.append(
+        {"name": "missing", "kind": "file", "url": f"{tile_server.url}missing", "expected": None}
+    )
+    results = run_probes(probes, timeout=5, max_connections=2)
+    assert [result["status"] for result in results] == [200, 404]
+    assert results[0]["ok"]
+    assert results[0]["latency"] > 0
+    assert failures(results) == [f"missing (file): status 404 - {tile_server.url}missing"]
+
+
+def test_run_smoke_no_catalogue(tile_server):
+    """
+    test_run_smoke_no_catalogue: a missing catalogue url is a failure, not a
+        run without layers
+    """
+    results = run_smoke(dict(URLS, api=tile_server.url), timeout=5)
+    assert [result["name"] for result in results] == ["catalogue", "calculations API"]
+    assert not results[0]["ok"]
+    assert failures(results)[0] == "catalogue (layers.json): VITE_LAYERS_JSON_URL is not set - "
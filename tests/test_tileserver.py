@@ -0,0 +1,45 @@
+"""
+Tests of the local mbtiles server (tile_server fixture, conftest.py).
+"""
+import requests
+
+
+def test_tile(tile_server):
+    """
+    test_tile: the tile is found with the XYZ scheme and has cache headers
+    """
+    response = requests.get(f"{tile_server.url}mytiles/2/1/0.png", timeout=5)
+    assert response.status_code == 200
+    assert response.content == b"tile"
+    assert response.headers["Content-Type"] == "image/png"
+    assert "max-age" in response.headers["Cache-Control"]
+
+    response = requests.get(
+        f"{tile_server.url}2/1/0.png",
+        headers={"If-None-Match": response.headers["ETag"]},
+        timeout=5,
+    )
+    assert response.status_code == 304
+
+
+def test_missing_tile(tile_server):
+    """
+    test_missing_tile: a missing tile is an empty response
+    """
+    response = requests.get(f"{tile_server.url}mytiles/2/1/1.png", timeout=5)
+    assert response.status_code == 204
+    response = requests.get(f"{tile_server.url}not-a-tile", timeout=5)
+    assert response.status_code == 404
+
+
+def test_cache(tile_server):
+    """
+    test_cache: the least recently used tiles are removed from the cache
+    """
+    mbtiles = tile_server.server.mbtiles
+    mbtiles.cache.size = 1
+    assert mbtiles.tile(2, 1, 0)[0] == b"tile"
+    assert mbtiles.cache.get((2, 1, 0)) is not None
+    assert mbtiles.tile(2, 1, 1) is None
+    mbtiles.cache.put((0, 0, 0), (b"other", '"etag"'))
+    assert mbtiles.cache.get((2, 1, 0)) is None
@@ -0,0 +1,77 @@
+"""
+Tests of the failure traces, with the logs of chromedriver given by a fake
+driver (log_driver fixture, conftest.py).
+"""
+import json
+from selenium.common.exceptions import WebDriverException
+from frontend_test.tracing import FlightRecorder, har_from_events, trace_directory
+
+
+def _request(driver, request_id, url):
+    driver.send(
+        "Network.requestWillBeSent",
+        requestId=request_id,
+        timestamp=1.0,
+        wallTime=1700000000.0,
+        request={"url": url, "method": "GET", "headers": {"Accept": "*/*"}},
+    )
+
+
+def test_har_from_events():
+    """
+    test_har_from_events: one HAR entry by request, with its status and time
+    """
+    events = [
+        ("Network.requestWillBeSent", {"requestId": "1", "timestamp": 1.0, "wallTime": 1700000000.0, "request": {"url": "http://a/1.png"}}),
+        ("Network.responseReceived", {"requestId": "1", "response": {"status": 200, "mimeType": "image/png"}}),
+        ("Network.loadingFinished", {"requestId": "1", "timestamp": 1.25, "encodedDataLength": 42}),
+        ("Network.requestWillBeSent", {"requestId": "2", "timestamp": 2.0, "request": {"url": "http://a/2.png"}}),
+        ("Network.loadingFailed", {"requestId": "2", "timestamp": 3.0, "errorText": "net::ERR_FAILED"}),
+    ]
+    entries = har_from_events(events)["log"]["entries"]
+    assert [entry["request"]["url"] for entry in entries] == ["http://a/1.png", "http://a/2.png"]
+    assert entries[0]["response"]["status"] == 200
+    assert entries[0]["response"]["bodySize"] == 42
+    assert entries[0]["time"] == 250.0
+    assert entries[0]["startedDateTime"].startswith("2023-11-14T22:13:20")
+    assert entries[1]["_error"] == "net::ERR_FAILED"
+
+
+def test_flight_recorder(tmp_path, log_driver):
+    """
+    test_flight_recorder: the buffers are bounded, cleared at the start of a
+        test and written on flush
+    """
+    driver = log_driver
+    recorder = FlightRecorder(driver, size=2)
+    _request(driver, "old", "http://a/old.png")
+    recorder.clear()
+    for idx in range(3):
+        _request(driver, str(idx), f"http://a/{idx}.png")
+    driver.send("Tracing.dataCollected", name="Layout", ph="X", ts=1, dur=2)
+    driver.logs["browser"].append({"level": "SEVERE", "message": "tile failed"})
+    directory = str(tmp_path / trace_directory("tests/test_with_pytest.py::Test_URL::test_infobox"))
+    paths = recorder.flush(directory)
+    assert [path.split("/")[-1] for path in paths] == ["trace.json", "network.har", "console.json"]
+    with open(paths[0]) as trace_file:
+        assert json.load(trace_file)["traceEvents"][0]["name"] == "Layout"
+    with open(paths[1]) as har_file:
+        entries = json.load(har_file)["log"]["entries"]
+    assert [entry["request"]["url"] for entry in entries] == ["http://a/1.png", "http://a/2.png"]
+    with open(paths[2]) as console_file:
+        assert json.load(console_file)[0]["message"] == "tile failed"
+
+
+def test_flight_recorder_closed(log_driver):
+    """
+    test_flight_recorder_closed: the logs of a browser that is gone are not
+        read, without error
+    """
+    recorder = FlightRecorder(log_driver)
+
+    def _get_log(log_type):
+        raise WebDriverException("invalid session id")
+
+    log_driver.get_log = _get_log
+    recorder.collect()
+    assert not recorder.network and not recorder.console
@@ -3,65 +3,46 @@ Pytest codes for the Frontend Haig Fras.
 It is based on pytest and selenium.
 To run the tests, you need to run make test
 """
-from time import sleep
-import os
 import pytest
 from dotenv import load_dotenv
-from selenium import webdriver
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.select import Select
 
-import requests
+from frontend_test.assets import check_images
+from frontend_test.bathymetry import (
+    BATHYMETRY_RASTER,
+    report_lines,
+    request_profile,
+    validate_profile,
+)
+from frontend_test.flows import (
+    INFOBOX_SITE,
+    MBTILES_URL_PART,
+    PROFILE_SITES,
+    click_map,
+    layer_finder,
+    reset_app,
+    toggle_layer,
+)
+from frontend_test.network import network_mark, wait_layer_loaded
+from frontend_test.pages import GraphBox, Sidebar, leaflet_map
 from frontend_test.utils import (
-    def_args_prefs,
     clear_map,
     click_fontawesome,
-    get_layers_mbtiles,
     get_layers,
+    get_layers_mbtiles,
+    verify_bathymetry_profile,
     verify_map_plot,
     check_info_section,
 )
-
-
-@pytest.fixture(scope="class")
-def driver_init(request):
-    """
-    driver_init: initialization of the driver using a fixture that
-        shares requested elements with scope class (other classes).
-        In this case, the following elements are being sharing: driver and url.
-
-    Args:
-        request: The request fixture is a special fixture providing information
-    of the requesting test function
-    """
-    mode = os.getenv("SELENIUM_MODE")
-    args = []
-    if mode == "HEADLESS":
-        args.append("--headless")
-
-    preferences = []
-
-    if os.getenv("SELENIUM_BROWSER") == "firefox":
-        from selenium.webdriver.firefox.options import Options
-        options = def_args_prefs(Options(), args, preferences)
-        driver = webdriver.Firefox(options=options)
-    else:
-        from selenium.webdriver.chrome.options import Options
-        args += ["--no-sandbox", "--disable-dev-shm-usage"]
-        options = def_args_prefs(Options(), args, preferences)
-        driver = webdriver.Chrome(options=options)
-
-    driver.set_window_size(1920, 1080)
-    driver.maximize_window()
-
-    request.cls.driver = driver
-    request.cls.url = os.getenv("FRONTEND_URL_LOCAL")
-    yield
-    driver.close()
+from frontend_test.wait import (
+    element_count,
+    text_contains,
+    wait_until,
+)
 
 
 @pytest.mark.usefixtures("driver_init")
@@ -87,11 +68,8 @@ class Test_URL:
         """
 
         driver = self.driver
-        driver.get(self.url)
         # clear the initial welcome screen
-        wait = WebDriverWait(driver, 30)
-        wait.until(EC.invisibility_of_element_located((By.ID, "loading")))
-        click_fontawesome(driver)
+        reset_app(driver, self.url)
 
         section_name = "Data Exploration"
         button = driver.find_element(By.ID, section_name)
@@ -104,48 +82,26 @@ class Test_URL:
         type_option = type_options[0]
         check_layer = type_option.find_element(By.TAG_NAME, "input")
         check_layer.click()
-        sleep(6)
-        layer_edit = driver.find_elements(By.ID, "layer-edit")
+        layer_edit = wait_until(
+            driver, element_count((By.ID, "layer-edit"), minimum=1), timeout=10
+        )
         assert len(layer_edit) > 0
         click_fontawesome(driver=layer_edit[0], button_name="chart-simple")
         flash_message = driver.find_elements(By.ID, "flash-message")
         assert len(flash_message) > 0
-        leaflet_map = driver.find_element(By.CLASS_NAME, "leaflet-container")
-        act_driver = ActionChains(driver)
-        act_driver.move_to_element(leaflet_map)
-        act_driver.perform()
-        act_driver.move_by_offset(50, 50)
-        act_driver.perform()
-        act_driver.click()
-        act_driver.perform()
-        act_driver.move_to_element(leaflet_map)
-        act_driver.perform()
-        act_driver.move_by_offset(100, 100)
-        act_driver.perform()
-        act_driver.click()
-        act_driver.perform()
+        click_map(driver, PROFILE_SITES)
         graph_box = driver.find_elements(By.ID, "graph-box")
         assert len(graph_box) > 0
 
         wait = WebDriverWait(driver, 7)
         graph = wait.until(EC.visibility_of_element_located((By.CLASS_NAME, "plotly")))
-        assert graph
+        verify_bathymetry_profile(driver, graph)
 
         click_fontawesome(driver=layer_edit[0], button_name="chart-simple")
         graph_box = driver.find_elements(By.ID, "graph-box")
         assert len(graph_box) == 0
 
-        act_driver = ActionChains(driver)
-        act_driver.move_to_element(leaflet_map)
-        act_driver.perform()
-        act_driver.move_by_offset(50, 50)
-        act_driver.perform()
-        act_driver.click()
-        act_driver.perform()
-        act_driver.move_to_element(leaflet_map)
-        act_driver.perform()
-        act_driver.move_by_offset(100, 100)
-        act_driver.perform()
+        click_map(driver, PROFILE_SITES[:1])
 
         click_fontawesome(driver=layer_edit[0], button_name="chart-simple")
         graph_box = driver.find_elements(By.ID, "graph-box")
@@ -159,15 +115,13 @@ class Test_URL:
             on click.
         """
         driver = self.driver
-        driver.get(self.url)
-        wait = WebDriverWait(driver, 30)
-        wait.until(EC.invisibility_of_element_located((By.ID, "loading")))
-        click_fontawesome(driver)
+        reset_app(driver, self.url)
         section_name = "Biodiversity"
         button = driver.find_element(By.ID, section_name)
         button.click()
-        sleep(5)
-        buttons = driver.find_elements(By.ID, "general-types")
+        buttons = wait_until(
+            driver, element_count((By.ID, "general-types"), minimum=1), timeout=10
+        )
         assert len(buttons) > 0
         for button in buttons:
             if button.text != 'Interannual Monitoring':
@@ -217,10 +171,7 @@ class Test_URL:
         test_habitats: test for verify habitats tab from the side bar
         """
         driver = self.driver
-        driver.get(self.url)
-        wait = WebDriverWait(driver, 30)
-        wait.until(EC.invisibility_of_element_located((By.ID, "loading")))
-        click_fontawesome(driver)
+        reset_app(driver, self.url)
         section_name = "Seabed Types"
         button = driver.find_element(By.ID, section_name)
         button.click()
@@ -251,10 +202,10 @@ class Test_URL:
                     )
                     card_types = result.find_elements(By.TAG_NAME, "button")
                     assert len(card_types) > 2
-                    for card_type in card_types:
-                        image = card_type.find_element(By.CSS_SELECTOR, "img")
-                        response = requests.get(image.get_attribute("src"), timeout=5)
-                        assert response.status_code == 200
+                    images = check_images(driver, result)
+                    assert len(images) == len(card_types)
+                    for src, status in images:
+                        assert status == 200, src
                     card_types[0].click()
                     map_icons = driver.find_elements(By.CLASS_NAME, "all-icon")
                     assert len(map_icons) > 10
@@ -283,14 +234,15 @@ class Test_URL:
         test_species: test for verify indicator species
         """
         driver = self.driver
-        driver.get(self.url)
-        wait = WebDriverWait(driver, 30)
-        wait.until(EC.invisibility_of_element_located((By.ID, "loading")))
-        click_fontawesome(driver)
+        reset_app(driver, self.url)
         section_name = "Species of Interest"
         button = driver.find_element(By.ID, section_name)
         button.click()
-        sleep(10)
+        wait_until(
+            driver,
+            element_count((By.XPATH, "//span[@title='expand']"), minimum=2),
+            timeout=10,
+        )
 
         section_title = driver.find_elements(By.TAG_NAME, "h1")
         assert section_title[0].text == section_name
@@ -304,11 +256,17 @@ class Test_URL:
 
         organisms = ["Pentapora foliacea", "Cartilagenous fish"]
         for organism in organisms:
-            sleep(10)
-            name = driver.find_elements(By.XPATH, f"//em[text()='{organism}']")
-            print(name)
-            if len(name) == 0:
-                name = driver.find_elements(By.XPATH, f"//p[text()='{organism}']")
+            name = wait_until(
+                driver,
+                element_count(
+                    (
+                        By.XPATH,
+                        f"//em[text()='{organism}'] | //p[text()='{organism}']",
+                    ),
+                    minimum=1,
+                ),
+                timeout=10,
+            )
             name[0].click()
             wait = WebDriverWait(driver, 10)
             result = wait.until(
@@ -319,10 +277,10 @@ class Test_URL:
             assert paragraph[0].text == organism
             card_types = result.find_elements(By.TAG_NAME, "button")
             assert len(card_types) > 0
-            for card_type in card_types:
-                image = card_type.find_element(By.CSS_SELECTOR, "img")
-                response = requests.get(image.get_attribute("src"), timeout=5)
-                assert response.status_code == 200
+            images = check_images(driver, result)
+            assert len(images) == len(card_types)
+            for src, status in images:
+                assert status == 200, src
             map_icons = driver.find_elements(By.CLASS_NAME, "all-icon")
             assert len(map_icons) > 0
             map_limit = driver.find_elements(
@@ -347,35 +305,30 @@ class Test_URL:
         test_biodiversity: test for verify biodiversity tab
         """
         driver = self.driver
-        driver.get(self.url)
-        wait = WebDriverWait(driver, 30)
-        wait.until(EC.invisibility_of_element_located((By.ID, "loading")))
-        click_fontawesome(driver)
+        reset_app(driver, self.url)
         section_name = "Biodiversity"
-        button = driver.find_element(By.ID, section_name)
-        button.click()
+        sidebar = Sidebar(driver)
+        sidebar.open_section(section_name)
 
-        section_title = driver.find_elements(By.TAG_NAME, "h1")
-        assert section_title[0].text == section_name
+        assert sidebar.section_titles()[0] == section_name
 
         check_info_section(driver, section_name)
 
-        general_types = driver.find_elements(By.ID, "general-types")
-        for idx, general_type in enumerate(general_types):
+        general_types = sidebar.general_types
+        general_types_text = [general_type.text for general_type in general_types]
+        for idx, general_type_text in enumerate(general_types_text):
             check_info_section(
                 driver,
-                title=general_type.text,
+                title=general_type_text,
                 id_name="info-subsection-button",
                 idx=idx,
             )
 
-        buttons = driver.find_elements(By.ID, "general-types")
-        assert len(buttons) > 0
-        for button in buttons:
-            if button.text != 'Interannual Monitoring':
-                button.click()
-                type_options = driver.find_elements(By.ID, "type-option")
-                for type_option in type_options:
+        assert len(general_types) > 0
+        for general_type, general_type_text in zip(general_types, general_types_text):
+            if general_type_text != 'Interannual Monitoring':
+                sidebar.expand(general_type)
+                for type_option in sidebar.type_options:
                     type_options_text = type_option.text
                     type_option.click()
                     wait = WebDriverWait(driver, 10)
@@ -390,11 +343,9 @@ class Test_URL:
                         assert len(card_types) > 0
                         click_fontawesome(driver)
 
-        button = driver.find_element(By.ID, section_name)
-        button.click()
+        sidebar.close_section(section_name)
 
-        section_title = driver.find_elements(By.TAG_NAME, "h1")
-        assert len(section_title) == 1
+        assert len(sidebar.section_titles()) == 1
 
         self.driver = driver
 
@@ -403,17 +354,14 @@ class Test_URL:
         test_survey_design: test for verify survey design tab
         """
         driver = self.driver
-        driver.get(self.url)
-        wait = WebDriverWait(driver, 30)
-        wait.until(EC.invisibility_of_element_located((By.ID, "loading")))
-        click_fontawesome(driver)
+        reset_app(driver, self.url)
 
         section_name = "Survey Design"
-        button = driver.find_element(By.ID, section_name)
-        button.click()
+        sidebar = Sidebar(driver)
+        graph = GraphBox(driver)
+        sidebar.open_section(section_name)
 
-        section_title = driver.find_elements(By.TAG_NAME, "h1")
-        assert section_title[0].text == section_name
+        assert sidebar.section_titles()[0] == section_name
 
         check_info_section(driver, section_name)
 
@@ -426,61 +374,54 @@ class Test_URL:
         #         idx=idx,
         #     )
 
-        buttons = driver.find_elements(By.XPATH, "//span[@title='expand']")
-        assert len(buttons) > 0
+        assert len(sidebar.expand_buttons) > 0
 
-        buttons[0].click()
-        type_options = driver.find_elements(By.ID, "type-option")
-        for type_option in type_options:
+        sidebar.expand(0)
+        for type_option in sidebar.type_options:
             type_options_text = type_option.text
             type_option.click()
             wait = WebDriverWait(driver, 10)
-            result = wait.until(
-                EC.visibility_of_element_located((By.ID, "dynamic-graph"))
-            )
-            select_box = Select(driver.find_element(By.ID, "select_habitat"))
+            wait.until(EC.visibility_of_element_located((By.ID, "dynamic-graph")))
+            select_box = graph.select("select_habitat")
             number_options = len(select_box.options)
             for option_idx in range(number_options):
                 if option_idx > 0:
-                    select_box = Select(driver.find_element(By.ID, "select_habitat"))
                     select_box.select_by_index(option_idx)
                     wait = WebDriverWait(driver, 10)
-                    result = wait.until(
+                    wait.until(
                         EC.visibility_of_element_located((By.ID, "dynamic-graph"))
                     )
+                result = graph.box
                 assert len(result.text) > 5
-                paragraph = result.find_elements(By.TAG_NAME, "p")
-                assert paragraph[0].text == type_options_text
-                hover_values = result.find_elements(By.ID, "hover-value")
-                assert len(hover_values) == 0
-                range_values = result.find_elements(By.ID, "range-value")
-                assert len(range_values) == 2
-                select_box_bios = driver.find_elements(By.ID, "select_biodiversity")
-                if len(select_box_bios) > 0:
-                    select_box_bio = Select(
-                        driver.find_element(By.ID, "select_biodiversity")
-                    )
+                assert graph.title() == type_options_text
+                assert graph.count("hover-value") == 0
+                assert graph.count("range-value") == 2
+                if graph.has_select("select_biodiversity"):
+                    select_box_bio = graph.select("select_biodiversity")
                     number_options_bio = len(select_box_bio.options)
                     for option_bio_idx in range(number_options_bio):
-                        select_box_bio = Select(
-                            driver.find_element(By.ID, "select_biodiversity")
-                        )
                         option_selected_bio = select_box_bio.options[
                             number_options_bio - option_bio_idx - 1
                         ].text
                         select_box_bio.select_by_index(
                             number_options_bio - option_bio_idx - 1
                         )
-                        sleep(5)
+                        wait_until(
+                            driver,
+                            text_contains(
+                                (By.CSS_SELECTOR, "#dynamic-graph .ytitle"),
+                                option_selected_bio,
+                                case_sensitive=True,
+                            ),
+                            timeout=10,
+                        )
                         verify_map_plot(driver, result, option_selected_bio)
                 else:
                     verify_map_plot(driver, result, "Density (counts/m2)")
 
-        button = driver.find_element(By.ID, section_name)
-        button.click()
+        sidebar.close_section(section_name)
 
-        section_title = driver.find_elements(By.TAG_NAME, "h1")
-        assert len(section_title) == 1
+        assert len(sidebar.section_titles()) == 1
 
         self.driver = driver
 
@@ -491,10 +432,7 @@ class Test_URL:
         """
 
         driver = self.driver
-        driver.get(self.url)
-        wait = WebDriverWait(driver, 30)
-        wait.until(EC.invisibility_of_element_located((By.ID, "loading")))
-        click_fontawesome(driver)
+        reset_app(driver, self.url)
 
         section_name = "Data Exploration"
         button = driver.find_element(By.ID, section_name)
@@ -516,11 +454,11 @@ class Test_URL:
         new_layer = get_layers(driver)
         assert not new_layer
         check_layer = type_option.find_element(By.TAG_NAME, "input")
+        since = network_mark(driver)
         check_layer.click()
-        sleep(30)
+        new_layer = wait_layer_loaded(driver, timeout=30, since=since)
         layer_edit = driver.find_elements(By.ID, "layer-edit")
         assert len(layer_edit) > 0
-        new_layer = get_layers(driver)
         assert new_layer
         general_types = driver.find_elements(By.ID, "general-types")
         check_info_section(
@@ -529,64 +467,34 @@ class Test_URL:
             id_name="info-subsection-button",
         )
 
-        layer_values = (
-            new_layer.get_attribute("style")
-            .replace(":", "")
-            .replace(";", "")
-            .split(" ")
-        )
+        layer_values = new_layer
         click_fontawesome(driver=layer_edit[0], button_name="magnifying-glass")
-        new_layer = get_layers(driver)
-        layer_values_new = (
-            new_layer.get_attribute("style")
-            .replace(":", "")
-            .replace(";", "")
-            .split(" ")
-        )
-        assert int(layer_values[1]) < int(layer_values_new[1])
+        layer_values_new = get_layers(driver)
+        assert layer_values["z_index"] < layer_values_new["z_index"]
         input_range = driver.find_elements(By.XPATH, "//input[@type='range']")
         assert len(input_range) == 0
         click_fontawesome(driver=layer_edit[0], button_name="sliders")
         input_range = driver.find_elements(By.XPATH, "//input[@type='range']")
         assert len(input_range) > 0
         input_range[0].send_keys(Keys.LEFT)
-        new_layer = get_layers(driver)
-        layer_values_new = (
-            new_layer.get_attribute("style")
-            .replace(":", "")
-            .replace(";", "")
-            .split(" ")
-        )
-        assert float(layer_values[3]) > float(layer_values_new[3])
+        layer_values_new = get_layers(driver)
+        assert layer_values["opacity"] > layer_values_new["opacity"]
         flash_message = driver.find_elements(By.ID, "flash-message")
         assert len(flash_message) == 0
         click_fontawesome(driver=layer_edit[0], button_name="chart-simple")
         flash_message = driver.find_elements(By.ID, "flash-message")
         assert len(flash_message) > 0
 
-        leaflet_map = driver.find_element(By.CLASS_NAME, "leaflet-container")
-        act_driver = ActionChains(driver)
-        act_driver.move_to_element(leaflet_map)
-        act_driver.perform()
-        act_driver.move_by_offset(50, 50)
-        act_driver.perform()
-        act_driver.click()
-        act_driver.perform()
-        act_driver.move_to_element(leaflet_map)
-        act_driver.perform()
-        act_driver.move_by_offset(100, 100)
-        act_driver.perform()
-        act_driver.click()
-        act_driver.perform()
+        profile = request_profile(driver, PROFILE_SITES)
         graph_box = driver.find_elements(By.ID, "graph-box")
         assert len(graph_box) > 0
 
         wait = WebDriverWait(driver, 7)
         graph = wait.until(EC.visibility_of_element_located((By.CLASS_NAME, "plotly")))
-        lines = graph.find_elements(By.CLASS_NAME, "scatter")
-        assert len(lines) > 0
-        x_label = graph.find_element(By.CLASS_NAME, "xtitle")
-        assert x_label.text == "Distance (km)"
+        if BATHYMETRY_RASTER:
+            report = validate_profile(driver, graph, profile)
+            assert report["ok"], "\n".join(report_lines(report))
+        verify_bathymetry_profile(driver, graph)
         click_fontawesome(driver)
         graph_box = driver.find_elements(By.ID, "graph-box")
         assert len(graph_box) == 0
@@ -608,10 +516,7 @@ class Test_URL:
             images
         """
         driver = self.driver
-        driver.get(self.url)
-        wait = WebDriverWait(driver, 30)
-        wait.until(EC.invisibility_of_element_located((By.ID, "loading")))
-        click_fontawesome(driver)
+        reset_app(driver, self.url)
 
         section_name = "Data Exploration"
         button = driver.find_element(By.ID, section_name)
@@ -639,12 +544,11 @@ class Test_URL:
         map_icons = driver.find_elements(By.CLASS_NAME, "all-icon")
         assert len(map_icons) == 0
         check_layer = type_option.find_element(By.TAG_NAME, "input")
-        #check test in this part
-        sleep(3)
+        # toggle the layer on, off and on again
         check_layer.click()
-        sleep(3)
+        wait_until(driver, element_count((By.CLASS_NAME, "all-icon"), minimum=1))
         check_layer.click()
-        sleep(3)
+        wait_until(driver, element_count((By.CLASS_NAME, "all-icon"), maximum=0))
         check_layer.click()
         wait = WebDriverWait(driver, 5)
         map_icon = wait.until(
@@ -680,11 +584,7 @@ class Test_URL:
         assert len(input_range) == 0
 
         map_icon = driver.find_element(By.CLASS_NAME, "leaflet-marker-icon")
-        act_driver = ActionChains(driver)
-        act_driver.move_to_element(map_icon)
-        act_driver.perform()
-        act_driver.click(map_icon)
-        act_driver.perform()
+        ActionChains(driver).move_to_element(map_icon).click(map_icon).perform()
 
         wait = WebDriverWait(driver, 7)
         map_icon_red = wait.until(
@@ -693,9 +593,11 @@ class Test_URL:
             )
         )
         assert map_icon_red
-        sleep(5)
-        popup = driver.find_element(By.CLASS_NAME, "leaflet-popup-content")
-        sleep(5)
+        popup = wait_until(
+            driver,
+            text_contains((By.CLASS_NAME, "leaflet-popup-content"), type_option.text),
+            timeout=10,
+        )
         assert type_option.text.lower() in popup.text.lower()
         check_layer.click()
         polygons = driver.find_elements(
@@ -723,10 +625,7 @@ class Test_URL:
         """
 
         driver = self.driver
-        driver.get(self.url)
-        wait = WebDriverWait(driver, 30)
-        wait.until(EC.invisibility_of_element_located((By.ID, "loading")))
-        click_fontawesome(driver)
+        reset_app(driver, self.url)
 
         section_name = "Data Exploration"
         button = driver.find_element(By.ID, section_name)
@@ -749,22 +648,22 @@ class Test_URL:
                 type_option = option
         layer_edit = driver.find_elements(By.ID, "layer-edit")
         assert len(layer_edit) == 0
-        new_layer = get_layers_mbtiles(driver)
+        new_layer = get_layers_mbtiles(driver, url_part=MBTILES_URL_PART)
         assert not new_layer
 
         check_layer = type_option.find_element(By.TAG_NAME, "input")
+        since = network_mark(driver)
         check_layer.click()
-        sleep(5)
-        driver.find_element(By.CLASS_NAME, "leaflet-control-zoom-out").click()
-        sleep(5)
-        new_layer = get_layers_mbtiles(driver)
-        assert new_layer
-        layer_values = (
-            new_layer.get_attribute("style")
-            .replace(":", "")
-            .replace(";", "")
-            .split(" ")
+        wait_until(driver, element_count((By.ID, "layer-edit"), minimum=1), timeout=10)
+        leaflet_map(driver).zoom_out()
+        new_layer = wait_layer_loaded(
+            driver,
+            url_part=MBTILES_URL_PART,
+            timeout=10,
+            since=since,
         )
+        assert new_layer
+        layer_values = new_layer
         layer_edit = driver.find_elements(By.ID, "layer-edit")
         assert len(layer_edit) > 0
         input_range = driver.find_elements(By.XPATH, "//input[@type='range']")
@@ -773,18 +672,13 @@ class Test_URL:
         input_range = driver.find_elements(By.XPATH, "//input[@type='range']")
         assert len(input_range) > 0
         input_range[0].send_keys(Keys.LEFT)
-        new_layer = get_layers_mbtiles(driver)
-        layer_values_new = (
-            new_layer.get_attribute("style")
-            .replace(":", "")
-            .replace(";", "")
-            .split(" ")
-        )
-        assert float(layer_values[3]) > float(layer_values_new[3])
+        layer_values_new = get_layers_mbtiles(driver, url_part=MBTILES_URL_PART)
+        assert layer_values["opacity"] > layer_values_new["opacity"]
 
         click_fontawesome(driver=layer_edit[0], button_name="list")
-        sleep(3)
-        legend_box = driver.find_elements(By.ID, "legend-box")
+        legend_box = wait_until(
+            driver, element_count((By.ID, "legend-box"), minimum=1), timeout=10
+        )
         assert len(legend_box) > 0
         assert type_option.text in legend_box[0].text
 
@@ -795,14 +689,7 @@ class Test_URL:
         legend_box = driver.find_elements(By.ID, "legend-box")
         assert len(legend_box) == 0
 
-        leaflet_map = driver.find_element(By.CLASS_NAME, "leaflet-container")
-        act_driver = ActionChains(driver)
-        act_driver.move_to_element(leaflet_map)
-        act_driver.perform()
-        act_driver.move_by_offset(50, 50)
-        act_driver.perform()
-        act_driver.click()
-        act_driver.perform()
+        click_map(driver, [INFOBOX_SITE])
 
         wait = WebDriverWait(driver, 10)
         popup = wait.until(
@@ -832,10 +719,7 @@ class Test_URL:
         test_data_wms: test for verify wms layers
         """
         driver = self.driver
-        driver.get(self.url)
-        wait = WebDriverWait(driver, 30)
-        wait.until(EC.invisibility_of_element_located((By.ID, "loading")))
-        click_fontawesome(driver)
+        reset_app(driver, self.url)
 
         section_name = "Data Exploration"
         button = driver.find_element(By.ID, section_name)
@@ -857,20 +741,17 @@ class Test_URL:
         type_option = type_options[0]
         layer_edit = driver.find_elements(By.ID, "layer-edit")
         assert len(layer_edit) == 0
-        new_layer = get_layers_mbtiles(driver)
+        new_layer = get_layers(driver, url_part="seabedhabitats")
         assert not new_layer
 
         check_layer = type_option.find_element(By.TAG_NAME, "input")
+        since = network_mark(driver)
         check_layer.click()
-        sleep(7)
-        new_layer = get_layers(driver, url_part="seabedhabitats")
-        assert new_layer
-        layer_values = (
-            new_layer.get_attribute("style")
-            .replace(":", "")
-            .replace(";", "")
-            .split(" ")
+        new_layer = wait_layer_loaded(
+            driver, url_part="seabedhabitats", timeout=10, since=since
         )
+        assert new_layer
+        layer_values = new_layer
         layer_edit = driver.find_elements(By.ID, "layer-edit")
         assert len(layer_edit) > 0
         input_range = driver.find_elements(By.XPATH, "//input[@type='range']")
@@ -879,18 +760,13 @@ class Test_URL:
         input_range = driver.find_elements(By.XPATH, "//input[@type='range']")
         assert len(input_range) > 0
         input_range[0].send_keys(Keys.LEFT)
-        new_layer = get_layers(driver, url_part="seabedhabitats")
-        layer_values_new = (
-            new_layer.get_attribute("style")
-            .replace(":", "")
-            .replace(";", "")
-            .split(" ")
-        )
-        assert float(layer_values[3]) > float(layer_values_new[3])
+        layer_values_new = get_layers(driver, url_part="seabedhabitats")
+        assert layer_values["opacity"] > layer_values_new["opacity"]
 
         click_fontawesome(driver=layer_edit[0], button_name="list")
-        sleep(3)
-        legend_box = driver.find_elements(By.ID, "legend-box")
+        legend_box = wait_until(
+            driver, element_count((By.ID, "legend-box"), minimum=1), timeout=10
+        )
         assert len(legend_box) > 0
         assert type_option.text in legend_box[0].text
         legend_image = legend_box[0].find_elements(By.TAG_NAME, "img")
@@ -899,14 +775,7 @@ class Test_URL:
         legend_box = driver.find_elements(By.ID, "legend-box")
         assert len(legend_box) == 0
 
-        leaflet_map = driver.find_element(By.CLASS_NAME, "leaflet-container")
-        act_driver = ActionChains(driver)
-        act_driver.move_to_element(leaflet_map)
-        act_driver.perform()
-        act_driver.move_by_offset(50, 50)
-        act_driver.perform()
-        act_driver.click()
-        act_driver.perform()
+        click_map(driver, [INFOBOX_SITE])
         wait = WebDriverWait(driver, 10)
         popup = wait.until(
             EC.visibility_of_element_located((By.CLASS_NAME, "leaflet-popup-content"))
@@ -938,22 +807,57 @@ class Test_URL:
         test_infobox: test for verify infobox layer
         """
         driver = self.driver
-        driver.get(self.url)
-        wait = WebDriverWait(driver, 30)
-        wait.until(EC.invisibility_of_element_located((By.ID, "loading")))
-        click_fontawesome(driver)
-        sleep(2)
-        infobox_container = driver.find_element(By.ID, "infobox-container")
+        reset_app(driver, self.url)
+        infobox_container = wait_until(
+            driver, text_contains((By.ID, "infobox-container"), "---"), timeout=10
+        )
         assert "---" in infobox_container.text
-        leaflet_map = driver.find_element(By.CLASS_NAME, "leaflet-container")
-        act_driver = ActionChains(driver)
-        act_driver.move_to_element(leaflet_map)
-        act_driver.perform()
-        act_driver.move_by_offset(50, 50)
-        act_driver.perform()
-        act_driver.click()
-        act_driver.perform()
+        click_map(driver, [INFOBOX_SITE])
         infobox_container = driver.find_element(By.ID, "infobox-container")
         assert "---" not in infobox_container.text
 
         self.driver = driver
+
+
+@pytest.mark.usefixtures("driver_init")
+class Test_Layers:
+    """
+    Test_Layers: one independent test by tile layer of the catalogue
+        (layers.json), so the layers can be distributed over the workers
+    """
+
+    def test_layer(self, layer_case):
+        """
+        test_layer: add the layer to the map, change its opacity, open its
+            legend and remove it. The test is parametrised with the layers of
+            the catalogue by pytest_generate_tests (conftest.py).
+        """
+        driver = self.driver
+        reset_app(driver, self.url)
+        find_layer = layer_finder(layer_case)
+        assert not find_layer(driver)
+
+        check_layer, layer_values = toggle_layer(driver, layer_case)
+        assert layer_values
+        layer_edit = driver.find_elements(By.ID, "layer-edit")
+        assert len(layer_edit) > 0
+
+        click_fontawesome(driver=layer_edit[0], button_name="sliders")
+        input_range = wait_until(
+            driver,
+            element_count((By.XPATH, "//input[@type='range']"), minimum=1),
+            timeout=10,
+        )
+        input_range[0].send_keys(Keys.LEFT)
+        assert layer_values["opacity"] > find_layer(driver)["opacity"]
+
+        click_fontawesome(driver=layer_edit[0], button_name="list")
+        legend_box = wait_until(
+            driver, element_count((By.ID, "legend-box"), minimum=1), timeout=10
+        )
+        assert layer_case["name"].lower() in legend_box[0].text.lower()
+        click_fontawesome(driver)
+        assert len(driver.find_elements(By.ID, "legend-box")) == 0
+
+        check_layer.click()
+        wait_until(driver, lambda page: not find_layer(page), timeout=10)